@@ -0,0 +1,260 @@
+"""mlshim's own overhead per MATLAB® run, measured against a fake MATLAB®.
+
+MATLAB® itself is replaced by ``tests/fake_matlab.py``, which honours
+``-logfile`` and ``-r "run('...')"`` and can be given a startup delay and
+an amount of log output. What is left is the time mlshim adds:
+
+``instance``, ``render``, ``write``
+    Creating a ``Matlab`` object, rendering and writing the run script.
+``spawn``, ``log_wait``, ``boot``, ``execute``, ``exit``
+    The phases of ``Matlab.run`` (see ``mlshim.metrics``), medians over
+    ``-n`` runs.
+``detection``
+    From the fake MATLAB® exiting until ``Matlab.run`` returned.
+``overhead``
+    Wall time of ``Matlab.run`` minus the time the fake spent running.
+    Includes starting the fake's Python interpreter, which makes up most
+    of ``log_wait``.
+``parse_log/<size>``, ``scanner/<size>``
+    Parsing a log of each size with ``parse_log`` and with the
+    ``LogScanner`` used while following a run.
+
+Run it from the repository root with mlshim importable, i.e. installed
+with ``pip install -e .`` or put on the path::
+
+    PYTHONPATH=. python benchmarks/bench_overhead.py
+
+Results can be saved with ``--json`` and compared with an earlier run,
+e.g. of another commit, with ``--compare``::
+
+    PYTHONPATH=. python benchmarks/bench_overhead.py -n 20 --json HEAD.json
+    git checkout main
+    PYTHONPATH=. python benchmarks/bench_overhead.py -n 20 --compare HEAD.json
+
+Commits that do not record run phases yet only report ``detection`` and
+``overhead`` for the runs.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+
+from mlshim import Matlab
+from mlshim.parser import LogScanner
+from mlshim.parser import parse_log
+from mlshim.retention import parse_size
+from mlshim.tail import LogTailer
+
+try:
+    from mlshim.metrics import MetricsRegistry
+except ImportError:
+    # Commits before run phases were recorded, see --compare.
+    MetricsRegistry = None
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, os.pardir, "tests"))
+import fake_matlab  # noqa: E402
+
+PHASES = ("spawn", "log_wait", "boot", "execute", "exit")
+
+
+def summary(samples):
+    """Median and 90th percentile of ``samples`` in seconds."""
+    samples = sorted(samples)
+    p90 = samples[min(len(samples) - 1, int(len(samples) * 0.9))]
+    return {"median": statistics.median(samples), "p90": p90}
+
+
+def per_call(func, repeat):
+    """Seconds per call of ``func``, one sample per call."""
+    return [timeit.timeit(func, number=1) for _ in range(repeat)]
+
+
+def bench_script(root, work, repeat):
+    scripts = ["disp('Hello World');"]
+    matlab = Matlab(
+        root=root, template="run_template.m", working_directory=work
+    )
+    body = matlab.render_template(scripts=scripts)
+    return {
+        "instance": per_call(
+            lambda: Matlab(
+                root=root, template="run_template.m", working_directory=work
+            ),
+            repeat,
+        ),
+        "render": per_call(
+            lambda: matlab.render_template(scripts=scripts), repeat
+        ),
+        "write": per_call(lambda: matlab._write_script(body), repeat),
+    }
+
+
+def bench_runs(root, work, repeat, startup_delay, output):
+    times_file = os.path.join(work, "fake_times.txt")
+    os.environ["FAKE_MATLAB_STARTUP_DELAY"] = str(startup_delay)
+    os.environ["FAKE_MATLAB_OUTPUT_BYTES"] = str(output)
+    os.environ["FAKE_MATLAB_TIMES"] = times_file
+    samples = {name: [] for name in PHASES + ("detection", "overhead")}
+    kwargs = dict()
+    if MetricsRegistry is not None:
+        kwargs["metrics"] = MetricsRegistry()
+    matlab = Matlab(
+        root=root,
+        template="run_template.m",
+        working_directory=work,
+        **kwargs,
+    )
+    for _ in range(repeat):
+        if os.path.exists(times_file):
+            os.unlink(times_file)
+        t_start = time.time()
+        matlab.run(scripts=["disp('Hello World');"])
+        t_end = time.time()
+        with open(times_file) as fid:
+            fake_start, fake_end = map(float, fid.read().split())
+        result = getattr(matlab, "result", None)
+        phases = {} if result is None else result.phases
+        for phase, seconds in phases.items():
+            if phase in samples:
+                samples[phase].append(seconds)
+        samples["detection"].append(t_end - fake_end)
+        samples["overhead"].append((t_end - t_start) - (fake_end - fake_start))
+    return samples
+
+
+def bench_parse(work, sizes, min_time=0.5):
+    samples = dict()
+    for text in sizes:
+        size = parse_size(text)
+        path = os.path.join(work, f"log_{text}.log")
+        with open(path, "w") as log:
+            log.write("########## Started ##########\n")
+            fake_matlab.write_filler(log, size)
+            log.write("########## Finished ##########\n")
+
+        def parse():
+            for _ in parse_log(path):
+                pass
+
+        def scan():
+            with LogTailer(path) as tailer:
+                LogScanner(tailer).poll(final=True)
+
+        for name, func in (("parse_log", parse), ("scanner", scan)):
+            results = list()
+            t_start = time.monotonic()
+            while not results or time.monotonic() - t_start < min_time:
+                results.append(timeit.timeit(func, number=1))
+                if size >= 1 << 26:
+                    break
+            samples[f"{name}/{text}"] = results
+        os.unlink(path)
+    return samples
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=HERE,
+            stderr=subprocess.DEVNULL,
+            universal_newlines=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_file):
+    with open(baseline_file) as fid:
+        baseline = json.load(fid)
+    print(f"\nCompared to {baseline['meta'].get('commit')}:")
+    for name, stats in results.items():
+        old = baseline["results"].get(name)
+        if old is None or not old["median"]:
+            continue
+        ratio = stats["median"] / old["median"]
+        flag = "  <-- slower" if ratio > 1.2 else ""
+        print(
+            f"{name:>18}: {old['median'] * 1e3:10.3f} ms -> "
+            f"{stats['median'] * 1e3:10.3f} ms  {ratio:5.2f}x{flag}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument("-n", type=int, default=10, help="runs per metric")
+    parser.add_argument(
+        "--startup-delay", type=float, default=0, help="fake boot seconds"
+    )
+    parser.add_argument(
+        "--output", default="1K", help="log output of each fake run"
+    )
+    parser.add_argument(
+        "--sizes", default="1K,1M,100M", help="log sizes to parse"
+    )
+    parser.add_argument("--json", help="save the results here")
+    parser.add_argument("--compare", help="results of an earlier run")
+    args = parser.parse_args()
+    if sys.platform == "win32":
+        parser.error("the fake MATLAB® executable needs a POSIX shebang")
+
+    with tempfile.TemporaryDirectory() as directory:
+        root = fake_matlab.make_root(os.path.join(directory, "MATLAB"))
+        work = os.path.join(directory, "work")
+        os.makedirs(work)
+        samples = bench_script(root, work, args.n)
+        samples.update(
+            bench_runs(
+                root,
+                work,
+                args.n,
+                args.startup_delay,
+                parse_size(args.output),
+            )
+        )
+        samples.update(bench_parse(work, args.sizes.split(",")))
+
+    results = {
+        name: summary(values) for name, values in samples.items() if values
+    }
+    for name, stats in results.items():
+        line = (
+            f"{name:>18}: {stats['median'] * 1e3:10.3f} ms median, "
+            f"{stats['p90'] * 1e3:10.3f} ms p90"
+        )
+        if "/" in name:
+            size = parse_size(name.split("/")[1])
+            line += f", {size / stats['median'] / (1 << 20):8.1f} MiB/s"
+        print(line)
+
+    if args.json:
+        data = {
+            "meta": {
+                "commit": git_commit(),
+                "date": datetime.datetime.now().astimezone().isoformat(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "runs": args.n,
+                "startup_delay": args.startup_delay,
+                "output": args.output,
+            },
+            "results": results,
+        }
+        with open(args.json, "w") as fid:
+            json.dump(data, fid, indent=2)
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
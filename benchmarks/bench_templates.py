@@ -0,0 +1,54 @@
+"""Per-instance cost of creating a Matlab object and rendering its script.
+
+Compares a fresh Jinja2 environment per instance, as mlshim used to do,
+against the shared environment from ``mlshim.templating``. Run it from the
+repository root with mlshim installed (``pip install -e .``) or on the
+path::
+
+    PYTHONPATH=. python benchmarks/bench_templates.py [-n 1000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import timeit
+
+from jinja2 import Environment
+from jinja2 import FileSystemLoader
+
+from mlshim import Matlab
+from mlshim.templating import default_search_path
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, os.pardir, "tests"))
+import fake_matlab  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", type=int, default=1000, help="instances")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        root = fake_matlab.make_root(directory)
+        scripts = ["disp('Hello World');"]
+
+        def shared():
+            matlab = Matlab(root=root, template="run_template.m")
+            matlab.render_template(scripts=scripts)
+
+        def fresh():
+            matlab = Matlab(root=root, template="run_template.m")
+            matlab._env = Environment(
+                loader=FileSystemLoader(list(default_search_path())),
+                trim_blocks=True,
+            )
+            matlab.render_template(scripts=scripts)
+
+        for name, func in (("fresh environment", fresh), ("shared", shared)):
+            seconds = timeit.timeit(func, number=args.n)
+            print(f"{name:>18}: {seconds / args.n * 1e6:9.1f} us/instance")
+
+
+if __name__ == "__main__":
+    main()
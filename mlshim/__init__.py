@@ -1,7 +1,22 @@
 """Top-level package for mlshim"""
-from ._version import get_versions
 
-__version__ = get_versions()["version"]
-del get_versions
 
-from .matlab import Matlab
+def __getattr__(name):
+    # Imported on first use so that ``import mlshim`` stays cheap and does
+    # not need a MATLAB® install.
+    if name == "Matlab":
+        from .matlab import Matlab as value
+    elif name == "MatlabError":
+        from .exceptions import MatlabError as value
+    elif name == "LicenseError":
+        from .exceptions import LicenseError as value
+    elif name == "RetryPolicy":
+        from .retry import RetryPolicy as value
+    elif name == "__version__":
+        from ._version import get_versions
+
+        value = get_versions()["version"]
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
@@ -0,0 +1,377 @@
+"""HTTP agent running MATLAB® jobs for remote clients.
+
+Runs on a host with MATLAB® installed and licensed; clients use
+:class:`mlshim.remote.RemoteMatlab`. Endpoints, all JSON:
+
+``POST /jobs``
+    ``{"template": ..., "version": ..., "timeout": ..., "kwargs": {...}}``,
+    returns ``{"job_id": ...}``. ``kwargs`` go to the Jinja2 template.
+``GET /jobs/<id>``
+    State, exit code and error of the job.
+``GET /jobs/<id>/log?offset=<n>&wait=<seconds>``
+    Log lines from line ``offset`` on. Waits up to ``wait`` seconds for
+    new lines, so clients follow the log with one request per batch of
+    output.
+``GET /jobs/<id>/artifacts``
+    Zip of the job's working directory, preferences directory excluded.
+
+Every job runs in its own working directory below the agent's. Finished
+jobs are kept for ``job_ttl`` seconds, at most ``max_finished`` of them;
+evicted jobs, their logs and working directories are deleted and answer
+404. If a token is set, requests must send it in the ``X-Mlshim-Token``
+header.
+"""
+import hmac
+import io
+import json
+import logging
+import math
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+import zipfile
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from urllib.parse import parse_qs
+from urllib.parse import urlparse
+
+from .consts import _AGENT_JOB_TTL
+from .consts import _AGENT_MAX_FINISHED
+from .exceptions import LicenseError
+from .exceptions import MatlabError
+from .matlab import Matlab
+from .pool import FAILED
+from .pool import MatlabJob
+from .pool import MatlabPool
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_HEADER = "X-Mlshim-Token"
+_MAX_WAIT = 30  # seconds
+_JOB_PATH = re.compile(r"^/jobs/([0-9a-f]{32})(/log|/artifacts)?$")
+# Arguments of MatlabPool.submit the agent sets itself.
+_RESERVED_KWARGS = ("matlab", "features", "on_line")
+
+
+def error_to_dict(error: BaseException) -> Dict[str, Any]:
+    """JSON form of a run's exception, see ``remote.error_from_dict``."""
+    data: Dict[str, Any] = {"type": type(error).__name__, "text": str(error)}
+    if isinstance(error, MatlabError):
+        data["message"] = error.message
+        data["identifier"] = error.identifier
+        data["stack"] = [list(frame) for frame in error.stack]
+    elif isinstance(error, LicenseError):
+        data["line"] = error.line
+    return data
+
+
+class AgentJob:
+    """A job submitted to the agent and the log lines it produced."""
+
+    def __init__(self, job_id: str, matlab: Matlab):
+        self.job_id = job_id
+        self.matlab = matlab
+        self.job: Optional[MatlabJob] = None
+        self.lines: List[str] = list()
+        self.finished: Optional[float] = None
+        self._cond = threading.Condition()
+
+    def append(self, line: str):
+        with self._cond:
+            self.lines.append(line)
+            self._cond.notify_all()
+
+    def done(self) -> bool:
+        return self.job is not None and self.job.done()
+
+    def wait_lines(self, offset: int, timeout: float) -> List[str]:
+        """Lines from ``offset`` on, waiting for some if there are none."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while len(self.lines) <= offset and not self.done():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            return self.lines[offset:]
+
+    def notify(self):
+        """Wake up log readers once the job is done."""
+        with self._cond:
+            if self.finished is None:
+                self.finished = time.monotonic()
+            self._cond.notify_all()
+
+    def status(self) -> Dict[str, Any]:
+        job = self.job
+        if job is None:
+            raise RuntimeError(f"Job {self.job_id} was not submitted")
+        data: Dict[str, Any] = {
+            "job_id": self.job_id,
+            "state": job.state,
+            "returncode": job.returncode,
+            "duration": job.duration,
+            "version": self.matlab.version,
+            "log_file": os.path.basename(self.matlab.log_file),
+        }
+        if job.state == FAILED and job.error is not None:
+            data["returncode"] = self.matlab.returncode
+            data["error"] = error_to_dict(job.error)
+        return data
+
+    def artifacts(self) -> bytes:
+        buffer = io.BytesIO()
+        base = self.matlab.working_directory
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+            for directory, dirs, files in os.walk(base):
+                dirs[:] = [d for d in dirs if not d.startswith("prefdir_")]
+                for name in files:
+                    path = os.path.join(directory, name)
+                    archive.write(path, os.path.relpath(path, base))
+        return buffer.getvalue()
+
+
+class MatlabAgent:
+    """Accept MATLAB® jobs over HTTP and run them on this host.
+
+    Parameters
+    ----------
+    host : str
+        Address to listen on. Default: Local connections only.
+    port : int
+        Port to listen on, 0 picks a free one.
+    working_directory : str
+        Directory the per-job working directories are created in.
+    max_workers : int
+        Maximum number of jobs running at the same time.
+    token : str
+        Shared secret clients must send. Default: ``MLSHIM_AGENT_TOKEN``
+        from the environment, no authentication if unset.
+    job_ttl : float
+        Seconds a finished job is kept before it is evicted.
+    max_finished : int
+        Maximum number of finished jobs kept, the oldest are evicted
+        first.
+    **matlab_kwargs
+        Keyword arguments for the :class:`Matlab` instance of each job,
+        e.g. ``root``.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        working_directory: str = os.path.abspath(os.curdir),
+        max_workers: Optional[int] = None,
+        token: Optional[str] = None,
+        job_ttl: float = _AGENT_JOB_TTL,
+        max_finished: int = _AGENT_MAX_FINISHED,
+        **matlab_kwargs,
+    ):
+        self.working_directory = os.path.abspath(working_directory)
+        self.matlab_kwargs = matlab_kwargs
+        self.token = token or os.environ.get("MLSHIM_AGENT_TOKEN") or None
+        self.job_ttl = job_ttl
+        self.max_finished = max_finished
+        self.jobs: Dict[str, AgentJob] = dict()
+        self.pool = MatlabPool(max_workers=max_workers)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.server = ThreadingHTTPServer((host, port), _make_handler(self))
+        self.server.daemon_threads = True
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.socket.getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Serve requests from a background thread."""
+        self._thread = threading.Thread(
+            target=self.server.serve_forever, name="mlshim-agent", daemon=True
+        )
+        self._thread.start()
+        logger.info(f"mlshim agent listening on {self.url}")
+
+    def serve_forever(self):
+        """Serve requests from the calling thread until interrupted."""
+        logger.info(f"mlshim agent listening on {self.url}")
+        try:
+            self.server.serve_forever()
+        finally:
+            self.close()
+
+    def close(self):
+        """Stop serving and wait for running jobs."""
+        if self._thread is not None:
+            self.server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self.server.server_close()
+        self.pool.shutdown(wait=True)
+
+    def get(self, job_id: str) -> Optional[AgentJob]:
+        """The job ``job_id``, ``None`` if unknown or evicted."""
+        self.evict()
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def evict(self):
+        """Delete finished jobs past ``job_ttl`` or ``max_finished``."""
+        now = time.monotonic()
+        deadline = now - self.job_ttl
+        with self._lock:
+            for job in self.jobs.values():
+                # The done callback may not have run yet.
+                if job.finished is None and job.done():
+                    job.finished = now
+            finished = sorted(
+                (job.finished, job_id)
+                for job_id, job in self.jobs.items()
+                if job.finished is not None
+            )
+            excess = len(finished) - self.max_finished
+            evicted = [
+                self.jobs[job_id]
+                for index, (end, job_id) in enumerate(finished)
+                if index < excess or end < deadline
+            ]
+            for agent_job in evicted:
+                del self.jobs[agent_job.job_id]
+        for agent_job in evicted:
+            logger.info(f"Job {agent_job.job_id} evicted")
+            if agent_job.job is not None:
+                self.pool.forget(agent_job.job)
+            with agent_job._cond:
+                agent_job.lines = list()
+            shutil.rmtree(agent_job.matlab.working_directory, True)
+
+    def submit(self, request: Dict[str, Any]) -> AgentJob:
+        """Start a job from a decoded ``POST /jobs`` body."""
+        template_kwargs = request.get("kwargs", {})
+        reserved = sorted(set(template_kwargs) & set(_RESERVED_KWARGS))
+        if reserved:
+            raise ValueError(f"Reserved kwargs: {', '.join(reserved)}")
+        kwargs = dict(self.matlab_kwargs)
+        for key in ("template", "version", "timeout"):
+            if request.get(key) is not None:
+                kwargs[key] = request[key]
+        kwargs.setdefault("template", "run_template.m")
+        self.evict()
+        job_id = uuid.uuid4().hex
+        kwargs["working_directory"] = os.path.join(
+            self.working_directory, f"job_{job_id}"
+        )
+        matlab = Matlab(**kwargs)
+        # Unknown templates are rejected before anything is queued.
+        matlab._env.get_template(kwargs["template"])
+        agent_job = AgentJob(job_id, matlab)
+        job = self.pool.submit(
+            matlab, on_line=agent_job.append, **template_kwargs
+        )
+        agent_job.job = job
+        job.future.add_done_callback(lambda _: agent_job.notify())
+        # Registered only once submitted, a listed job always has a status.
+        with self._lock:
+            self.jobs[job_id] = agent_job
+        logger.info(f"Job {job_id} submitted: {matlab}")
+        return agent_job
+
+
+def _make_handler(agent: MatlabAgent):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            logger.debug(f"{self.address_string()} {format % args}")
+
+        def _send(self, code: int, body: bytes, content_type: str):
+            self.send_response(code)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _json(self, code: int, data: Dict[str, Any]):
+            self._send(code, json.dumps(data).encode(), "application/json")
+
+        def _authorized(self) -> bool:
+            if agent.token is None:
+                return True
+            token = self.headers.get(_TOKEN_HEADER, "")
+            if hmac.compare_digest(token.encode(), agent.token.encode()):
+                return True
+            self._json(403, {"error": "invalid token"})
+            return False
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            body = self.rfile.read(length)
+            if not self._authorized():
+                return
+            if urlparse(self.path).path != "/jobs":
+                self._json(404, {"error": "not found"})
+                return
+            try:
+                agent_job = agent.submit(json.loads(body or b"{}"))
+            except Exception as error:
+                logger.warning(f"Rejected job: {error}")
+                self._json(400, {"error": error_to_dict(error)})
+                return
+            self._json(201, {"job_id": agent_job.job_id})
+
+        def do_GET(self):
+            if not self._authorized():
+                return
+            url = urlparse(self.path)
+            match = _JOB_PATH.match(url.path)
+            agent_job = match and agent.get(match.group(1))
+            if not agent_job:
+                self._json(404, {"error": "not found"})
+                return
+            if match.group(2) is None:
+                self._json(200, agent_job.status())
+            elif match.group(2) == "/log":
+                query = parse_qs(url.query)
+                try:
+                    offset = int(query.get("offset", ["0"])[0])
+                    wait = float(query.get("wait", ["0"])[0])
+                    if offset < 0:
+                        raise ValueError(f"Negative offset: {offset}")
+                    if not math.isfinite(wait):
+                        raise ValueError(f"Invalid wait: {wait}")
+                except ValueError as error:
+                    self._json(400, {"error": error_to_dict(error)})
+                    return
+                lines = agent_job.wait_lines(offset, min(wait, _MAX_WAIT))
+                done = agent_job.done()
+                if done:
+                    # No lines are added once the job is done, take all
+                    # of them so "done" really means the end of the log.
+                    lines = agent_job.lines[offset:]
+                self._json(
+                    200,
+                    {
+                        "lines": lines,
+                        "offset": offset + len(lines),
+                        "done": done,
+                    },
+                )
+            else:
+                self._send(200, agent_job.artifacts(), "application/zip")
+
+    return Handler
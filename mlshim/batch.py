@@ -0,0 +1,131 @@
+"""Run many small jobs in a single MATLAB® session.
+
+``batch_template.m`` runs the jobs one after the other, each in its own
+try/catch between ``########## Job <id> Started ##########`` and a
+Finished or Failed marker, and clears all variables in between. The log
+is split back into per-job results by :class:`BatchCollector`.
+"""
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Union
+
+from .exceptions import MatlabError
+from .parser import ErrorEvent
+from .parser import JobFailedEvent
+from .parser import JobFinishedEvent
+from .parser import JobStartedEvent
+from .parser import LogParser
+from .pool import FAILED
+from .pool import FINISHED
+from .pool import PENDING
+from .pool import RUNNING
+
+
+class BatchJob:
+    """One job of ``Matlab.run_batch`` and its result.
+
+    Attributes
+    ----------
+    job_id : str
+        ``job_<n>``, numbered from 1 in submission order.
+    scripts : list
+        MATLAB® statements of the job.
+    state : str
+        ``finished`` or ``failed``. ``pending`` if MATLAB® exited before
+        reaching the job, ``running`` while it runs.
+    lines : list
+        Log lines written by the job.
+    error : Exception
+        :class:`MatlabError` if the job failed, or the run's exception if
+        MATLAB® exited during the job.
+    """
+
+    def __init__(self, job_id: str, scripts: Sequence[str]):
+        self.job_id = job_id
+        self.scripts = list(scripts)
+        self.state = PENDING
+        self.lines: List[str] = list()
+        self.error: Optional[BaseException] = None
+
+    def __repr__(self):
+        return f"BatchJob<{self.job_id}, {self.state}>"
+
+    @property
+    def ok(self) -> bool:
+        return self.state == FINISHED
+
+
+def make_jobs(jobs: Sequence[Union[str, Sequence[str]]]) -> List[BatchJob]:
+    """Number the jobs, a job is a statement or a list of statements."""
+    return [
+        BatchJob(f"job_{idx:04d}", [job] if isinstance(job, str) else job)
+        for idx, job in enumerate(jobs, 1)
+    ]
+
+
+class BatchCollector:
+    """Distribute log lines of a batch run to its jobs.
+
+    Used as the ``on_line`` callback of the run.
+    """
+
+    def __init__(
+        self, jobs: Sequence[BatchJob], log_file: Optional[str] = None
+    ):
+        self.jobs = {job.job_id: job for job in jobs}
+        self.log_file = log_file
+        self.current: Optional[BatchJob] = None
+        self._failed: Optional[BatchJob] = None
+        self._parser = LogParser()
+
+    def __call__(self, line: str):
+        self.feed(line)
+
+    def feed(self, line: str):
+        events = self._parser.feed(line)
+        self._handle(events)
+        # Marker lines are not part of a job's output.
+        markers = [e for e in events if not isinstance(e, ErrorEvent)]
+        if self.current is not None and not markers:
+            self.current.lines.append(line)
+
+    def close(self):
+        """Flush an error report at the end of the log."""
+        self._handle(self._parser.close())
+
+    def abort(self, error: BaseException):
+        """MATLAB® exited, fail the job that was running."""
+        self.close()
+        if self.current is not None and self.current.state == RUNNING:
+            self.current.state = FAILED
+            self.current.error = error
+            self.current = None
+
+    def _handle(self, events):
+        for event in events:
+            if isinstance(event, ErrorEvent):
+                if self._failed is not None:
+                    self._failed.error = MatlabError(
+                        event.message,
+                        event.identifier,
+                        event.stack,
+                        log_file=self.log_file,
+                    )
+                    self._failed = None
+                continue
+            job = self.jobs.get(getattr(event, "job_id", None))
+            if job is None:
+                continue
+            if isinstance(event, JobStartedEvent):
+                job.state = RUNNING
+                self.current = job
+            elif isinstance(event, JobFinishedEvent):
+                job.state = FINISHED
+                self.current = None
+            elif isinstance(event, JobFailedEvent):
+                job.state = FAILED
+                job.error = MatlabError(log_file=self.log_file)
+                # The error report follows, keep its lines with the job.
+                self._failed = job
+                self.current = job
@@ -0,0 +1,356 @@
+"""Qualify build hosts and MATLAB® versions with MATLAB®'s ``bench``.
+
+:func:`run_bench` runs ``bench(N)`` through ``bench_template.m`` and
+parses the per-test timings from the log. :class:`BenchDatabase` keeps the
+results of all hosts and versions in SQLite, and
+:meth:`BenchDatabase.compare` flags hosts that are slower than others on
+the same version and versions that are slower than the previous one on the
+same host.
+"""
+import logging
+import os
+import platform
+import socket
+import sqlite3
+import statistics
+import time
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from .consts import _BENCH_DB
+from .consts import _BENCH_MARKER
+from .utils import version_key
+
+logger = logging.getLogger(__name__)
+
+# Columns of the matrix returned by ``bench``.
+TESTS: Tuple[str, ...] = ("LU", "FFT", "ODE", "Sparse", "2-D", "3-D")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    host TEXT NOT NULL,
+    version TEXT NOT NULL,
+    platform TEXT,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS times (
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    repetition INTEGER NOT NULL,
+    test TEXT NOT NULL,
+    seconds REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_host_version ON runs (host, version);
+"""
+
+
+class BenchResult:
+    """Timings of one ``bench`` run.
+
+    Attributes
+    ----------
+    host : str
+        Host MATLAB® ran on.
+    version : str
+        MATLAB® release.
+    times : list
+        Seconds per test, one dict per repetition of ``bench``.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        version: str,
+        times: List[Dict[str, float]],
+        platform: Optional[str] = None,
+        created: Optional[float] = None,
+    ):
+        self.host = host
+        self.version = version
+        self.times = times
+        self.platform = platform
+        self.created = time.time() if created is None else created
+
+    def __repr__(self):
+        return f"BenchResult<{self.host}, {self.version}, {len(self.times)}>"
+
+    @property
+    def medians(self) -> Dict[str, float]:
+        """Median seconds per test over the repetitions."""
+        return {
+            test: statistics.median(row[test] for row in self.times)
+            for test in TESTS
+            if any(test in row for row in self.times)
+        }
+
+
+def parse_bench_output(lines: Iterable[str]) -> List[Dict[str, float]]:
+    """Timings printed by ``bench_template.m``, one dict per repetition."""
+    times = list()
+    for line in lines:
+        line = line.strip()
+        if not line.startswith(_BENCH_MARKER):
+            continue
+        values = line[len(_BENCH_MARKER) :].split()
+        if len(values) != len(TESTS):
+            logger.warning(f"Malformed bench line: {line}")
+            continue
+        times.append(dict(zip(TESTS, map(float, values))))
+    return times
+
+
+def run_bench(matlab, count: int = 3) -> BenchResult:
+    """Run ``bench(count)`` on ``matlab`` and return its timings.
+
+    ``matlab`` is a :class:`mlshim.Matlab`; it runs ``bench_template.m``,
+    its own template is restored afterwards.
+    """
+    lines: List[str] = list()
+    template = matlab.template
+    matlab.template = "bench_template.m"
+    try:
+        matlab.run(count=count, marker=_BENCH_MARKER, on_line=lines.append)
+    finally:
+        matlab.template = template
+    times = parse_bench_output(lines)
+    if not times:
+        raise RuntimeError(f"No bench results in {matlab.log_file}")
+    return BenchResult(
+        socket.gethostname(), matlab.version, times, platform.platform()
+    )
+
+
+class BenchFinding:
+    """A median that is slower than its reference by more than allowed.
+
+    Attributes
+    ----------
+    kind : str
+        ``host`` if ``host`` is slower than ``reference`` on the same
+        version, ``version`` if ``version`` is slower than the previous
+        version ``reference`` on the same host.
+    """
+
+    def __init__(
+        self,
+        kind: str,
+        test: str,
+        host: str,
+        version: str,
+        seconds: float,
+        reference: str,
+        reference_seconds: float,
+    ):
+        self.kind = kind
+        self.test = test
+        self.host = host
+        self.version = version
+        self.seconds = seconds
+        self.reference = reference
+        self.reference_seconds = reference_seconds
+
+    def __repr__(self):
+        return f"BenchFinding<{self}>"
+
+    def __str__(self):
+        subject = self.host if self.kind == "host" else self.version
+        scope = self.version if self.kind == "host" else self.host
+        return (
+            f"{subject} {self.test} on {scope}: {self.seconds:.3f}s is "
+            f"{self.ratio:.2f}x of {self.reference} "
+            f"({self.reference_seconds:.3f}s)"
+        )
+
+    @property
+    def ratio(self) -> float:
+        return self.seconds / self.reference_seconds
+
+
+class BenchDatabase:
+    """Local SQLite store of ``bench`` results.
+
+    Parameters
+    ----------
+    path : str
+        Database file, created if missing. Default: ``MLSHIM_BENCH_DB`` or
+        ``~/.mlshim/bench.sqlite``.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = os.path.abspath(path or _BENCH_DB)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        db = self._connect()
+        try:
+            db.executescript(_SCHEMA)
+        finally:
+            db.close()
+
+    def __repr__(self):
+        return f"BenchDatabase<{self.path}>"
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, timeout=60)
+        db.row_factory = sqlite3.Row
+        return db
+
+    def add(self, result: BenchResult) -> int:
+        """Store ``result`` and return its run id."""
+        db = self._connect()
+        try:
+            with db:
+                run_id = db.execute(
+                    "INSERT INTO runs (host, version, platform, created)"
+                    " VALUES (?, ?, ?, ?)",
+                    (
+                        result.host,
+                        result.version,
+                        result.platform,
+                        result.created,
+                    ),
+                ).lastrowid
+                if run_id is None:
+                    raise RuntimeError(f"No run id from {self.path}")
+                db.executemany(
+                    "INSERT INTO times (run_id, repetition, test, seconds)"
+                    " VALUES (?, ?, ?, ?)",
+                    [
+                        (run_id, repetition, test, seconds)
+                        for repetition, row in enumerate(result.times, 1)
+                        for test, seconds in row.items()
+                    ],
+                )
+        finally:
+            db.close()
+        return run_id
+
+    def results(
+        self, host: Optional[str] = None, version: Optional[str] = None
+    ) -> List[BenchResult]:
+        """Stored results, oldest first, optionally of one host/version."""
+        query = "SELECT * FROM runs WHERE 1"
+        params: List[str] = list()
+        if host is not None:
+            query += " AND host = ?"
+            params.append(host)
+        if version is not None:
+            query += " AND version = ?"
+            params.append(version)
+        db = self._connect()
+        try:
+            results = list()
+            for run in db.execute(query + " ORDER BY id", params).fetchall():
+                times: Dict[int, Dict[str, float]] = dict()
+                for row in db.execute(
+                    "SELECT repetition, test, seconds FROM times"
+                    " WHERE run_id = ?",
+                    (run["id"],),
+                ):
+                    times.setdefault(row["repetition"], dict())[
+                        row["test"]
+                    ] = row["seconds"]
+                results.append(
+                    BenchResult(
+                        run["host"],
+                        run["version"],
+                        [times[key] for key in sorted(times)],
+                        run["platform"],
+                        run["created"],
+                    )
+                )
+            return results
+        finally:
+            db.close()
+
+    def medians(self) -> Dict[Tuple[str, str, str], float]:
+        """Median seconds per ``(host, version, test)`` over all runs."""
+        db = self._connect()
+        try:
+            rows = db.execute(
+                "SELECT host, version, test, seconds FROM times"
+                " JOIN runs ON runs.id = times.run_id"
+            ).fetchall()
+        finally:
+            db.close()
+        samples: Dict[Tuple[str, str, str], List[float]] = dict()
+        for row in rows:
+            key = (row["host"], row["version"], row["test"])
+            samples.setdefault(key, list()).append(row["seconds"])
+        return {
+            key: statistics.median(value) for key, value in samples.items()
+        }
+
+    def compare(self, threshold: float = 1.25) -> List[BenchFinding]:
+        """Find slow hosts and version regressions.
+
+        A host is slow on a test if its median exceeds ``threshold`` times
+        the fastest host's median on the same version. A version regressed
+        if its median on a host exceeds ``threshold`` times that of the
+        previous version on the same host.
+        """
+        medians = self.medians()
+        findings = list()
+        by_version: Dict[Tuple[str, str], Dict[str, float]] = dict()
+        by_host: Dict[Tuple[str, str], Dict[str, float]] = dict()
+        for (host, version, test), seconds in medians.items():
+            by_version.setdefault((version, test), dict())[host] = seconds
+            by_host.setdefault((host, test), dict())[version] = seconds
+        for (version, test), hosts in sorted(by_version.items()):
+            best = min(hosts, key=hosts.__getitem__)
+            for host, seconds in sorted(hosts.items()):
+                if seconds > threshold * hosts[best]:
+                    findings.append(
+                        BenchFinding(
+                            "host",
+                            test,
+                            host,
+                            version,
+                            seconds,
+                            best,
+                            hosts[best],
+                        )
+                    )
+        for (host, test), versions in sorted(by_host.items()):
+            ordered = sorted(versions, key=version_key)
+            for previous, version in zip(ordered, ordered[1:]):
+                if versions[version] > threshold * versions[previous]:
+                    findings.append(
+                        BenchFinding(
+                            "version",
+                            test,
+                            host,
+                            version,
+                            versions[version],
+                            previous,
+                            versions[previous],
+                        )
+                    )
+        return findings
+
+
+def format_table(medians: Dict[Tuple[str, str, str], float]) -> str:
+    """Plain text table of median seconds per host and version."""
+    rows = [("Host", "Version") + TESTS]
+    keys = sorted(
+        {(host, version) for host, version, _ in medians},
+        key=lambda key: (key[0], version_key(key[1])),
+    )
+    for host, version in keys:
+        rows.append(
+            (host, version)
+            + tuple(
+                f"{medians[host, version, test]:.4f}"
+                if (host, version, test) in medians
+                else ""
+                for test in TESTS
+            )
+        )
+    widths = [max(len(row[idx]) for row in rows) for idx in range(8)]
+    return "\n".join(
+        "  ".join(
+            cell.ljust(width) for cell, width in zip(row, widths)
+        ).rstrip()
+        for row in rows
+    )
@@ -6,7 +6,6 @@ from typing import Optional
 import click
 
 from mlshim import __name__ as module_name
-from mlshim import Matlab
 from mlshim.consts import _MATLAB_BASE
 from mlshim.log import configure_logger
 from mlshim.log import logging
@@ -20,10 +19,46 @@ class Config:
     def __init__(self):  # Note: This object must have an empty constructor.
         self.logging: type(logging)
         self.verbose: int
-        self.working_directory: Optional[str]
+        self.working_directory: str
+        self.matlab_base: str
         self.debug_file: Optional[str]
         self.version: Optional[str]
-        self.matlab: Matlab
+        self.golden_prefdir: bool
+        self.retries: int
+        self.metrics_file: Optional[str]
+        self._matlab = None
+
+    @property
+    def matlab(self):
+        """Matlab instance, only created by commands that need one.
+
+        Keeps version discovery and template loading out of commands such
+        as ``mlshim debug``.
+        """
+        if self._matlab is None:
+            from mlshim.matlab import Matlab
+            from mlshim.retry import RetryPolicy
+
+            retry = None
+            if self.retries > 1:
+                retry = RetryPolicy(max_attempts=self.retries)
+            self._matlab = Matlab(
+                root=self.matlab_base,
+                working_directory=self.working_directory,
+                template=None,
+                version=self.version,
+                golden_prefdir=self.golden_prefdir,
+                retry=retry,
+            )
+            self.logging.debug(f"MATLAB Prefs Dir: {self._matlab.pref_dir}")
+            self.logging.debug(
+                f"MATLAB Working Directory: {self._matlab.working_directory}"
+            )
+            self.logging.debug(f"MATLAB Log File: {self._matlab.log_file}")
+            self.logging.debug(
+                f"MATLAB Run Script: {self._matlab.run_script}"
+            )
+        return self._matlab
 
 
 # pass_config is a decorator for functions that pass 'Config' objects.
@@ -45,6 +80,23 @@ pass_config = click.make_pass_decorator(Config, ensure=True)
 )
 @click.option("--debug_file", "-d", help="Python Debug File", default=None)
 @click.option("--version", "--ver", help="MATLAB version", default=None)
+@click.option(
+    "--golden_prefdir",
+    "-g",
+    is_flag=True,
+    help="Clone a prebuilt MATLAB preferences directory.",
+)
+@click.option(
+    "--retries",
+    type=int,
+    default=1,
+    help="Attempts per run when no MATLAB license is available.",
+)
+@click.option(
+    "--metrics_file",
+    default=None,
+    help="Write run phase timings here, Prometheus format for *.prom.",
+)
 @pass_config
 def main(
     config: Config, **kwargs
@@ -57,13 +109,13 @@ def main(
     config.logging = configure_logger(
         stream_level=config.verbose, debug_file=config.debug_file
     )
-    config.matlab = Matlab(template=None, version=config.version)
-    config.logging.debug(f"MATLAB Prefs Dir: {config.matlab.pref_dir}")
-    config.logging.debug(
-        f"MATLAB Working Directory: {config.matlab.working_directory}"
-    )
-    config.logging.debug(f"MATLAB Log File: {config.matlab.log_file}")
-    config.logging.debug(f"MATLAB Run Script: {config.matlab.run_script}")
+    metrics_file = config.metrics_file
+    if metrics_file:
+        from mlshim.metrics import registry
+
+        click.get_current_context().call_on_close(
+            lambda: registry.write(metrics_file)
+        )
 
 
 @main.command()
@@ -86,24 +138,187 @@ def launch(config: Config):
 
 @main.command()
 @click.argument("m_script")
+@click.option(
+    "--stream", "-s", is_flag=True, help="Echo the MATLAB log while running."
+)
 @pass_config
-def run(config: Config, m_script: str):
+def run(config: Config, m_script: str, stream: bool):
     """
     Run a matlab script.
     """
     config.matlab.template = "run_template.m"
-    config.matlab.run(scripts=[m_script])
+    config.matlab.run(
+        scripts=[m_script], on_line=click.echo if stream else None
+    )
 
 
 @main.command()
 @click.argument("model")
+@click.option(
+    "--stream", "-s", is_flag=True, help="Echo the MATLAB log while running."
+)
 @pass_config
-def build(config: Config, model: str):
+def build(config: Config, model: str, stream: bool):
     """
     Build Simulink Model.
     """
     config.matlab.template = "build_model_template.m"
-    config.matlab.run(model=model)
+    config.matlab.run(model=model, on_line=click.echo if stream else None)
+
+
+@main.command()
+@click.argument("directory", required=False)
+@click.option("--max-age", help="Remove runs older than this, e.g. 7d, 12h.")
+@click.option("--max-count", type=int, help="Keep this many recent runs.")
+@click.option("--max-size", help="Keep recent runs up to this size, e.g. 10G.")
+@click.option("--dry-run", "-n", is_flag=True, help="Only list the runs.")
+@pass_config
+def gc(
+    config: Config,
+    directory: Optional[str],
+    max_age: Optional[str],
+    max_count: Optional[int],
+    max_size: Optional[str],
+    dry_run: bool,
+):
+    """
+    Remove old run artifacts from the working directory.
+    """
+    from mlshim.retention import RetentionPolicy
+    from mlshim.retention import collect_garbage
+    from mlshim.retention import parse_age
+    from mlshim.retention import parse_size
+
+    policy = RetentionPolicy(
+        max_age=None if max_age is None else parse_age(max_age),
+        max_count=max_count,
+        max_bytes=None if max_size is None else parse_size(max_size),
+    )
+    directory = directory or config.working_directory
+    removed = collect_garbage(directory, policy, dry_run=dry_run)
+    for run in removed:
+        click.echo(f"{'Would remove' if dry_run else 'Removed'} {run.run_id}")
+    config.logging.info(f"{len(removed)} runs in {directory}")
+
+
+@main.command()
+@click.argument("m_script")
+@click.option(
+    "--versions",
+    help="Comma separated MATLAB versions. Default: All installed.",
+    default=None,
+)
+@click.option(
+    "--max_parallel", "-j", type=int, help="Maximum concurrent MATLABs."
+)
+@pass_config
+def matrix(
+    config: Config,
+    m_script: str,
+    versions: Optional[str],
+    max_parallel: Optional[int],
+):
+    """
+    Run a matlab script on several MATLAB versions at once.
+    """
+    from mlshim.matrix import format_table
+    from mlshim.matrix import run_across_versions
+
+    results = run_across_versions(
+        m_script,
+        versions=None if versions is None else versions.split(","),
+        max_parallel=max_parallel,
+        root=config.matlab_base,
+        working_directory=config.working_directory,
+        golden_prefdir=config.golden_prefdir,
+    )
+    click.echo(format_table(results))
+    if not all(result.ok for result in results):
+        sys.exit(1)
+
+
+@main.command()
+@click.option(
+    "--count", "-n", type=int, default=3, help="Repetitions of bench."
+)
+@click.option("--db", help="Results database. Default: MLSHIM_BENCH_DB")
+@click.option(
+    "--compare",
+    is_flag=True,
+    help="Only compare the stored results, flag slow hosts and versions.",
+)
+@click.option(
+    "--threshold",
+    type=float,
+    default=1.25,
+    help="Flag medians slower than this factor of their reference.",
+)
+@pass_config
+def bench(
+    config: Config,
+    count: int,
+    db: Optional[str],
+    compare: bool,
+    threshold: float,
+):
+    """
+    Run MATLAB's bench and store the timings of this host.
+    """
+    from mlshim.bench import BenchDatabase
+    from mlshim.bench import format_table
+    from mlshim.bench import run_bench
+
+    database = BenchDatabase(db)
+    if not compare:
+        result = run_bench(config.matlab, count=count)
+        database.add(result)
+        config.logging.info(f"Stored {result} in {database.path}")
+    click.echo(format_table(database.medians()))
+    if compare:
+        findings = database.compare(threshold)
+        for finding in findings:
+            click.echo(f"SLOW {finding.kind}: {finding}")
+        if findings:
+            sys.exit(1)
+
+
+@main.command()
+@click.option("--host", help="Address to listen on.", default="127.0.0.1")
+@click.option("--port", "-p", type=int, help="Port to listen on.")
+@click.option(
+    "--max_workers", "-j", type=int, help="Maximum concurrent MATLABs."
+)
+@click.option(
+    "--token", help="Shared secret. Default: MLSHIM_AGENT_TOKEN", default=None
+)
+@pass_config
+def agent(
+    config: Config,
+    host: str,
+    port: Optional[int],
+    max_workers: Optional[int],
+    token: Optional[str],
+):
+    """
+    Serve MATLAB jobs to remote clients over HTTP.
+    """
+    from mlshim.agent import MatlabAgent
+    from mlshim.consts import _AGENT_PORT
+
+    server = MatlabAgent(
+        host=host,
+        port=_AGENT_PORT if port is None else port,
+        working_directory=config.working_directory,
+        max_workers=max_workers,
+        token=token,
+        root=config.matlab_base,
+        version=config.version,
+        golden_prefdir=config.golden_prefdir,
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
 
 
 if __name__ == "__main__":
@@ -1,16 +1,70 @@
-"""
-Created on Thu Nov  9 13:00:33 2017
-"""
-import os
-from typing import Optional
-
-
-_SLEEP_TIME = 10  # seconds
-_START_TIMEOUT = 180  # seconds
-_MATLAB_TIMEOUT: int = int(os.environ.get("MATLAB_TIMEOUT", 600))
-
-
-_MATLAB_DEFAULT: str = os.path.join(os.getenv("ProgramW6432", ""), "MATLAB")
-_MATLAB_BASE: str = os.environ.get("MATLAB_BASE", _MATLAB_DEFAULT)
-_HERE: str = os.path.dirname(os.path.abspath(__file__))
-_APPDATA: Optional[str] = os.environ.get("APPDATA", None)
+"""
+Created on Thu Nov  9 13:00:33 2017
+"""
+import os
+import sys
+from typing import Optional
+from typing import Tuple
+
+
+_SLEEP_TIME = 10  # seconds
+_POLL_INTERVAL = 0.05  # seconds
+_WORKER_POLL_INTERVAL = 0.1  # seconds
+_SPARE_CHECK_INTERVAL = 1  # seconds
+_SPARE_IDLE_TIMEOUT = 300  # seconds
+_VERSION_TTL = 60  # seconds
+_RESOLVE_CACHE_SIZE = 256
+_START_TIMEOUT = 180  # seconds
+_EXIT_TIMEOUT = 60  # seconds
+_ERROR_REPORT_TIMEOUT = 5  # seconds
+_TAIL_CHUNK_SIZE = 1 << 20  # bytes read from a log per poll
+_TAIL_MAX_LINE = 1 << 20  # bytes, longer lines are split
+_RETRY_ATTEMPTS = 5
+_RETRY_BASE_DELAY = 30  # seconds
+_RETRY_MAX_DELAY = 600  # seconds
+# Upper bounds of the phase duration histogram buckets, seconds.
+_METRICS_BUCKETS: Tuple[float, ...] = (
+    0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600
+)
+_MATLAB_TIMEOUT: int = int(os.environ.get("MATLAB_TIMEOUT", 600))
+_AGENT_PORT: int = int(os.environ.get("MLSHIM_AGENT_PORT", 8765))
+_AGENT_JOB_TTL = 3600  # seconds finished jobs are kept
+_AGENT_MAX_FINISHED = 100  # finished jobs kept at most
+
+
+_MATLAB_DEFAULT: str = os.path.join(os.getenv("ProgramW6432", ""), "MATLAB")
+_MATLAB_BASE: str = os.environ.get("MATLAB_BASE", _MATLAB_DEFAULT)
+# Executable names below <matlabroot>/bin, in order of preference.
+_MATLAB_EXE_NAMES: Tuple[str, ...] = (
+    ("matlab.exe",) if sys.platform == "win32" else ("matlab", "matlab.exe")
+)
+# On Windows bin\matlab.exe only starts MATLAB® and exits at once unless
+# told to wait, which leaves nothing to supervise and no exit code.
+_LAUNCHER_ARGS: Tuple[str, ...] = (
+    ("-wait",) if sys.platform == "win32" else ()
+)
+_HERE: str = os.path.dirname(os.path.abspath(__file__))
+_APPDATA: Optional[str] = os.environ.get("APPDATA", None)
+_CACHE_DIR: Optional[str] = os.environ.get("MLSHIM_CACHE_DIR", None)
+# Check template files for changes on every render, for template authors.
+_TEMPLATE_AUTO_RELOAD: bool = bool(
+    os.environ.get("MLSHIM_TEMPLATE_AUTO_RELOAD")
+)
+_GOLDEN_PREFDIR_DIR: Optional[str] = os.environ.get(
+    "MLSHIM_GOLDEN_PREFDIR_DIR", None
+)
+_BENCH_DB: str = os.environ.get(
+    "MLSHIM_BENCH_DB",
+    os.path.join(os.path.expanduser("~"), ".mlshim", "bench.sqlite"),
+)
+
+# Status markers printed by the run script templates.
+_STARTED: str = "########## Started ##########"
+_FINISHED: str = "########## Finished ##########"
+_FAILED: str = "########## Failed ##########"
+_LICENSE_ERROR: str = "Error checking out license"
+# Error reports of scripts that failed to check out a toolbox license.
+_LICENSE_CHECKOUT_FAILED: str = "License checkout failed"
+_LICENSE_IDENTIFIER: str = "license:checkout"
+# Prefix of the result lines printed by bench_template.m.
+_BENCH_MARKER: str = "mlshim bench:"
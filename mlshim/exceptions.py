@@ -0,0 +1,63 @@
+"""Exceptions raised for failed MATLAB® runs."""
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+
+class MatlabError(RuntimeError):
+    """The script raised a MATLAB® error.
+
+    Attributes
+    ----------
+    message : str
+        ``MException.message``, empty if no error report was logged.
+    identifier : str
+        ``MException.identifier``, e.g. ``MATLAB:UndefinedFunction``.
+    stack : tuple
+        ``(line, file)`` pairs as printed by the template, outermost call
+        first.
+    log_file : str
+        Log file the error was read from.
+    """
+
+    def __init__(
+        self,
+        message: str = "",
+        identifier: str = "",
+        stack: Sequence[Tuple[int, str]] = (),
+        log_file: Optional[str] = None,
+    ):
+        self.message = message
+        self.identifier = identifier
+        self.stack = tuple(stack)
+        self.log_file = log_file
+        text = "Matlab processing failed"
+        if message:
+            text = f"{text}: {message}"
+        if identifier:
+            text = f"{text} ({identifier})"
+        super().__init__(text)
+
+
+class LicenseError(RuntimeError):
+    """MATLAB® could not check out a license.
+
+    Raised instead of :class:`MatlabError` so callers can tell license
+    contention, which goes away by waiting, from failing scripts. See
+    :class:`mlshim.retry.RetryPolicy`.
+
+    Attributes
+    ----------
+    line : str
+        Log line reporting the failed checkout.
+    log_file : str
+        Log file the error was read from.
+    """
+
+    def __init__(self, line: str = "", log_file: Optional[str] = None):
+        self.line = line
+        self.log_file = log_file
+        text = "License Error."
+        if line:
+            text = f"{text} {line}"
+        super().__init__(text)
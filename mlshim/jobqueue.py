@@ -0,0 +1,375 @@
+"""Durable MATLAB® job queue stored in SQLite.
+
+Jobs survive the orchestrating Python process: each one records its
+template, template kwargs, version, state, attempts and log file. Workers
+claim jobs inside a write transaction, so one job is never handed out
+twice, even to workers in other processes. After a crash,
+:meth:`JobQueue.recover` puts the jobs of dead workers back in the queue,
+and :meth:`JobQueue.run` picks up only unfinished jobs.
+"""
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from concurrent import futures
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+
+from .pool import FAILED
+from .pool import FINISHED
+from .pool import PENDING
+from .pool import RUNNING
+from .retention import pid_alive
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT UNIQUE,
+    template TEXT NOT NULL,
+    version TEXT,
+    kwargs TEXT NOT NULL,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    worker TEXT,
+    log_file TEXT,
+    returncode INTEGER,
+    error TEXT,
+    created REAL NOT NULL,
+    started REAL,
+    ended REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, id);
+"""
+_COLUMNS = (
+    "id, key, template, version, kwargs, state, attempts, max_attempts, "
+    "worker, log_file, returncode, error, created, started, ended"
+)
+
+
+class QueuedJob:
+    """Row of the job queue.
+
+    Attributes
+    ----------
+    job_id : int
+        Row id, jobs are claimed in this order.
+    key : str
+        Optional unique name, adding a job with a known key is a no-op.
+    template, version : str
+        Passed to :class:`Matlab`.
+    kwargs : dict
+        Passed to the Jinja2 template.
+    state : str
+        ``pending``, ``running``, ``finished`` or ``failed``.
+    attempts : int
+        Number of times the job was claimed.
+    log_file : str
+        Log of the last attempt.
+    """
+
+    def __init__(self, row: sqlite3.Row):
+        self.job_id: int = row["id"]
+        self.key: Optional[str] = row["key"]
+        self.template: str = row["template"]
+        self.version: Optional[str] = row["version"]
+        self.kwargs: Dict[str, Any] = json.loads(row["kwargs"])
+        self.state: str = row["state"]
+        self.attempts: int = row["attempts"]
+        self.max_attempts: int = row["max_attempts"]
+        self.worker: Optional[str] = row["worker"]
+        self.log_file: Optional[str] = row["log_file"]
+        self.returncode: Optional[int] = row["returncode"]
+        self.error: Optional[str] = row["error"]
+        self.created: float = row["created"]
+        self.started: Optional[float] = row["started"]
+        self.ended: Optional[float] = row["ended"]
+
+    def __repr__(self):
+        return f"QueuedJob<{self.job_id}, {self.state}, {self.attempts}>"
+
+
+def worker_name() -> str:
+    """``<host>:<pid>:<thread>`` of the calling thread."""
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+class JobQueue:
+    """Persistent queue of ``Matlab.run`` jobs.
+
+    Parameters
+    ----------
+    path : str
+        SQLite database file, created if missing.
+    max_attempts : int
+        Default number of attempts per job before it stays failed.
+
+    Example::
+
+        queue = JobQueue("regression.sqlite")
+        for model in models:
+            queue.add(key=model, template="build_model_template.m",
+                      model=model)
+        queue.recover()
+        queue.run(max_workers=4)
+    """
+
+    def __init__(self, path: str, max_attempts: int = 1):
+        self.path = os.path.abspath(path)
+        self.max_attempts = max_attempts
+        db = self._connect()
+        try:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(_SCHEMA)
+        finally:
+            db.close()
+
+    def __repr__(self):
+        return f"JobQueue<{self.path}>"
+
+    def _connect(self) -> sqlite3.Connection:
+        # A connection per call: usable from any thread, and autocommit so
+        # transactions are explicit.
+        db = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        return db
+
+    def add(
+        self,
+        *args,
+        template: str = "run_template.m",
+        version: Optional[str] = None,
+        key: Optional[str] = None,
+        max_attempts: Optional[int] = None,
+        **kwargs,
+    ) -> int:
+        """Queue a job and return its id.
+
+        All other keyword arguments are passed to the Jinja2 template and
+        must be JSON serialisable. If ``key`` is already queued, the
+        existing job's id is returned and nothing is added.
+        """
+        assert len(args) == 0
+        db = self._connect()
+        try:
+            cursor = db.execute(
+                "INSERT OR IGNORE INTO jobs (key, template, version, kwargs,"
+                " state, max_attempts, created) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    template,
+                    version,
+                    json.dumps(kwargs),
+                    PENDING,
+                    max_attempts or self.max_attempts,
+                    time.time(),
+                ),
+            )
+            if cursor.rowcount and cursor.lastrowid is not None:
+                return cursor.lastrowid
+            row = db.execute(
+                "SELECT id FROM jobs WHERE key = ?", (key,)
+            ).fetchone()
+            return row["id"]
+        finally:
+            db.close()
+
+    def get(self, job_id: int) -> QueuedJob:
+        db = self._connect()
+        try:
+            row = db.execute(
+                f"SELECT {_COLUMNS} FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        finally:
+            db.close()
+        if row is None:
+            raise KeyError(job_id)
+        return QueuedJob(row)
+
+    def jobs(self, state: Optional[str] = None) -> List[QueuedJob]:
+        """All jobs, or those in ``state``, in queue order."""
+        db = self._connect()
+        try:
+            if state is None:
+                rows = db.execute(f"SELECT {_COLUMNS} FROM jobs ORDER BY id")
+            else:
+                rows = db.execute(
+                    f"SELECT {_COLUMNS} FROM jobs WHERE state = ? ORDER BY id",
+                    (state,),
+                )
+            return [QueuedJob(row) for row in rows]
+        finally:
+            db.close()
+
+    @property
+    def states(self) -> Dict[str, int]:
+        """Number of jobs in each state."""
+        db = self._connect()
+        try:
+            rows = db.execute(
+                "SELECT state, COUNT(*) AS count FROM jobs GROUP BY state"
+            )
+            return {row["state"]: row["count"] for row in rows}
+        finally:
+            db.close()
+
+    def claim(self, worker: Optional[str] = None) -> Optional[QueuedJob]:
+        """Atomically take the oldest pending job, None if there is none."""
+        worker = worker or worker_name()
+        db = self._connect()
+        try:
+            # Take the write lock before reading, so no other worker can
+            # claim the same row in between.
+            db.execute("BEGIN IMMEDIATE")
+            row = db.execute(
+                "SELECT id FROM jobs WHERE state = ? ORDER BY id LIMIT 1",
+                (PENDING,),
+            ).fetchone()
+            if row is None:
+                db.execute("COMMIT")
+                return None
+            db.execute(
+                "UPDATE jobs SET state = ?, attempts = attempts + 1,"
+                " worker = ?, started = ?, ended = NULL WHERE id = ?",
+                (RUNNING, worker, time.time(), row["id"]),
+            )
+            db.execute("COMMIT")
+        except BaseException:
+            if db.in_transaction:
+                db.execute("ROLLBACK")
+            raise
+        finally:
+            db.close()
+        return self.get(row["id"])
+
+    def _update(self, job_id: int, **columns):
+        names = ", ".join(f"{name} = ?" for name in columns)
+        db = self._connect()
+        try:
+            db.execute(
+                f"UPDATE jobs SET {names} WHERE id = ?",
+                (*columns.values(), job_id),
+            )
+        finally:
+            db.close()
+
+    def set_log_file(self, job_id: int, log_file: str):
+        """Record where the running attempt logs to."""
+        self._update(job_id, log_file=log_file)
+
+    def complete(self, job_id: int, returncode: Optional[int]):
+        """Mark a claimed job finished."""
+        self._update(
+            job_id,
+            state=FINISHED,
+            returncode=returncode,
+            error=None,
+            ended=time.time(),
+        )
+
+    def fail(
+        self,
+        job_id: int,
+        error: BaseException,
+        returncode: Optional[int] = None,
+    ) -> str:
+        """Record a failed attempt and return the job's new state.
+
+        The job goes back to the queue until it used up its attempts.
+        """
+        job = self.get(job_id)
+        state = PENDING if job.attempts < job.max_attempts else FAILED
+        self._update(
+            job_id,
+            state=state,
+            returncode=returncode,
+            error=f"{type(error).__name__}: {error}",
+            ended=time.time(),
+        )
+        return state
+
+    def recover(self) -> List[int]:
+        """Requeue jobs left running by workers that are gone.
+
+        Workers on this host are checked by process id; jobs of other
+        hosts are left alone. Returns the requeued job ids.
+        """
+        host = socket.gethostname()
+        requeued = list()
+        for job in self.jobs(RUNNING):
+            worker_host, _, rest = (job.worker or "").partition(":")
+            pid = rest.partition(":")[0]
+            if worker_host != host or not pid.isdigit():
+                continue
+            if pid_alive(int(pid)):
+                continue
+            db = self._connect()
+            try:
+                # Skip jobs that finished or were claimed again since.
+                cursor = db.execute(
+                    "UPDATE jobs SET state = ? WHERE id = ?"
+                    " AND state = ? AND worker = ?",
+                    (PENDING, job.job_id, RUNNING, job.worker),
+                )
+            finally:
+                db.close()
+            if not cursor.rowcount:
+                continue
+            requeued.append(job.job_id)
+            logger.info(f"Requeued job {job.job_id} of {job.worker}")
+        return requeued
+
+    def run_one(self, job: QueuedJob, **matlab_kwargs) -> str:
+        """Run a claimed job and record the outcome, return its state."""
+        from .matlab import Matlab
+
+        matlab = None
+        try:
+            matlab = Matlab(
+                template=job.template, version=job.version, **matlab_kwargs
+            )
+            self.set_log_file(job.job_id, matlab.log_file)
+            returncode = matlab.run(**job.kwargs)
+        except Exception as error:
+            returncode = None if matlab is None else matlab.returncode
+            state = self.fail(job.job_id, error, returncode)
+            logger.error(f"Job {job.job_id} failed ({state}): {error}")
+            return state
+        self.complete(job.job_id, returncode)
+        return FINISHED
+
+    def run(
+        self, max_workers: Optional[int] = None, **matlab_kwargs
+    ) -> Dict[str, int]:
+        """Process the queue until no job is pending.
+
+        Jobs left running by dead workers are requeued first, see
+        :meth:`recover`. Jobs are claimed one at a time by
+        ``max_workers`` threads. Other processes may work on the same
+        queue concurrently. Returns :attr:`states` at the end.
+
+        All keyword arguments are passed to :class:`Matlab`.
+        """
+        max_workers = max_workers or os.cpu_count() or 1
+        self.recover()
+
+        def work():
+            while True:
+                job = self.claim()
+                if job is None:
+                    return
+                self.run_one(job, **matlab_kwargs)
+
+        with futures.ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="mlshim-queue"
+        ) as executor:
+            for future in [executor.submit(work) for _ in range(max_workers)]:
+                future.result()
+        return self.states
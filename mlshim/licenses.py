@@ -0,0 +1,170 @@
+"""Admit MATLAB® jobs only when their license seats are free.
+
+Seat counts come from the ``INCREMENT``/``FEATURE`` lines of FlexLM
+``.lic`` files (see :func:`mlshim.utils.get_licenses`) or from
+configuration. :class:`LicenseScheduler` hands out all features a job
+needs at once or none of them, so jobs never start just to fail on
+"Error checking out license" and never deadlock holding part of their
+seats.
+"""
+import logging
+import threading
+import time
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+
+from .utils import get_licenses
+
+logger = logging.getLogger(__name__)
+
+# Counts that mean "not limited".
+_UNCOUNTED = ("0", "uncounted")
+
+
+def parse_license_file(path: str) -> Dict[str, Optional[int]]:
+    """Seats per feature in a FlexLM license file, None for unlimited."""
+    with open(path, errors="replace") as fid:
+        # Backslash continues a line.
+        text = fid.read().replace("\\\r\n", " ").replace("\\\n", " ")
+    seats: Dict[str, Optional[int]] = dict()
+    for line in text.splitlines():
+        fields = line.split()
+        if len(fields) < 6 or fields[0] not in ("INCREMENT", "FEATURE"):
+            continue
+        feature, count = fields[1], fields[5].lower()
+        if count in _UNCOUNTED or not count.isdigit():
+            seats[feature] = None
+        elif feature not in seats or seats[feature] is not None:
+            seats[feature] = (seats.get(feature) or 0) + int(count)
+    return seats
+
+
+def read_seats(paths: Iterable[str]) -> Dict[str, Optional[int]]:
+    """Combine the seats of several license files."""
+    seats: Dict[str, Optional[int]] = dict()
+    for path in paths:
+        for feature, count in parse_license_file(path).items():
+            total = seats.get(feature, 0)
+            if count is None or total is None:
+                seats[feature] = None
+            else:
+                seats[feature] = total + count
+    return seats
+
+
+class LicenseScheduler:
+    """Per-feature seat counting for concurrent MATLAB® runs.
+
+    Parameters
+    ----------
+    seats : dict
+        Seats per feature name, e.g. ``{"RTW_Embedded_Coder": 2}``.
+        Features that are missing or None are not limited.
+
+    Example::
+
+        scheduler = LicenseScheduler.from_license_files()
+        with MatlabPool(scheduler=scheduler) as pool:
+            pool.submit(model=model, features=["Real-Time_Workshop"])
+    """
+
+    def __init__(self, seats: Dict[str, Optional[int]]):
+        self.seats = dict(seats)
+        self.in_use: Dict[str, int] = dict()
+        self._cond = threading.Condition()
+        self._listeners: List[Callable[[], None]] = list()
+
+    def __repr__(self):
+        return f"LicenseScheduler<{self.available}>"
+
+    @classmethod
+    def from_license_files(
+        cls, matlab_version: Optional[str] = None, root: Optional[str] = None
+    ) -> "LicenseScheduler":
+        """Build from the license files found by ``get_licenses``."""
+        paths = get_licenses(matlab_version=matlab_version, root=root) or []
+        seats = read_seats(paths)
+        logger.debug(f"License seats from {paths}: {seats}")
+        return cls(seats)
+
+    @property
+    def available(self) -> Dict[str, int]:
+        """Free seats of the limited features."""
+        with self._cond:
+            return {
+                feature: count - self.in_use.get(feature, 0)
+                for feature, count in self.seats.items()
+                if count is not None
+            }
+
+    def _fits(self, features: Iterable[str]) -> bool:
+        for feature in features:
+            count = self.seats.get(feature)
+            if count is not None and self.in_use.get(feature, 0) >= count:
+                return False
+        return True
+
+    def check(self, features: Iterable[str]):
+        """Raise ValueError if ``features`` can never be admitted."""
+        for feature in set(features):
+            if self.seats.get(feature, 1) == 0:
+                raise ValueError(f"No seats for license feature {feature}")
+
+    def try_acquire(self, features: Iterable[str]) -> bool:
+        """Take one seat of every feature if all are free."""
+        features = set(features)
+        with self._cond:
+            if not self._fits(features):
+                return False
+            for feature in features:
+                self.in_use[feature] = self.in_use.get(feature, 0) + 1
+            return True
+
+    def acquire(
+        self, features: Iterable[str], timeout: Optional[float] = None
+    ) -> bool:
+        """Wait until one seat of every feature is free and take them.
+
+        Returns False if ``timeout`` passed first.
+        """
+        features = set(features)
+        self.check(features)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while not self.try_acquire(features):
+                remaining = None
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                self._cond.wait(remaining)
+            return True
+
+    def release(self, features: Iterable[str]):
+        """Return the seats taken for ``features``.
+
+        Waiting :meth:`acquire` calls and the listeners are woken up.
+        """
+        with self._cond:
+            for feature in set(features):
+                self.in_use[feature] -= 1
+                if not self.in_use[feature]:
+                    del self.in_use[feature]
+            self._cond.notify_all()
+            listeners = list(self._listeners)
+        # Outside the lock, listeners take seats themselves.
+        for listener in listeners:
+            listener()
+
+    def add_listener(self, listener: Callable[[], None]):
+        """Call ``listener`` after every :meth:`release`."""
+        with self._cond:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[], None]):
+        with self._cond:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
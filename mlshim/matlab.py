@@ -1,3 +1,5 @@
+import collections
+import contextlib
 import logging
 import os
 import socket
@@ -6,26 +8,47 @@ import time
 import uuid
 from datetime import datetime
 from subprocess import Popen
+from subprocess import TimeoutExpired
+from typing import Callable
+from typing import Deque
+from typing import Generator
+from typing import List
 from typing import Optional
+from typing import Sequence
+from typing import TYPE_CHECKING
 from typing import Union
 
-from jinja2 import Environment
-from jinja2 import FileSystemLoader
 from jinja2 import Template
 
 from .consts import _APPDATA
+from .consts import _ERROR_REPORT_TIMEOUT
+from .consts import _EXIT_TIMEOUT
 from .consts import _HERE
+from .consts import _LAUNCHER_ARGS
 from .consts import _MATLAB_BASE
 from .consts import _MATLAB_TIMEOUT
 from .consts import _SLEEP_TIME
 from .consts import _START_TIMEOUT
-from .utils import abs_short_path
+from .metrics import MetricsRegistry
+from .metrics import RunResult
+from .metrics import registry as default_registry
+from .parser import LogScanner
+from .retention import RetentionPolicy
+from .retention import claim
+from .retention import collect_garbage
+from .retry import Attempt
+from .retry import NO_RETRY
+from .retry import RetryPolicy
+from .tail import LogTailer
+from .templating import get_environment
 from .utils import get_licenses
 from .utils import get_versions
+from .utils import resolve_executable
+from .utils import version_registry
+from .watch import watch
 
-if not os.path.exists(_MATLAB_BASE):
-    raise FileNotFoundError(_MATLAB_BASE)
-
+if TYPE_CHECKING:
+    from asyncio.subprocess import Process
 
 logger = logging.getLogger(__name__)
 
@@ -34,12 +57,17 @@ class Matlab:
     def __init__(
         self,
         *args,
+        root: str = _MATLAB_BASE,  # Root directory for Matlab installs
         working_directory: str = os.path.abspath(os.curdir),
         start_directory: str = None,  # Matlab Start Directory
         template: Optional[str] = None,  # Template to render
         version: Optional[str] = None,  # Version of Matlab to run
         timeout: Union[int, bool] = 600,  # Seconds
         threaded: bool = True,  #
+        golden_prefdir: Union[bool, str] = False,
+        retention: Optional[RetentionPolicy] = None,
+        retry: Optional[RetryPolicy] = None,
+        metrics: Optional[MetricsRegistry] = None,
     ):
         r"""Example function with types documented in the docstring.
 
@@ -56,6 +84,26 @@ class Matlab:
         working_directory : str
             Directory to put run script and log file in.
             Default: Output of ```tempfile.gettempdir()```
+        golden_prefdir : bool or str
+            Start from a clone of a preferences directory built once per
+            MATLAB® install instead of an empty one, see
+            :mod:`mlshim.prefdir`. A string is the directory holding the
+            golden preference directories.
+            Default: False
+        retention : RetentionPolicy
+            Remove old runs from the working directory after every run,
+            see :mod:`mlshim.retention`.
+            Default: Keep everything
+        retry : RetryPolicy
+            Run MATLAB® again after license checkout failures, see
+            :mod:`mlshim.retry`. The tries of the last run are kept in
+            ``attempts``.
+            Default: A single attempt
+        metrics : MetricsRegistry
+            Registry the phase timings of every run are added to, see
+            :mod:`mlshim.metrics`. Those of the last run are kept in
+            ``result``.
+            Default: ``mlshim.metrics.registry``
         """
         # No ambigious calls.
         assert len(args) == 0
@@ -66,19 +114,32 @@ class Matlab:
         self.template = template
         # Timeout
         self.timeout = timeout
+        # Single computational thread
+        self.threaded = threaded
+        # MATLAB® process and exit code of the last run
+        self.proc: Optional[Union[Popen, "Process"]] = None
+        self.returncode: Optional[int] = None
+
+        # Root directory for Matlab installs
+        if not os.path.exists(root):
+            raise FileNotFoundError(root)
+        self.root = root
 
         # Assign version
         if version is None:
             # Get all MATLAB® versions in the given root.
-            vers = get_versions()
+            vers = get_versions(self.root)
             self.version = vers[-1]
         else:
             self.version = version
 
         # Verify that the executable exists given the root & version. Otherwise
-        # raise error.
-        if not os.path.exists(self.exe):
-            raise FileNotFoundError(self.exe)
+        # raise error. The registry knows every version with an executable,
+        # only rescan if this one was installed since the last scan.
+        if self.version not in get_versions(self.root):
+            version_registry.invalidate(self.root)
+            if self.version not in get_versions(self.root):
+                raise FileNotFoundError(self.exe)
 
         self.working_directory = os.path.abspath(working_directory)
 
@@ -91,11 +152,15 @@ class Matlab:
         self.pref_dir = os.path.join(
             self.working_directory, f"prefdir_{self._uuid}"
         )
+        self.golden_prefdir = golden_prefdir
+        self.retention = retention
+        self.retry = retry
+        self.attempts: List[Attempt] = list()
+        self.metrics = metrics
+        self.result: Optional[RunResult] = None
 
-        loader_directories = [os.path.join(_HERE, "templates"), os.curdir]
-        self._env = Environment(
-            loader=FileSystemLoader(loader_directories), trim_blocks=True
-        )
+        # Shared by all instances with the same template search path.
+        self._env = get_environment()
 
     def __repr__(self):
         return (
@@ -104,11 +169,14 @@ class Matlab:
 
     @property
     def cmd(self):
-        """
+        """MATLAB® command line of a run.
 
+        On Windows ``-wait`` keeps the launcher running until MATLAB®
+        exits, so its process and exit code are MATLAB®'s.
         """
         cmd_array = [
             self.exe,
+            *_LAUNCHER_ARGS,
             "-logfile",
             self.log_file,
             "-r",
@@ -119,6 +187,17 @@ class Matlab:
 
         return cmd_array
 
+    @property
+    def run_env(self):
+        """Environment for the MATLAB® process.
+
+        The preferences directory is passed per process rather than set in
+        ``os.environ``, so concurrent runs do not interfere.
+        """
+        env = dict(os.environ)
+        env["MATLAB_PREFDIR"] = self.pref_dir
+        return env
+
     @property
     def _uuid(self):
         return str(self.uuid).replace("-", "")
@@ -128,6 +207,10 @@ class Matlab:
         log_name = f"mlshim_{self._uuid}.log"
         return os.path.join(self.working_directory, log_name)
 
+    @property
+    def pid_file(self):
+        return os.path.join(self.working_directory, f"mlshim_{self._uuid}.pid")
+
     @property  # type: ignore
     def run_script(self):
         run_name = f"mlshim_{self._uuid}.m"
@@ -141,13 +224,16 @@ class Matlab:
 
         Should match the output of calling ```matlabroot``` inside of MATLAB®.
         """
-        return os.path.join(_MATLAB_BASE, self.version)
+        return os.path.join(self.root, self.version)
 
-    @property  # type: ignore
-    @abs_short_path
+    @property
     def exe(self):
-        """Full path to the MATLAB® executable."""
-        return os.path.join(self.matlabroot, "bin", "matlab.exe")
+        """Full path to the MATLAB® executable.
+
+        Resolved once per root and version, see
+        :func:`mlshim.utils.resolve_executable`.
+        """
+        return resolve_executable(self.root, self.version)
 
     @property
     def headers(self):
@@ -168,124 +254,581 @@ class Matlab:
         assert len(args) == 0
         return self._template.render(obj=self, **kwargs)
 
+    def _render(self, template: str, **kwargs):
+        """Render a named template other than ``self.template``."""
+        return self._env.get_template(template).render(obj=self, **kwargs)
+
     def gen_script(self, *args, **kwargs):
         """Write rendered Jinja2 script template and write to run_script path.
 
         All keyword arguments are passed to the Jinja2 template.
         """
         assert len(args) == 0
-        while not os.path.exists(self.working_directory):
-            os.makedirs(self.working_directory)
-            time.sleep(1)
-        run_script_body = self.render_template(**kwargs)
+        self._write_script(self.render_template(**kwargs))
+
+    def _write_script(self, run_script_body: str):
+        os.makedirs(self.working_directory, exist_ok=True)
         with open(self.run_script, "w") as fid:
             print(run_script_body, file=fid)
+        self._mark("rendered")
 
-    def run(self, *args, **kwargs):
+    def run(
+        self, *args, on_line: Optional[Callable[[str], None]] = None, **kwargs
+    ):
         """Execute MATLAB® instance.
 
+        The working directory and preferences directory are passed to the
+        MATLAB® process only, so different instances can run concurrently
+        from many threads.
+
+        ``on_line`` is called with every log line, without line ending, as
+        soon as MATLAB® writes it. All other keyword arguments are passed
+        to the Jinja2 template.
+
+        Returns the MATLAB® exit code.
         """
         assert len(args) == 0
-        self.gen_script(**kwargs)
-        self._matlab_runner()
+        with self._running():
+            self.gen_script(**kwargs)
+            return (self.retry or NO_RETRY).call(
+                lambda: self._matlab_runner(on_line), self.attempts
+            )
+
+    def iter_output(
+        self, *args, **kwargs
+    ) -> Generator[str, None, Optional[int]]:
+        """Execute MATLAB® instance and yield log lines as they appear.
+
+        A generator alternative to ``run(on_line=...)``. The run is driven
+        from the iterating thread, only the lines of one chunk of the log
+        are buffered (see ``LogTailer.chunk_size``).
+        Errors of the run are raised after the lines preceding them were
+        yielded; the exit code is the generator's return value and is
+        stored in ``returncode``.
+
+        Closing the generator early stops following the run, MATLAB® is
+        left running in ``proc``.
+
+        All keyword arguments are passed to the Jinja2 template.
+        """
+        assert len(args) == 0
+        with self._running():
+            self.gen_script(**kwargs)
+            lines: Deque[str] = collections.deque()
+            steps = self._matlab_steps(lines.append)
+            while True:
+                error = None
+                try:
+                    next(steps)
+                except StopIteration as stop:
+                    returncode = stop.value
+                    break
+                except Exception as exc:
+                    error = exc
+                while lines:
+                    yield lines.popleft()
+                if error is not None:
+                    raise error
+            while lines:
+                yield lines.popleft()
+            return returncode
+
+    async def run_async(
+        self, *args, on_line: Optional[Callable[[str], None]] = None, **kwargs
+    ):
+        """Execute MATLAB® instance without blocking the event loop.
+
+        Coroutine counterpart of :meth:`run`, built on
+        ``asyncio.create_subprocess_exec``. Many runs can be supervised
+        concurrently from one event loop::
+
+            await asyncio.gather(*(m.run_async(scripts=s) for m in ...))
+
+        Returns the MATLAB® exit code.
+        """
+        import asyncio
+
+        assert len(args) == 0
+        with self._protected(), self._recording():
+            try:
+                self.gen_script(**kwargs)
+                return await (self.retry or NO_RETRY).call_async(
+                    lambda: self._matlab_runner_async(on_line), self.attempts
+                )
+            finally:
+                if self.retention is not None:
+                    loop = asyncio.get_event_loop()
+                    await loop.run_in_executor(None, self._collect_garbage)
+
+    def run_batch(
+        self,
+        jobs: Sequence[Union[str, Sequence[str]]],
+        *args,
+        on_line: Optional[Callable[[str], None]] = None,
+        **kwargs,
+    ):
+        """Run many jobs in one MATLAB® session.
+
+        Each job is a MATLAB® statement or a list of statements. The jobs
+        run in order from ``batch_template.m``, each in its own try/catch
+        and with all variables cleared in between, so a failing job does
+        not stop the others. MATLAB® starts once for all of them.
+
+        ``on_line`` gets every log line as in :meth:`run`. All other
+        keyword arguments are passed to the Jinja2 template.
+
+        Returns:
+            A :class:`mlshim.batch.BatchJob` per job, in order, with its
+            state, log lines and error.
+
+        Exceptions:
+            Those of :meth:`run`, except that MATLAB® exiting in the
+            middle of the batch fails the running job instead. License
+            errors are retried with ``retry`` and raised like in
+            :meth:`run`.
+        """
+        from .batch import BatchCollector
+        from .batch import make_jobs
+        from .exceptions import LicenseError
+        from .pool import PENDING
+
+        assert len(args) == 0
+
+        def attempt():
+            # Every attempt starts the batch over.
+            batch = make_jobs(jobs)
+            collector = BatchCollector(batch, log_file=self.log_file)
+
+            def forward(line):
+                collector.feed(line)
+                if on_line is not None:
+                    on_line(line)
+
+            try:
+                self._matlab_runner(forward)
+            except LicenseError:
+                raise
+            except RuntimeError as error:
+                # Failed to start, no job to blame.
+                if not any(job.state != PENDING for job in batch):
+                    raise
+                logger.error(f"MATLAB® batch aborted: {error}")
+                collector.abort(error)
+            collector.close()
+            return batch
+
+        with self._running():
+            self._write_script(
+                self._render(
+                    "batch_template.m", jobs=make_jobs(jobs), **kwargs
+                )
+            )
+            return (self.retry or NO_RETRY).call(attempt, self.attempts)
+
+    def start_worker(self, *args, **kwargs):
+        """Start a long-lived MATLAB® worker on this instance.
+
+        MATLAB® is launched once and then runs jobs submitted with
+        ``MatlabWorker.submit`` until stopped, so the startup cost is paid
+        once. This instance is dedicated to the worker afterwards.
+
+        All keyword arguments are passed to :class:`mlshim.worker.MatlabWorker`.
+        """
+        from .worker import MatlabWorker
+
+        assert len(args) == 0
+        worker = MatlabWorker(self, **kwargs)
+        worker.start()
+        return worker
 
     @property
     def _template(self):
         return self._env.get_template(self.template)
 
-    def _matlab_runner(self):
+    def _matlab_runner(self, on_line: Optional[Callable[[str], None]] = None):
         """Run and monitor MATLAB®
 
+        The log file and the MATLAB® process are watched together, so an
+        early exit or crash ends the wait immediately.
+
+        Returns:
+            The MATLAB® exit code, also stored as ``returncode``. None if
+            not waiting for MATLAB® to exit.
+
         Exceptions:
             TimeoutError("MATLAB® Logfile creation timed out")
             TimeoutError("MATLAB® start timed out")
             TimeoutError("MATLAB® execution timed out")
-            RuntimeError("MATLAB® processing failed")
+            MatlabError("MATLAB® processing failed: <message> (<identifier>)")
+            LicenseError("License Error. <log line>")
+            RuntimeError("MATLAB® exited with code N")
         """
-        os.environ["MATLAB_PREFDIR"] = self.pref_dir
-        os.chdir(self.working_directory)
+        steps = self._matlab_steps(on_line)
+        while True:
+            try:
+                next(steps)
+            except StopIteration as stop:
+                return stop.value
+
+    def _matlab_steps(
+        self, on_line: Optional[Callable[[str], None]] = None
+    ) -> Generator[None, None, Optional[int]]:
+        """Generator behind :meth:`_matlab_runner`.
+
+        Yields after every poll of the log, which reads at most one chunk
+        of it, so :meth:`iter_output` can hand out the lines passed to
+        ``on_line`` in between. Only waits when the log was read to its
+        end.
+        """
+        self._seed_prefdir()
+        self._prepare_run()
+        with LogTailer(self.log_file) as tailer:
+            # Run the MATLAB® command
+            self._mark("spawn")
+            proc = Popen(self.cmd, cwd=self.working_directory, env=self.run_env)
+            self._mark("spawned")
+            self.proc = proc
+            self._write_pid(proc.pid, os.getpid())
+            scanner = LogScanner(tailer, on_line=on_line)
+            monitor = self._monitor(scanner, proc.poll, proc.kill)
+            # Wake up as soon as MATLAB® writes to the log or exits.
+            with watch(self.log_file, proc=proc) as watcher:
+                while True:
+                    try:
+                        next(monitor)
+                    except StopIteration as stop:
+                        finished = stop.value
+                        break
+                    yield
+                    if not tailer.pending:
+                        watcher.wait(_SLEEP_TIME)
+            if not finished:
+                return self.returncode
+            # The templates exit right after "Finished", collect the code.
+            try:
+                proc.wait(_EXIT_TIMEOUT)
+                self._mark("exited")
+            except TimeoutExpired:
+                logger.warning(
+                    f"MATLAB® still running {_EXIT_TIMEOUT:.2f}s after finishing"
+                )
+            scanner.poll(final=True)
+        return self._finish(scanner, proc.returncode)
+
+    async def _matlab_runner_async(
+        self, on_line: Optional[Callable[[str], None]] = None
+    ):
+        """Run and monitor MATLAB® from an asyncio event loop.
+
+        Same behaviour and exceptions as :meth:`_matlab_runner`.
+        """
+        import asyncio
+
+        # Building a golden preferences directory runs MATLAB® once, keep
+        # it off the event loop.
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, self._seed_prefdir)
+        self._prepare_run()
+        with LogTailer(self.log_file) as tailer:
+            self._mark("spawn")
+            proc = await asyncio.create_subprocess_exec(
+                *self.cmd, cwd=self.working_directory, env=self.run_env
+            )
+            self._mark("spawned")
+            self.proc = proc
+            self._write_pid(proc.pid, os.getpid())
+            exit_task = asyncio.ensure_future(proc.wait())
+            scanner = LogScanner(tailer, on_line=on_line)
+
+            def poll():
+                return proc.returncode if exit_task.done() else None
+
+            monitor = self._monitor(scanner, poll, proc.kill)
+            with watch(self.log_file) as watcher:
+                while True:
+                    try:
+                        next(monitor)
+                    except StopIteration as stop:
+                        finished = stop.value
+                        break
+                    if tailer.pending:
+                        # Let other tasks run between chunks of the log.
+                        await asyncio.sleep(0)
+                        continue
+                    change_task = asyncio.ensure_future(
+                        watcher.wait_async(_SLEEP_TIME)
+                    )
+                    await asyncio.wait(
+                        [exit_task, change_task],
+                        return_when=asyncio.FIRST_COMPLETED,
+                    )
+                    change_task.cancel()
+            if not finished:
+                return self.returncode
+            await asyncio.wait([exit_task], timeout=_EXIT_TIMEOUT)
+            if exit_task.done():
+                self._mark("exited")
+            else:
+                logger.warning(
+                    f"MATLAB® still running {_EXIT_TIMEOUT:.2f}s after finishing"
+                )
+            scanner.poll(final=True)
+        return self._finish(scanner, poll())
+
+    @contextlib.contextmanager
+    def _running(self):
+        """Protect this run's artifacts, apply ``retention`` afterwards."""
+        with self._protected(), self._recording():
+            try:
+                yield
+            finally:
+                if self.retention is not None:
+                    self._collect_garbage()
+
+    @contextlib.contextmanager
+    def _protected(self):
+        """Mark this run's artifacts live for garbage collection.
+
+        ``claim`` covers this process. For other processes the pid file
+        names this process until MATLAB® is started and MATLAB® afterwards.
+        It is written before the script, so the artifacts are never
+        unprotected.
+        """
+        with claim(self._uuid):
+            self.proc = None
+            self._write_pid(os.getpid())
+            try:
+                yield
+            finally:
+                self._release_pid()
+
+    @contextlib.contextmanager
+    def _recording(self):
+        """Time the run in ``result`` and add it to the metrics."""
+        result = self.result = RunResult(self.version)
+        self.attempts = list()
+        result.mark("render")
+        try:
+            yield result
+        except Exception as error:
+            result.status = "failed"
+            result.error = type(error).__name__
+            raise
+        else:
+            result.status = "finished"
+        finally:
+            if result.status == "running":
+                # Interrupted, or an ``iter_output`` closed early.
+                result.status = "aborted"
+            result.returncode = self.returncode
+            result.attempts = len(self.attempts) or 1
+            (self.metrics or default_registry).observe(result)
+
+    def _mark(self, name: str):
+        """Record a phase boundary of the current run."""
+        if self.result is not None and self.result.status == "running":
+            self.result.mark(name)
+
+    def _collect_garbage(self):
+        """Post-run hook applying ``retention`` to the working directory."""
+        try:
+            removed = collect_garbage(self.working_directory, self.retention)
+        except OSError as error:
+            logger.warning(
+                f"Cleaning up {self.working_directory} failed: {error}"
+            )
+        else:
+            logger.debug(f"Removed {len(removed)} old runs")
+
+    def _write_pid(self, *pids: int):
+        """Record the processes using the run's artifacts.
 
+        Garbage collection skips the run while any of them is alive.
+        """
+        os.makedirs(self.working_directory, exist_ok=True)
+        with open(self.pid_file, "w") as fid:
+            print(*pids, file=fid)
+
+    def _release_pid(self):
+        """Only MATLAB® keeps the run live once this process is done."""
+        if self.proc is not None:
+            self._write_pid(self.proc.pid)
+            return
+        try:
+            os.unlink(self.pid_file)
+        except FileNotFoundError:
+            pass
+
+    def _seed_prefdir(self):
+        """Clone the golden preferences directory into ``pref_dir``."""
+        if not self.golden_prefdir or os.path.exists(self.pref_dir):
+            return
+        from .prefdir import clone_tree
+        from .prefdir import get_golden
+
+        base = None if self.golden_prefdir is True else self.golden_prefdir
+        clone_tree(get_golden(self.root, self.version, base), self.pref_dir)
+
+    def _prepare_run(self):
+        """Remove stale output before a run."""
         # Remove log file if it exists.
         if os.path.exists(self.log_file):
             os.unlink(self.log_file)
+        self.returncode = None
+        if self.result is not None:
+            # Only the phases of the last attempt are kept.
+            self.result.restart()
 
-        # Run the MATLAB® command
-        proc = Popen(self.cmd)
+    def _monitor(
+        self,
+        scanner: LogScanner,
+        poll: Callable[[], Optional[int]],
+        kill: Callable[[], None],
+    ) -> Generator[None, None, bool]:
+        """Follow a MATLAB® run through its log file.
+
+        A generator shared by the synchronous and asynchronous runners. It
+        yields whenever it has to wait for more output or for the process
+        to exit; the caller decides how to wait.
+
+        Returns True once "Finished" was seen, False if MATLAB® already
+        exited without finishing or is not being waited for.
+        """
         # Start timer
         t_start = time.time()
-
         # Step 1. Wait for the log file to exist
         while not os.path.exists(self.log_file):
+            returncode = poll()
+            if returncode is not None:
+                self._check_exit(returncode, scanner)
+                return False
             # Check to see if timeout has been exceeded
             if time.time() - t_start > _START_TIMEOUT:
+                kill()
                 # Print the ERROR and raise a timeout ERROR
                 logger.error(f"{_START_TIMEOUT:.2f}s Timelimit Exceeded")
                 raise TimeoutError("Logfile creation timed out")
             logger.debug(
                 f"logfile existence wait: {time.time() - t_start:.2f}, {t_start:.2f}, {time.time():.2f}"
             )
-            # Sleep to allow the process to run
-            time.sleep(_SLEEP_TIME)
+            yield
         logger.info("MATLAB® logfile created")
+        self._mark("log_created")
         # Step 2
         # Wait for Matlab to start and execute the script
         while True:
-            # Read the log file
-            with open(self.log_file, "r") as fid:
-                lines = fid.readlines()
-            # Read each of the lines in it and remove the new line endings.
-            lines = [line.strip() for line in lines]
-            # If we've found the "Started" string, MATLAB® has made it that far into
-            # the script.
-            if "########## Started ##########" in lines:
+            # Poll the process first so no output written before the exit
+            # is missed.
+            returncode = poll()
+            # Only the lines appended since the last poll are scanned.
+            scanner.poll(final=returncode is not None)
+            # If we've found the "Started" string, MATLAB® has made it that
+            # far into the script.
+            if scanner.started:
                 logger.info("MATLAB® Started")
+                self._mark("started")
                 break
+            # Nothing will run without a license, do not wait for MATLAB®
+            # to give up on its own.
+            if scanner.license_error:
+                kill()
+                self._raise_license_error(scanner)
+            if returncode is not None:
+                self._check_exit(returncode, scanner)
+                return False
             # Check to see if timeout has been exceeded
             if time.time() - t_start > _START_TIMEOUT:
-                proc.kill()
+                kill()
                 # Print the error and raise a timeout error
                 logger.error(f"{_START_TIMEOUT:.2f}s Timelimit Exceeded")
                 raise TimeoutError("Matlab start timed out")
             logger.debug(
                 f"MATLAB® start wait: {time.time() - t_start:.2f}, {t_start:.2f}, {time.time():.2f}"
             )
-            time.sleep(_SLEEP_TIME)
+            yield
         # While the processing isn't complete
+        t_failed = None
         while True:
-            # Open the log file read only
-            with open(self.log_file, "r") as fid:
-                lines = fid.readlines()
-            # Strip ending new line from all lines
-            lines = [line.strip() for line in lines]
+            returncode = poll()
+            scanner.poll(final=returncode is not None)
             if self.timeout is None:
                 logger.info("Not Waiting for Matlab")
-                break
+                return False
             # Check for the failed line
-            elif "########## Failed ##########" in lines:
-                logger.error("Not Waiting for Matlab")
-                # Throw error
-                raise RuntimeError("Matlab processing failed")
+            elif scanner.failed:
+                # The error report follows "Failed", collect all of it
+                # before raising.
+                if t_failed is None:
+                    t_failed = time.time()
+                    self._mark("finished")
+                if (
+                    scanner.finished
+                    or returncode is not None
+                    or time.time() - t_failed > _ERROR_REPORT_TIMEOUT
+                ):
+                    self._raise_failed(scanner)
             # Check for the finished line
-            if "########## Finished ##########" in lines:
+            elif scanner.finished:
                 logger.info("Matlab finished")
-                break
+                self._mark("finished")
+                return True
+            elif returncode is not None:
+                self._check_exit(returncode, scanner)
+                return False
             # Check to see if timeout has been exceeded
             if time.time() - t_start > self.timeout:
                 # Kill the process
-                proc.kill()
+                kill()
                 # Print the error and raise a timeout error
-                logger.error(f"{timeout:.2f}s Timelimit Exceeded")
+                logger.error(f"{self.timeout:.2f}s Timelimit Exceeded")
                 raise TimeoutError("Matlab execution timed out")
 
             logger.debug(
                 f"MATLAB® exceution wait: {time.time() - t_start:.2f}, {t_start:.2f}, {time.time():.2f}"
             )
-            time.sleep(_SLEEP_TIME)
-
-        # Debugging
-        with open(self.log_file, "r") as fid:
-            lines = fid.readlines()
-        # Strip ending new line from all lines
-        lines = [line.strip() for line in lines]
-        if "Error checking out license" in lines:
-            raise Exception("License Error.")
+            yield
+
+    def _finish(self, scanner: LogScanner, returncode: Optional[int]):
+        """Check the outcome of a run that printed "Finished"."""
+        if scanner.license_error:
+            self._raise_license_error(scanner)
+        self.returncode = returncode
+        if self.returncode:
+            raise RuntimeError(f"Matlab exited with code {self.returncode}")
+        return self.returncode
+
+    def _check_exit(self, returncode: int, scanner: LogScanner):
+        """Handle MATLAB® exiting before writing "Finished"."""
+        self.returncode = returncode
+        self._mark("exited")
+        logger.debug(f"MATLAB® exited with code {self.returncode}")
+        if scanner.license_error:
+            self._raise_license_error(scanner)
+        if not scanner.started:
+            logger.error("MATLAB® exited before starting")
+            raise RuntimeError(
+                f"Matlab exited with code {self.returncode} before starting"
+            )
+        if scanner.failed:
+            self._raise_failed(scanner)
+        if self.returncode:
+            raise RuntimeError(f"Matlab exited with code {self.returncode}")
+        logger.warning("MATLAB® exited without finishing")
+
+    def _raise_failed(self, scanner: LogScanner):
+        """Raise the error reported after "Failed"."""
+        scanner.close()
+        if scanner.license_error:
+            # A toolbox license checkout failed, either reported as a
+            # license error line or as the script's error, see
+            # parser.is_license_error. As retryable as a failed start.
+            self._raise_license_error(scanner)
+        error = scanner.exception(self.log_file)
+        logger.error(str(error))
+        raise error
+
+    def _raise_license_error(self, scanner: LogScanner):
+        """Raise the failed license checkout."""
+        error = scanner.license_exception(self.log_file)
+        logger.error(str(error))
+        raise error
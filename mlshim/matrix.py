@@ -0,0 +1,119 @@
+"""Run the same script on several MATLAB® versions at once."""
+import logging
+from typing import List
+from typing import Optional
+from typing import Sequence
+
+from .consts import _MATLAB_BASE
+from .matlab import Matlab
+from .pool import FINISHED
+from .pool import MatlabJob
+from .pool import MatlabPool
+from .utils import get_versions
+
+logger = logging.getLogger(__name__)
+
+
+class VersionResult:
+    """Outcome of the run on one MATLAB® version.
+
+    Attributes
+    ----------
+    version : str
+        MATLAB® release, e.g. ``R2019b``.
+    status : str
+        ``finished`` or ``failed``.
+    returncode : int
+        MATLAB® exit code, None if it is unknown.
+    duration : float
+        Seconds the run took.
+    log_file : str
+        Log of the run.
+    error : Exception
+        Exception raised by the run, if it failed.
+    """
+
+    def __init__(self, version: str, job: MatlabJob):
+        self.version = version
+        self.status = job.state
+        self.returncode = job.returncode
+        if self.returncode is None:
+            self.returncode = job.matlab.returncode
+        self.duration = job.duration
+        self.log_file = job.matlab.log_file
+        self.error = job.error
+
+    def __repr__(self):
+        return f"VersionResult<{self.version}, {self.status}>"
+
+    @property
+    def ok(self) -> bool:
+        return self.status == FINISHED
+
+
+def run_across_versions(
+    script: str,
+    versions: Optional[Sequence[str]] = None,
+    max_parallel: Optional[int] = None,
+    root: str = _MATLAB_BASE,
+    **matlab_kwargs,
+) -> List[VersionResult]:
+    """Run ``script`` with ``run_template.m`` on each version concurrently.
+
+    Parameters
+    ----------
+    script : str
+        MATLAB® statement(s) to run.
+    versions : list
+        Default: All versions in ``root``.
+    max_parallel : int
+        Maximum number of MATLAB® instances running at the same time.
+        Default: All versions at once.
+    root : str
+        Root directory for MATLAB® installs.
+    **matlab_kwargs
+        Further keyword arguments for the :class:`Matlab` instances.
+
+    Returns
+    -------
+    list
+        A :class:`VersionResult` per version, in the order of
+        ``versions``. Failed runs do not raise, see their ``error``.
+    """
+    if versions is None:
+        versions = get_versions(root)
+    versions = list(versions)
+    matlab_kwargs.setdefault("template", "run_template.m")
+    # Instances are created up front, so an unknown version fails before
+    # anything is launched.
+    matlabs = [
+        Matlab(root=root, version=version, **matlab_kwargs)
+        for version in versions
+    ]
+    with MatlabPool(max_workers=max_parallel or len(matlabs) or 1) as pool:
+        jobs = [pool.submit(matlab, scripts=[script]) for matlab in matlabs]
+        for job in pool.as_completed(jobs):
+            logger.info(f"{job.matlab.version}: {job.state}")
+    return [VersionResult(job.matlab.version, job) for job in jobs]
+
+
+def format_table(results: Sequence[VersionResult]) -> str:
+    """Plain text table of ``results`` for the console."""
+    rows = [("Version", "Status", "Code", "Duration", "Log")]
+    for result in results:
+        rows.append(
+            (
+                result.version,
+                result.status,
+                "" if result.returncode is None else str(result.returncode),
+                "" if result.duration is None else f"{result.duration:.1f}s",
+                result.log_file,
+            )
+        )
+    widths = [max(len(row[idx]) for row in rows) for idx in range(4)]
+    return "\n".join(
+        "  ".join(
+            [cell.ljust(width) for cell, width in zip(row, widths)] + [row[4]]
+        )
+        for row in rows
+    )
@@ -0,0 +1,267 @@
+"""Where the time of a MATLAB® run goes.
+
+Every run records monotonic timestamps at the boundaries of its phases in
+a :class:`RunResult`:
+
+``render``
+    Rendering the template and writing the run script.
+``spawn``
+    Starting the MATLAB® process.
+``log_wait``
+    From the process start until the log file exists.
+``boot``
+    From the log file until the script printed "Started".
+``execute``
+    From "Started" until "Finished" or "Failed".
+``exit``
+    From "Finished" until the process exited.
+
+Results are added to a :class:`MetricsRegistry`, by default the module's
+``registry``, which keeps a histogram per phase and MATLAB® version and
+writes them as JSON or in the Prometheus text format.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+from .consts import _METRICS_BUCKETS
+
+logger = logging.getLogger(__name__)
+
+# Phase -> (start mark, end mark)
+PHASES: Dict[str, Tuple[str, str]] = {
+    "render": ("render", "rendered"),
+    "spawn": ("spawn", "spawned"),
+    "log_wait": ("spawned", "log_created"),
+    "boot": ("log_created", "started"),
+    "execute": ("started", "finished"),
+    "exit": ("finished", "exited"),
+}
+
+
+class RunResult:
+    """Timings and outcome of one MATLAB® run.
+
+    Attributes
+    ----------
+    version : str
+        MATLAB® release that ran.
+    marks : dict
+        ``time.monotonic()`` per phase boundary, see :data:`PHASES`. Marks
+        of phases the run did not reach are missing.
+    status : str
+        ``running``, ``finished`` or ``failed``.
+    returncode : int
+        MATLAB® exit code, None if it is unknown.
+    error : str
+        Exception type of a failed run.
+    attempts : int
+        Number of MATLAB® starts, see ``Matlab.attempts``.
+    """
+
+    def __init__(self, version: str):
+        self.version = version
+        self.marks: Dict[str, float] = dict()
+        self.status = "running"
+        self.returncode: Optional[int] = None
+        self.error: Optional[str] = None
+        self.attempts = 0
+
+    def __repr__(self):
+        return f"RunResult<{self.version}, {self.status}>"
+
+    def mark(self, name: str):
+        """Record that the run reached the boundary ``name`` now."""
+        self.marks[name] = time.monotonic()
+
+    def restart(self):
+        """Drop the marks of a previous attempt, keep ``render``."""
+        for name in list(self.marks):
+            if name not in PHASES["render"]:
+                del self.marks[name]
+
+    @property
+    def phases(self) -> Dict[str, float]:
+        """Seconds per completed phase."""
+        return {
+            phase: self.marks[end] - self.marks[start]
+            for phase, (start, end) in PHASES.items()
+            if start in self.marks and end in self.marks
+        }
+
+    @property
+    def duration(self) -> Optional[float]:
+        """Seconds from the first to the last mark."""
+        if not self.marks:
+            return None
+        return max(self.marks.values()) - min(self.marks.values())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "status": self.status,
+            "returncode": self.returncode,
+            "error": self.error,
+            "attempts": self.attempts,
+            "duration": self.duration,
+            "phases": self.phases,
+        }
+
+
+class Histogram:
+    """Cumulative histogram in the Prometheus sense."""
+
+    def __init__(self, buckets: Sequence[float] = _METRICS_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        for idx, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[idx] += 1
+        self.count += 1
+        self.sum += value
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "buckets": {
+                _format_bound(bound): count
+                for bound, count in zip(self.buckets, self.counts)
+            },
+        }
+
+
+def _format_bound(bound: float) -> str:
+    return repr(float(bound))
+
+
+def _escape(value: str) -> str:
+    return (
+        value.replace("\\", "\\\\")
+        .replace('"', '\\"')
+        .replace("\n", "\\n")
+    )
+
+
+def _labels(**labels: str) -> str:
+    pairs = [f'{key}="{_escape(value)}"' for key, value in labels.items()]
+    return "{" + ",".join(pairs) + "}"
+
+
+class MetricsRegistry:
+    """Phase histograms and run counts per MATLAB® version.
+
+    Thread safe, one registry can collect the runs of a whole pool.
+
+    Parameters
+    ----------
+    buckets : tuple
+        Upper bounds of the histogram buckets in seconds.
+
+    Example::
+
+        registry = MetricsRegistry()
+        Matlab(metrics=registry, ...).run(...)
+        registry.write("mlshim.prom")
+    """
+
+    def __init__(self, buckets: Sequence[float] = _METRICS_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # (phase, version) -> histogram
+        self.phases: Dict[Tuple[str, str], Histogram] = dict()
+        # (version, status) -> count
+        self.runs: Dict[Tuple[str, str], int] = dict()
+
+    def observe(self, result: RunResult):
+        """Add the phases and outcome of a finished run."""
+        with self._lock:
+            for phase, seconds in result.phases.items():
+                key = (phase, result.version)
+                if key not in self.phases:
+                    self.phases[key] = Histogram(self.buckets)
+                self.phases[key].observe(seconds)
+            key = (result.version, result.status)
+            self.runs[key] = self.runs.get(key, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self.phases.clear()
+            self.runs.clear()
+
+    def to_dict(self) -> Dict[str, List[Dict[str, Any]]]:
+        with self._lock:
+            return {
+                "phases": [
+                    {"phase": phase, "version": version, **hist.to_dict()}
+                    for (phase, version), hist in sorted(self.phases.items())
+                ],
+                "runs": [
+                    {"version": version, "status": status, "count": count}
+                    for (version, status), count in sorted(self.runs.items())
+                ],
+            }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_prometheus(self) -> str:
+        """Metrics in the Prometheus text exposition format."""
+        name = "mlshim_phase_seconds"
+        lines = [
+            f"# HELP {name} Duration of the phases of MATLAB runs.",
+            f"# TYPE {name} histogram",
+        ]
+        with self._lock:
+            for (phase, version), hist in sorted(self.phases.items()):
+                labels = _labels(phase=phase, version=version)
+                bounds = [_format_bound(bound) for bound in hist.buckets]
+                counts = hist.counts + [hist.count]
+                for le, count in zip(bounds + ["+Inf"], counts):
+                    bucket = _labels(phase=phase, version=version, le=le)
+                    lines.append(f"{name}_bucket{bucket} {count}")
+                lines.append(f"{name}_sum{labels} {hist.sum!r}")
+                lines.append(f"{name}_count{labels} {hist.count}")
+            lines.append("# HELP mlshim_runs_total MATLAB runs by outcome.")
+            lines.append("# TYPE mlshim_runs_total counter")
+            for (version, status), count in sorted(self.runs.items()):
+                labels = _labels(status=status, version=version)
+                lines.append(f"mlshim_runs_total{labels} {count}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str, format: Optional[str] = None):
+        """Write the metrics to ``path``.
+
+        ``format`` is ``json`` or ``prometheus``. Default: ``prometheus``
+        for ``.prom`` files, else ``json``. The file is replaced
+        atomically, so collectors never read a partial file.
+        """
+        if format is None:
+            format = "prometheus" if path.endswith(".prom") else "json"
+        if format == "prometheus":
+            text = self.to_prometheus()
+        elif format == "json":
+            text = self.to_json()
+        else:
+            raise ValueError(f"Unknown metrics format: {format}")
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as fid:
+            fid.write(text)
+        os.replace(tmp, path)
+        logger.debug(f"Wrote metrics to {path}")
+
+
+# Registry runs are recorded in unless a Matlab instance is given its own.
+registry = MetricsRegistry()
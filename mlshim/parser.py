@@ -0,0 +1,302 @@
+"""Incremental parser turning MATLAB® log lines into typed run events.
+
+The templates print ``########## Started/Finished/Failed ##########``
+markers and, on failure, an error report::
+
+    ########## Failed ##########
+    ERROR: <message> (<identifier>)
+
+    [Line 12]: C:\\path\\to\\script.m
+
+Batch runs and workers wrap each job in ``########## Job <id> Started
+##########`` and a Finished or Failed marker, the latter followed by the
+same error report.
+
+:class:`LogParser` is a state machine fed one line at a time, so a log is
+parsed in a single pass whether it is followed live (:class:`LogScanner`)
+or read from an archive (:func:`parse_log`).
+"""
+import locale
+import re
+from typing import Callable
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+from typing import Tuple
+
+from .consts import _FAILED
+from .consts import _FINISHED
+from .consts import _LICENSE_CHECKOUT_FAILED
+from .consts import _LICENSE_ERROR
+from .consts import _LICENSE_IDENTIFIER
+from .consts import _STARTED
+from .exceptions import LicenseError
+from .exceptions import MatlabError
+from .tail import LogTailer
+
+_ERROR = re.compile(r"^ERROR: (.*?)(?: \(([^()]*)\))?$")
+_IDENTIFIER = re.compile(r"^(.*?) \(([^()]*)\)$")
+_STACK = re.compile(r"^\[Line (\d+)\]: (.*)$")
+_JOB = re.compile(
+    r"^########## Job (\S+) (Started|Finished|Failed) ##########$"
+)
+
+
+class StartedEvent(NamedTuple):
+    line_number: int
+
+
+class FinishedEvent(NamedTuple):
+    line_number: int
+
+
+class FailedEvent(NamedTuple):
+    line_number: int
+
+
+class JobStartedEvent(NamedTuple):
+    line_number: int
+    job_id: str
+
+
+class JobFinishedEvent(NamedTuple):
+    line_number: int
+    job_id: str
+
+
+class JobFailedEvent(NamedTuple):
+    line_number: int
+    job_id: str
+
+
+class ErrorEvent(NamedTuple):
+    """Error report printed after "Failed" or "Job <id> Failed"."""
+
+    line_number: int
+    message: str
+    identifier: str
+    # (line, file) pairs, outermost call first.
+    stack: Tuple[Tuple[int, str], ...]
+
+
+class LicenseErrorEvent(NamedTuple):
+    line_number: int
+    line: str
+
+
+def is_license_error(event: ErrorEvent) -> bool:
+    """True if an error report is a failed toolbox license checkout."""
+    return _LICENSE_IDENTIFIER in event.identifier.lower() or (
+        event.message.startswith((_LICENSE_CHECKOUT_FAILED, _LICENSE_ERROR))
+    )
+
+
+_JOB_EVENTS: Dict[str, Callable[[int, str], NamedTuple]] = {
+    "Started": JobStartedEvent,
+    "Finished": JobFinishedEvent,
+    "Failed": JobFailedEvent,
+}
+
+# Parser states
+_NORMAL = "normal"
+_FAILED_STATE = "failed"
+_MESSAGE = "message"
+_STACK_STATE = "stack"
+
+
+class LogParser:
+    """Single-pass state machine over MATLAB® log lines.
+
+    Feed lines with :meth:`feed` and call :meth:`close` at the end of the
+    log to flush an error report that is still being collected.
+    """
+
+    def __init__(self):
+        self.line_number = 0
+        self._state = _NORMAL
+        self._error_start = 0
+        self._message: List[str] = list()
+        self._identifier = ""
+        self._stack: List[Tuple[int, str]] = list()
+
+    def feed(self, line: str) -> List[NamedTuple]:
+        """Parse one line and return the events it completes."""
+        self.line_number += 1
+        stripped = line.strip()
+        events: List[NamedTuple] = list()
+        if self._state == _MESSAGE:
+            if not stripped:
+                self._state = _STACK_STATE
+                return events
+            match = _IDENTIFIER.match(stripped)
+            if match is None:
+                self._message.append(stripped)
+                return events
+            self._message.append(match.group(1))
+            self._identifier = match.group(2)
+            self._state = _STACK_STATE
+            return events
+        if self._state == _STACK_STATE:
+            if not stripped:
+                return events
+            match = _STACK.match(stripped)
+            if match is not None:
+                self._stack.append((int(match.group(1)), match.group(2)))
+                return events
+            events.append(self._error_event())
+        match = None
+        if self._state == _FAILED_STATE:
+            match = _ERROR.match(stripped)
+        if match is not None:
+            self._error_start = self.line_number
+            self._message = [match.group(1)]
+            self._identifier = match.group(2) or ""
+            self._stack = list()
+            if match.group(2) is None:
+                self._state = _MESSAGE
+            else:
+                self._state = _STACK_STATE
+            return events
+        if stripped == _STARTED:
+            events.append(StartedEvent(self.line_number))
+        elif stripped == _FINISHED:
+            events.append(FinishedEvent(self.line_number))
+        elif stripped == _FAILED:
+            events.append(FailedEvent(self.line_number))
+            self._state = _FAILED_STATE
+        elif stripped.startswith(_LICENSE_ERROR):
+            # Reported by a failed start as well as after "Failed" when a
+            # script could not check out a toolbox license.
+            events.append(LicenseErrorEvent(self.line_number, stripped))
+        elif stripped.startswith("########## Job "):
+            match = _JOB.match(stripped)
+            if match is not None:
+                job_event = _JOB_EVENTS[match.group(2)]
+                events.append(job_event(self.line_number, match.group(1)))
+                if job_event is JobFailedEvent:
+                    self._state = _FAILED_STATE
+        return events
+
+    def close(self) -> List[NamedTuple]:
+        """Flush a pending error report at the end of the log."""
+        if self._state in (_MESSAGE, _STACK_STATE):
+            return [self._error_event()]
+        return list()
+
+    def _error_event(self) -> ErrorEvent:
+        event = ErrorEvent(
+            self._error_start,
+            "\n".join(self._message),
+            self._identifier,
+            tuple(self._stack),
+        )
+        self._state = _NORMAL
+        return event
+
+
+class LogScanner:
+    """Follow a log with a :class:`LogTailer` and parse new lines.
+
+    Keeps the state of the run as flags, so every line is only read and
+    parsed once. ``on_line`` is called with each line as it is read.
+    """
+
+    def __init__(
+        self,
+        tailer: LogTailer,
+        on_line: Optional[Callable[[str], None]] = None,
+    ):
+        self.tailer = tailer
+        self.on_line = on_line
+        self.parser = LogParser()
+        self.events: List[NamedTuple] = list()
+        self.started = False
+        self.finished = False
+        self.failed = False
+        self.license_error: Optional[LicenseErrorEvent] = None
+        self.error: Optional[ErrorEvent] = None
+        self._closed = False
+
+    def poll(self, final: bool = False) -> List[str]:
+        """Parse newly appended lines and return them.
+
+        Reads one chunk of the log, see ``LogTailer.pending``. ``final``
+        marks the end of the log: the rest of it is read, a trailing
+        partial line is parsed and a pending error report flushed.
+        """
+        lines = list()
+        while True:
+            chunk = self.tailer.read_lines(final=final)
+            for line in chunk:
+                self._handle(self.parser.feed(line))
+                if self.on_line is not None:
+                    self.on_line(line)
+            lines.extend(chunk)
+            if not (final and self.tailer.pending):
+                break
+        if final:
+            self.close()
+        return lines
+
+    def close(self):
+        """Flush a pending error report."""
+        if not self._closed:
+            self._closed = True
+            self._handle(self.parser.close())
+
+    def exception(self, log_file: Optional[str] = None) -> MatlabError:
+        """Build the exception for a failed run."""
+        if self.error is None:
+            return MatlabError(log_file=log_file)
+        return MatlabError(
+            self.error.message,
+            self.error.identifier,
+            self.error.stack,
+            log_file=log_file,
+        )
+
+    def license_exception(
+        self, log_file: Optional[str] = None
+    ) -> LicenseError:
+        """Build the exception for a failed license checkout."""
+        line = "" if self.license_error is None else self.license_error.line
+        return LicenseError(line.strip(), log_file=log_file)
+
+    def _handle(self, events: List[NamedTuple]):
+        for event in events:
+            self.events.append(event)
+            if isinstance(event, StartedEvent):
+                self.started = True
+            elif isinstance(event, FinishedEvent):
+                self.finished = True
+            elif isinstance(event, FailedEvent):
+                self.failed = True
+            elif isinstance(event, ErrorEvent):
+                # Errors of batch jobs do not fail the run.
+                if self.failed and self.error is None:
+                    self.error = event
+                    if self.license_error is None and is_license_error(
+                        event
+                    ):
+                        self.license_error = LicenseErrorEvent(
+                            event.line_number, event.message
+                        )
+            elif isinstance(event, LicenseErrorEvent):
+                if self.license_error is None:
+                    self.license_error = event
+
+
+def parse_log(path: str, encoding: Optional[str] = None) -> Iterator:
+    """Yield the events of an archived log file.
+
+    The file is read line by line, so memory use does not grow with the
+    size of the log.
+    """
+    parser = LogParser()
+    encoding = encoding or locale.getpreferredencoding(False)
+    with open(path, encoding=encoding, errors="replace") as fid:
+        for line in fid:
+            yield from parser.feed(line.rstrip("\r\n"))
+    yield from parser.close()
@@ -0,0 +1,311 @@
+"""Run many independent MATLAB® instances concurrently."""
+import collections
+import logging
+import os
+import threading
+import time
+from concurrent import futures
+from typing import Any
+from typing import Deque
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import TYPE_CHECKING
+
+from .matlab import Matlab
+
+if TYPE_CHECKING:
+    from .licenses import LicenseScheduler
+
+logger = logging.getLogger(__name__)
+
+# Job states
+PENDING = "pending"
+RUNNING = "running"
+FINISHED = "finished"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+class MatlabJob:
+    """A single ``Matlab.run`` submitted to a :class:`MatlabPool`.
+
+    Attributes
+    ----------
+    matlab : Matlab
+        Instance the job runs on.
+    kwargs : dict
+        Keyword arguments passed to ``Matlab.run``.
+    state : str
+        One of ``pending``, ``running``, ``finished``, ``failed`` or
+        ``cancelled``.
+    returncode : int
+        MATLAB® exit code once finished.
+    error : Exception
+        Exception raised by the run, if it failed.
+    features : tuple
+        License features the job needs, see :mod:`mlshim.licenses`.
+    """
+
+    def __init__(
+        self,
+        matlab: Matlab,
+        kwargs: Dict[str, Any],
+        features: Sequence[str] = (),
+    ):
+        self.matlab = matlab
+        self.kwargs = kwargs
+        self.features = tuple(features)
+        self.state = PENDING
+        self.returncode: Optional[int] = None
+        self.error: Optional[BaseException] = None
+        self.t_start: Optional[float] = None
+        self.t_end: Optional[float] = None
+        self.future: futures.Future = futures.Future()
+
+    def __repr__(self):
+        return f"MatlabJob<{self.matlab.uuid}, {self.state}>"
+
+    @property
+    def duration(self) -> Optional[float]:
+        """Seconds the run took, None until it ended."""
+        if self.t_start is None or self.t_end is None:
+            return None
+        return self.t_end - self.t_start
+
+    def done(self) -> bool:
+        return self.future.done()
+
+    def result(self, timeout: Optional[float] = None) -> Optional[int]:
+        """Wait for the job and return its exit code, or raise its error."""
+        return self.future.result(timeout)
+
+    def cancel(self) -> bool:
+        """Cancel the job if it has not started yet."""
+        cancelled = self.future.cancel()
+        if cancelled:
+            self.state = CANCELLED
+        return cancelled
+
+    def _run(self) -> Optional[int]:
+        self.state = RUNNING
+        self.t_start = time.monotonic()
+        try:
+            self.returncode = self.matlab.run(**self.kwargs)
+        except BaseException as error:
+            self.error = error
+            self.state = FAILED
+            logger.error(f"{self.matlab} failed: {error}")
+            raise
+        else:
+            self.state = FINISHED
+            return self.returncode
+        finally:
+            self.t_end = time.monotonic()
+
+
+class MatlabPool:
+    """Bounded-concurrency executor for ``Matlab.run`` jobs.
+
+    Every job runs on its own :class:`Matlab` instance, so runs never share
+    a script, log file or preferences directory.
+
+    Parameters
+    ----------
+    max_workers : int
+        Maximum number of MATLAB® instances running at the same time.
+        Default: Number of CPUs.
+    scheduler : LicenseScheduler
+        Start a job only once the license seats of its ``features`` are
+        free. Waiting jobs do not occupy a worker, jobs whose seats are
+        free overtake them.
+    **matlab_kwargs
+        Keyword arguments for the :class:`Matlab` instances created by
+        :meth:`submit` when no instance is given.
+
+    Example::
+
+        with MatlabPool(max_workers=8, template="run_template.m") as pool:
+            jobs = [pool.submit(scripts=[script]) for script in scripts]
+            for job in pool.as_completed(jobs):
+                print(job, job.returncode, job.error)
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        scheduler: Optional["LicenseScheduler"] = None,
+        **matlab_kwargs,
+    ):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.scheduler = scheduler
+        self.matlab_kwargs = matlab_kwargs
+        self.jobs: List[MatlabJob] = list()
+        self._lock = threading.RLock()
+        # Jobs not handed to the executor yet, in submission order.
+        self._waiting: Deque[MatlabJob] = collections.deque()
+        self._active = 0
+        self._closing = False
+        self._executor = futures.ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="mlshim"
+        )
+        if scheduler is not None:
+            # Seats freed outside the pool start waiting jobs as well.
+            scheduler.add_listener(self._on_release)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+    def __repr__(self):
+        return f"MatlabPool<{self.max_workers}, {len(self.jobs)} jobs>"
+
+    def submit(
+        self,
+        matlab: Optional[Matlab] = None,
+        features: Sequence[str] = (),
+        **kwargs,
+    ) -> MatlabJob:
+        """Schedule ``matlab.run(**kwargs)`` and return its job.
+
+        If ``matlab`` is not given a new instance is created from the
+        pool's ``matlab_kwargs``. ``features`` are the license features
+        the job needs, only used with a ``scheduler``.
+        """
+        if matlab is None:
+            matlab = Matlab(**self.matlab_kwargs)
+        if self.scheduler is not None:
+            self.scheduler.check(features)
+        job = MatlabJob(matlab, kwargs, features)
+        with self._lock:
+            if self._closing:
+                raise RuntimeError("cannot submit after shutdown")
+            self.jobs.append(job)
+            self._waiting.append(job)
+            self._dispatch()
+        return job
+
+    def _dispatch(self):
+        """Hand waiting jobs to the executor while workers and seats are
+        free. Called with the lock held."""
+        for job in list(self._waiting):
+            if job.future.cancelled():
+                self._waiting.remove(job)
+                # Wakes up futures.wait() and as_completed().
+                job.future.set_running_or_notify_cancel()
+                continue
+            if self._active >= self.max_workers:
+                continue
+            if self.scheduler is not None and not (
+                self.scheduler.try_acquire(job.features)
+            ):
+                continue
+            self._waiting.remove(job)
+            self._active += 1
+            self._executor.submit(self._execute, job)
+
+    def _execute(self, job: MatlabJob):
+        try:
+            if job.future.set_running_or_notify_cancel():
+                try:
+                    job.future.set_result(job._run())
+                except BaseException as error:
+                    job.future.set_exception(error)
+        finally:
+            with self._lock:
+                self._active -= 1
+            # Not under the lock: the release calls the listeners of every
+            # pool sharing the scheduler, which take their own locks.
+            if self.scheduler is not None:
+                self.scheduler.release(job.features)
+            self._on_release()
+
+    def _on_release(self):
+        """Start waiting jobs after a worker or seats were freed."""
+        with self._lock:
+            self._dispatch()
+            if self._closing:
+                self._close()
+
+    def _close(self):
+        """Shut the executor down once no job waits for it. Called with the
+        lock held."""
+        if self._waiting:
+            return
+        if self.scheduler is not None:
+            self.scheduler.remove_listener(self._on_release)
+        self._executor.shutdown(wait=False)
+
+    def map(
+        self, kwargs_iterable: Iterable[Dict[str, Any]], timeout=None
+    ) -> Iterator[Optional[int]]:
+        """Run one job per keyword dictionary, yield exit codes in order.
+
+        Like ``Executor.map`` the first failed job raises its error.
+        """
+        jobs = [self.submit(**kwargs) for kwargs in kwargs_iterable]
+        for job in jobs:
+            yield job.result(timeout)
+
+    def as_completed(
+        self, jobs: Optional[Iterable[MatlabJob]] = None, timeout=None
+    ) -> Iterator[MatlabJob]:
+        """Yield jobs as they finish or fail.
+
+        Default: All jobs submitted so far.
+        """
+        if jobs is None:
+            with self._lock:
+                jobs = list(self.jobs)
+        by_future = {job.future: job for job in jobs}
+        for future in futures.as_completed(by_future, timeout=timeout):
+            yield by_future[future]
+
+    def wait(self, timeout=None) -> List[MatlabJob]:
+        """Wait for all submitted jobs and return them."""
+        with self._lock:
+            jobs = list(self.jobs)
+        futures.wait([job.future for job in jobs], timeout=timeout)
+        return jobs
+
+    @property
+    def states(self) -> Dict[str, int]:
+        """Number of jobs in each state."""
+        counts: Dict[str, int] = dict()
+        with self._lock:
+            for job in self.jobs:
+                counts[job.state] = counts.get(job.state, 0) + 1
+        return counts
+
+    def forget(self, job: MatlabJob):
+        """Drop a finished job from :attr:`jobs`."""
+        if not job.done():
+            raise ValueError(f"{job} is not done")
+        with self._lock:
+            if job in self.jobs:
+                self.jobs.remove(job)
+
+    def shutdown(self, wait: bool = True, cancel: bool = False):
+        """Stop accepting jobs, optionally cancelling pending ones.
+
+        Jobs waiting for license seats stay queued until their seats are
+        free, unless ``cancel`` is set.
+        """
+        with self._lock:
+            if cancel:
+                for job in self.jobs:
+                    if job.state == PENDING:
+                        job.cancel()
+                self._dispatch()
+            self._closing = True
+            # Jobs still waiting for seats are not in the executor yet, it
+            # is shut down once the last of them was handed over.
+            self._close()
+        if wait:
+            self.wait()
+            self._executor.shutdown(wait=True)
@@ -0,0 +1,164 @@
+"""Golden MATLAB® preference directories.
+
+MATLAB® fills an empty preferences directory (preferences, toolbox cache,
+...) on every start. A golden preferences directory is built once per
+install by a clean MATLAB® run (``prefdir_template.m``) and then cloned
+into the ``prefdir_<uuid>`` of each run, so runs start from a populated
+directory while staying isolated from each other and from the user's own
+preferences.
+
+Golden directories live below the user's home directory and are keyed on
+the MATLAB® executable and its modification time, so an update of the
+install builds a fresh one.
+"""
+import glob
+import hashlib
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import threading
+from typing import Dict
+from typing import Optional
+
+from .consts import _GOLDEN_PREFDIR_DIR
+from .utils import find_executable
+
+logger = logging.getLogger(__name__)
+
+# <linux/fs.h>
+_FICLONE = 0x40049409
+
+_locks: Dict[str, threading.Lock] = dict()
+_locks_lock = threading.Lock()
+
+
+def default_base() -> str:
+    """Directory holding the golden preference directories."""
+    return _GOLDEN_PREFDIR_DIR or os.path.join(
+        os.path.expanduser("~"), ".mlshim", "prefdir"
+    )
+
+
+def _prefix(root: str, version: str, base: Optional[str] = None) -> str:
+    matlabroot = os.path.abspath(os.path.join(root, version))
+    digest = hashlib.sha1(os.fsencode(matlabroot)).hexdigest()[:12]
+    return os.path.join(base or default_base(), f"{version}_{digest}")
+
+
+def golden_path(root: str, version: str, base: Optional[str] = None) -> str:
+    """Location of the golden preferences directory of an install.
+
+    Changes with the path and modification time of the executable.
+    """
+    matlabroot = os.path.abspath(os.path.join(root, version))
+    exe = find_executable(matlabroot) or ""
+    mtime = os.stat(exe).st_mtime_ns if exe else 0
+    key = hashlib.sha1(os.fsencode(f"{exe}:{mtime}")).hexdigest()[:12]
+    return f"{_prefix(root, version, base)}_{key}"
+
+
+def _reflink(src: str, dst: str) -> bool:
+    """Copy-on-write clone of ``src``, True if the file system supports it."""
+    if not sys.platform.startswith("linux"):
+        return False
+    import fcntl
+
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        try:
+            fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+        except OSError:
+            return False
+    shutil.copystat(src, dst)
+    return True
+
+
+def clone_file(src: str, dst: str, hardlink: bool = False):
+    """Clone one file as cheaply as the file system allows.
+
+    Tries a hard link if ``hardlink`` is set, then a copy-on-write clone,
+    then falls back to a regular copy. Hard links share the file with the
+    source, only use them when nothing writes to the clone in place.
+    """
+    if hardlink:
+        try:
+            os.link(src, dst)
+            return
+        except OSError:
+            pass
+    if not _reflink(src, dst):
+        shutil.copy2(src, dst)
+
+
+def clone_tree(src: str, dst: str, hardlink: bool = False):
+    """Clone the directory ``src`` to the new directory ``dst``."""
+    os.makedirs(dst)
+    with os.scandir(src) as entries:
+        for entry in entries:
+            target = os.path.join(dst, entry.name)
+            if entry.is_dir(follow_symlinks=False):
+                clone_tree(entry.path, target, hardlink=hardlink)
+            elif entry.is_symlink():
+                os.symlink(os.readlink(entry.path), target)
+            else:
+                clone_file(entry.path, target, hardlink=hardlink)
+
+
+def build_golden(root: str, version: str, base: Optional[str] = None) -> str:
+    """Build the golden preferences directory with a clean MATLAB® run.
+
+    The directory is built under a temporary name and renamed into place,
+    so other processes never see a partial one. Returns its path.
+    """
+    from .matlab import Matlab
+
+    path = golden_path(root, version, base)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    work_dir = tempfile.mkdtemp(
+        prefix="mlshim_golden_", dir=os.path.dirname(path)
+    )
+    try:
+        matlab = Matlab(
+            root=root,
+            version=version,
+            working_directory=work_dir,
+            template="prefdir_template.m",
+        )
+        matlab.pref_dir = os.path.join(work_dir, "prefdir")
+        os.makedirs(matlab.pref_dir)
+        logger.info(f"Building golden preferences directory: {path}")
+        matlab.run()
+        try:
+            os.rename(matlab.pref_dir, path)
+        except OSError:
+            # Built concurrently by another process.
+            if not os.path.isdir(path):
+                raise
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    # Directories of earlier builds of the install are stale.
+    prefix = glob.escape(_prefix(root, version, base))
+    for stale in glob.glob(f"{prefix}_*"):
+        if stale != path:
+            shutil.rmtree(stale, ignore_errors=True)
+    return path
+
+
+def get_golden(root: str, version: str, base: Optional[str] = None) -> str:
+    """Return the golden preferences directory, building it if missing."""
+    path = golden_path(root, version, base)
+    if os.path.isdir(path):
+        return path
+    with _locks_lock:
+        lock = _locks.setdefault(path, threading.Lock())
+    # One build per directory, other threads wait for it.
+    with lock:
+        if not os.path.isdir(path):
+            build_golden(root, version, base)
+    return path
+
+
+def remove_golden(root: str, version: str, base: Optional[str] = None):
+    """Delete the golden preferences directory, it is rebuilt on next use."""
+    shutil.rmtree(golden_path(root, version, base), ignore_errors=True)
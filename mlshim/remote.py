@@ -0,0 +1,172 @@
+"""Client for :mod:`mlshim.agent`, running MATLAB® on another host."""
+import io
+import json
+import logging
+import os
+import time
+import zipfile
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Optional
+from urllib.error import HTTPError
+from urllib.request import Request
+from urllib.request import urlopen
+
+from .exceptions import LicenseError
+from .exceptions import MatlabError
+
+logger = logging.getLogger(__name__)
+
+_LOG_WAIT = 10  # seconds
+
+
+def error_from_dict(data: Dict[str, Any]) -> BaseException:
+    """Rebuild the exception of a remote run from its JSON form."""
+    if data.get("type") == "MatlabError":
+        return MatlabError(
+            data.get("message", ""),
+            data.get("identifier", ""),
+            [tuple(frame) for frame in data.get("stack", [])],
+        )
+    if data.get("type") == "LicenseError":
+        return LicenseError(data.get("line", ""))
+    if data.get("type") == "TimeoutError":
+        return TimeoutError(data.get("text", ""))
+    return RuntimeError(data.get("text", ""))
+
+
+class RemoteMatlab:
+    """Run MATLAB® through an ``mlshim agent`` with the :class:`Matlab` API.
+
+    Parameters
+    ----------
+    url : str
+        Base URL of the agent, e.g. ``http://build-host:8765``.
+    template : str
+        Template on the agent to render. Default: ``run_template.m``
+    version : str
+        MATLAB® version on the agent. Default: Its latest.
+    timeout : int
+        Seconds MATLAB® may run on the agent.
+    token : str
+        Shared secret of the agent. Default: ``MLSHIM_AGENT_TOKEN``.
+
+    Example::
+
+        matlab = RemoteMatlab("http://build-host:8765")
+        matlab.run(scripts=["disp('Hello World');"], on_line=print)
+        matlab.fetch_artifacts("artifacts")
+    """
+
+    def __init__(
+        self,
+        url: str,
+        *args,
+        template: Optional[str] = None,
+        version: Optional[str] = None,
+        timeout: Optional[int] = None,
+        token: Optional[str] = None,
+    ):
+        assert len(args) == 0
+        self.url = url.rstrip("/")
+        self.template = template
+        self.version = version
+        self.timeout = timeout
+        self.token = token or os.environ.get("MLSHIM_AGENT_TOKEN") or None
+        self.job_id: Optional[str] = None
+        self.returncode: Optional[int] = None
+        self.status: Dict[str, Any] = dict()
+
+    def __repr__(self):
+        return f"RemoteMatlab<{self.url}, {self.version}, {self.job_id}>"
+
+    def _request(
+        self, path: str, data: Optional[Dict[str, Any]] = None, timeout=None
+    ) -> bytes:
+        headers = {"Content-Type": "application/json"}
+        if self.token is not None:
+            headers["X-Mlshim-Token"] = self.token
+        body = None if data is None else json.dumps(data).encode()
+        request = Request(f"{self.url}{path}", data=body, headers=headers)
+        try:
+            with urlopen(request, timeout=timeout) as response:
+                return response.read()
+        except HTTPError as error:
+            try:
+                detail = json.loads(error.read()).get("error")
+            except ValueError:
+                detail = None
+            if isinstance(detail, dict):
+                raise error_from_dict(detail) from error
+            raise RuntimeError(f"mlshim agent: {error} {detail or ''}")
+
+    def _json(self, path: str, data=None, timeout=None) -> Dict[str, Any]:
+        return json.loads(self._request(path, data, timeout))
+
+    def submit(self, *args, **kwargs) -> str:
+        """Queue a run on the agent and return its job id.
+
+        All keyword arguments are passed to the Jinja2 template on the
+        agent and must be JSON serialisable.
+        """
+        assert len(args) == 0
+        request = {
+            "template": self.template,
+            "version": self.version,
+            "timeout": self.timeout,
+            "kwargs": kwargs,
+        }
+        self.returncode = None
+        self.job_id = self._json("/jobs", request)["job_id"]
+        logger.info(f"Submitted {self}")
+        return self.job_id
+
+    def follow(self, on_line: Optional[Callable[[str], None]] = None):
+        """Wait for the submitted job, passing its log lines to ``on_line``."""
+        offset = 0
+        while True:
+            data = self._json(
+                f"/jobs/{self.job_id}/log?offset={offset}&wait={_LOG_WAIT}",
+                timeout=_LOG_WAIT + 30,
+            )
+            if on_line is not None:
+                for line in data["lines"]:
+                    on_line(line)
+            offset = data["offset"]
+            if data["done"]:
+                return
+
+    def result(self) -> Optional[int]:
+        """Exit code of the finished job, raises the job's error."""
+        self.status = self._json(f"/jobs/{self.job_id}")
+        self.returncode = self.status.get("returncode")
+        if "error" in self.status:
+            raise error_from_dict(self.status["error"])
+        return self.returncode
+
+    def run(
+        self, *args, on_line: Optional[Callable[[str], None]] = None, **kwargs
+    ) -> Optional[int]:
+        """Execute MATLAB® on the agent, same behaviour as ``Matlab.run``.
+
+        ``on_line`` gets the log lines as the agent reports them. All
+        other keyword arguments are passed to the Jinja2 template.
+
+        Returns the MATLAB® exit code.
+        """
+        assert len(args) == 0
+        t_start = time.time()
+        self.submit(**kwargs)
+        self.follow(on_line)
+        try:
+            return self.result()
+        finally:
+            logger.info(f"{self} took {time.time() - t_start:.2f}s")
+
+    def fetch_artifacts(self, directory: str) -> str:
+        """Extract the files of the last run into ``directory``."""
+        data = self._request(f"/jobs/{self.job_id}/artifacts")
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            archive.extractall(directory)
+        return directory
@@ -0,0 +1,283 @@
+"""Retention policies for the artifacts runs leave behind.
+
+Every run writes ``mlshim_<uuid>.m``, ``mlshim_<uuid>.log``,
+``mlshim_<uuid>.pid`` and ``prefdir_<uuid>`` (workers also
+``spool_<uuid>``) into its working directory. :func:`collect_garbage`
+groups them per run and removes the runs a :class:`RetentionPolicy` does
+not keep. Runs that are still live are never touched: runs of this
+process between start and end of ``Matlab.run``, and runs whose MATLAB®
+process from the pid file is still alive.
+"""
+import contextlib
+import logging
+import os
+import re
+import shutil
+import sys
+import threading
+import time
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+_ARTIFACT = re.compile(
+    r"^(?:mlshim_([0-9a-f]{32})\.(?:m|log|pid)"
+    r"|(?:prefdir|spool)_([0-9a-f]{32}))$"
+)
+_AGE_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+_SIZE_UNITS = {"": 1, "k": 1 << 10, "m": 1 << 20, "g": 1 << 30, "t": 1 << 40}
+
+# Runs of this process that have started but not ended yet.
+_claimed: Dict[str, int] = dict()
+_claimed_lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def claim(run_id: str) -> Iterator[None]:
+    """Protect the artifacts of ``run_id`` while the block runs."""
+    with _claimed_lock:
+        _claimed[run_id] = _claimed.get(run_id, 0) + 1
+    try:
+        yield
+    finally:
+        with _claimed_lock:
+            _claimed[run_id] -= 1
+            if not _claimed[run_id]:
+                del _claimed[run_id]
+
+
+def pid_alive(pid: int) -> bool:
+    """True if a process with this id is running."""
+    if pid <= 0:
+        return False
+    if sys.platform == "win32":
+        import ctypes
+
+        kernel32 = ctypes.windll.kernel32
+        # PROCESS_QUERY_LIMITED_INFORMATION
+        handle = kernel32.OpenProcess(0x1000, False, pid)
+        if not handle:
+            # ERROR_ACCESS_DENIED: exists, but belongs to someone else.
+            return kernel32.GetLastError() == 5
+        try:
+            code = ctypes.c_ulong()
+            kernel32.GetExitCodeProcess(handle, ctypes.byref(code))
+            # STILL_ACTIVE
+            return code.value == 259
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def parse_age(text: str) -> float:
+    """Seconds in ``text`` such as ``3600``, ``90m``, ``12h`` or ``7d``."""
+    text = text.strip().lower()
+    unit = text[-1:] if text[-1:] in _AGE_UNITS else "s"
+    number = text[:-1] if text[-1:] in _AGE_UNITS else text
+    return float(number) * _AGE_UNITS[unit]
+
+
+def parse_size(text: str) -> int:
+    """Bytes in ``text`` such as ``1024``, ``500M`` or ``10G``."""
+    text = text.strip().lower().rstrip("b")
+    unit = text[-1:] if text[-1:] in _SIZE_UNITS else ""
+    number = text[:-1] if unit else text
+    return int(float(number) * _SIZE_UNITS[unit])
+
+
+def _tree_size(path: str) -> int:
+    size = 0
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                size += _tree_size(entry.path)
+            else:
+                size += entry.stat(follow_symlinks=False).st_size
+    return size
+
+
+class RunArtifacts:
+    """Files and directories left by one run.
+
+    Attributes
+    ----------
+    run_id : str
+        The ``Matlab._uuid`` of the run.
+    paths : list
+        Artifact paths of the run.
+    mtime : float
+        Newest modification time of the artifacts.
+    """
+
+    def __init__(self, run_id: str):
+        self.run_id = run_id
+        self.paths: List[str] = list()
+        self.mtime = 0.0
+        self._size: Optional[int] = None
+
+    def __repr__(self):
+        return f"RunArtifacts<{self.run_id}, {len(self.paths)} paths>"
+
+    @property
+    def pid_file(self) -> Optional[str]:
+        for path in self.paths:
+            if path.endswith(".pid"):
+                return path
+        return None
+
+    @property
+    def size(self) -> int:
+        """Bytes used by the artifacts, computed on first use."""
+        if self._size is None:
+            size = 0
+            for path in self.paths:
+                try:
+                    if os.path.isdir(path):
+                        size += _tree_size(path)
+                    else:
+                        size += os.stat(path).st_size
+                except FileNotFoundError:
+                    pass
+            self._size = size
+        return self._size
+
+    @property
+    def live(self) -> bool:
+        """True if the run may still be using its artifacts."""
+        with _claimed_lock:
+            if self.run_id in _claimed:
+                return True
+        if self.pid_file is None:
+            return False
+        try:
+            with open(self.pid_file) as fid:
+                pids = [int(pid) for pid in fid.read().split()]
+        except (OSError, ValueError):
+            # Being written right now.
+            return True
+        if not pids:
+            return True
+        return any(pid_alive(pid) for pid in pids)
+
+    def remove(self):
+        """Delete all artifacts of the run."""
+        for path in self.paths:
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+
+
+def scan(directory: str) -> List[RunArtifacts]:
+    """Group the run artifacts in ``directory``, newest run first."""
+    runs: Dict[str, RunArtifacts] = dict()
+    try:
+        entries = os.scandir(directory)
+    except FileNotFoundError:
+        return list()
+    with entries:
+        for entry in entries:
+            match = _ARTIFACT.match(entry.name)
+            if match is None:
+                continue
+            run_id = match.group(1) or match.group(2)
+            run = runs.get(run_id)
+            if run is None:
+                run = runs[run_id] = RunArtifacts(run_id)
+            run.paths.append(entry.path)
+            try:
+                run.mtime = max(run.mtime, entry.stat().st_mtime)
+            except FileNotFoundError:
+                pass
+    return sorted(runs.values(), key=lambda run: run.mtime, reverse=True)
+
+
+class RetentionPolicy:
+    """Which finished runs to keep.
+
+    A run is kept only if it satisfies every limit that is set. Runs are
+    considered newest first, so the count and size limits keep the most
+    recent runs.
+
+    Parameters
+    ----------
+    max_age : float
+        Seconds since the run's last modification.
+    max_count : int
+        Number of runs.
+    max_bytes : int
+        Total size of the kept runs.
+    """
+
+    def __init__(
+        self,
+        max_age: Optional[float] = None,
+        max_count: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+    ):
+        self.max_age = max_age
+        self.max_count = max_count
+        self.max_bytes = max_bytes
+
+    def __repr__(self):
+        return (
+            f"RetentionPolicy<max_age={self.max_age}, "
+            f"max_count={self.max_count}, max_bytes={self.max_bytes}>"
+        )
+
+    def select(
+        self, runs: List[RunArtifacts], now: Optional[float] = None
+    ) -> List[RunArtifacts]:
+        """Return the runs to remove from ``runs``, sorted newest first."""
+        now = time.time() if now is None else now
+        expired = list()
+        count = 0
+        size = 0
+        for run in runs:
+            # Live runs are never removed but use up the limits.
+            live = run.live
+            keep = self.max_age is None or now - run.mtime <= self.max_age
+            keep = keep and (self.max_count is None or count < self.max_count)
+            if keep and self.max_bytes is not None:
+                keep = size + run.size <= self.max_bytes
+            if keep or live:
+                count += 1
+                if self.max_bytes is not None:
+                    size += run.size
+            else:
+                expired.append(run)
+        return expired
+
+
+def collect_garbage(
+    directory: str, policy: RetentionPolicy, dry_run: bool = False
+) -> List[RunArtifacts]:
+    """Remove the runs in ``directory`` that ``policy`` does not keep.
+
+    Returns the removed runs, or the runs that would be removed if
+    ``dry_run`` is set.
+    """
+    expired = policy.select(scan(directory))
+    if dry_run:
+        return expired
+    removed = list()
+    for run in expired:
+        # A run may have been restarted since the scan.
+        if run.live:
+            continue
+        logger.debug(f"Removing {run}")
+        run.remove()
+        removed.append(run)
+    return removed
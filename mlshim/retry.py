@@ -0,0 +1,190 @@
+"""Retry MATLAB® runs that failed to check out a license.
+
+Under license contention MATLAB® exits with "Error checking out license"
+before running anything, or a script fails to check out a toolbox license,
+and a later attempt usually succeeds. A
+:class:`RetryPolicy` reruns such attempts after an exponentially growing,
+jittered delay, so many blocked runs do not all come back at the same
+moment. Script errors are not retried. Every attempt is recorded as an
+:class:`Attempt`.
+"""
+import logging
+import random
+import time
+from typing import Awaitable
+from typing import Callable
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import Type
+from typing import TypeVar
+
+from .consts import _RETRY_ATTEMPTS
+from .consts import _RETRY_BASE_DELAY
+from .consts import _RETRY_MAX_DELAY
+from .exceptions import LicenseError
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class Attempt:
+    """One try of a run.
+
+    Attributes
+    ----------
+    number : int
+        1 for the first attempt.
+    started : float
+        ``time.time()`` at the start of the attempt.
+    duration : float
+        Seconds the attempt took.
+    error : Exception
+        Exception the attempt raised, None if it succeeded.
+    delay : float
+        Seconds waited before the next attempt, None if there was none.
+    """
+
+    def __init__(self, number: int, started: float):
+        self.number = number
+        self.started = started
+        self.duration: Optional[float] = None
+        self.error: Optional[BaseException] = None
+        self.delay: Optional[float] = None
+
+    def __repr__(self):
+        outcome = "ok" if self.error is None else type(self.error).__name__
+        return f"Attempt<{self.number}, {outcome}>"
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class RetryPolicy:
+    """When and how long to wait before running MATLAB® again.
+
+    Parameters
+    ----------
+    max_attempts : int
+        Attempts in total, including the first one.
+    base_delay : float
+        Delay before the second attempt, doubled for every further one.
+    max_delay : float
+        Upper limit of a single delay.
+    max_wait : float
+        Upper limit of all delays of a run together. Default: No limit.
+    retry_on : tuple
+        Exception types worth another attempt.
+
+    The delay before attempt ``n + 1`` is drawn uniformly from the upper
+    half of ``min(max_delay, base_delay * 2 ** (n - 1))``.
+
+    Example::
+
+        matlab = Matlab(template="build_model_template.m",
+                        retry=RetryPolicy(max_attempts=10))
+        matlab.run(model=model)
+        print(matlab.attempts)
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = _RETRY_ATTEMPTS,
+        base_delay: float = _RETRY_BASE_DELAY,
+        max_delay: float = _RETRY_MAX_DELAY,
+        max_wait: Optional[float] = None,
+        retry_on: Tuple[Type[BaseException], ...] = (LicenseError,),
+    ):
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_wait = max_wait
+        self.retry_on = retry_on
+
+    def __repr__(self):
+        return (
+            f"RetryPolicy<{self.max_attempts}, {self.base_delay}s, "
+            f"{self.max_delay}s>"
+        )
+
+    def delay(self, number: int) -> float:
+        """Jittered delay after failed attempt ``number``."""
+        cap = min(self.max_delay, self.base_delay * 2 ** (number - 1))
+        return random.uniform(cap / 2, cap)
+
+    def _next_delay(
+        self, attempts: List[Attempt], error: BaseException
+    ) -> Optional[float]:
+        """Delay before the next attempt, None to give up."""
+        attempt = attempts[-1]
+        if not isinstance(error, self.retry_on):
+            return None
+        if attempt.number >= self.max_attempts:
+            logger.error(f"Giving up after {attempt.number} attempts")
+            return None
+        delay = self.delay(attempt.number)
+        if self.max_wait is not None:
+            waited = sum(a.delay for a in attempts if a.delay is not None)
+            delay = min(delay, self.max_wait - waited)
+            if delay < 0:
+                logger.error(f"Giving up after waiting {waited:.1f}s")
+                return None
+        attempt.delay = delay
+        logger.warning(
+            f"Attempt {attempt.number} failed: {error}. "
+            f"Retrying in {delay:.1f}s"
+        )
+        return delay
+
+    def call(
+        self, func: Callable[[], T], attempts: Optional[List[Attempt]] = None
+    ) -> T:
+        """Call ``func`` until it succeeds or the policy gives up.
+
+        Each try is appended to ``attempts``. The last error is raised.
+        """
+        attempts = [] if attempts is None else attempts
+        while True:
+            attempt = Attempt(len(attempts) + 1, time.time())
+            attempts.append(attempt)
+            try:
+                return func()
+            except Exception as error:
+                attempt.error = error
+                delay = self._next_delay(attempts, error)
+                if delay is None:
+                    raise
+            finally:
+                attempt.duration = time.time() - attempt.started
+            time.sleep(delay)
+
+    async def call_async(
+        self,
+        func: Callable[[], Awaitable[T]],
+        attempts: Optional[List[Attempt]] = None,
+    ) -> T:
+        """Coroutine counterpart of :meth:`call`."""
+        import asyncio
+
+        attempts = [] if attempts is None else attempts
+        while True:
+            attempt = Attempt(len(attempts) + 1, time.time())
+            attempts.append(attempt)
+            try:
+                return await func()
+            except Exception as error:
+                attempt.error = error
+                delay = self._next_delay(attempts, error)
+                if delay is None:
+                    raise
+            finally:
+                attempt.duration = time.time() - attempt.started
+            await asyncio.sleep(delay)
+
+
+# Single attempt, used when no policy is configured.
+NO_RETRY = RetryPolicy(max_attempts=1)
@@ -0,0 +1,199 @@
+"""Keep pre-started MATLAB® workers ready for the next job."""
+import collections
+import logging
+import threading
+import time
+from concurrent import futures
+from typing import Deque
+from typing import Optional
+
+from .consts import _SPARE_CHECK_INTERVAL
+from .consts import _SPARE_IDLE_TIMEOUT
+from .matlab import Matlab
+from .worker import MatlabWorker
+
+logger = logging.getLogger(__name__)
+
+
+class SparePool:
+    """Warm spare MATLAB® processes with demand-driven autoscaling.
+
+    Spares are :class:`MatlabWorker` instances already parked at
+    "Started": preferences directory initialised and default path
+    restored. :meth:`acquire` hands one out immediately and a replacement
+    boots in the background. Every job gets a fresh MATLAB® session, the
+    startup just happens before it is needed.
+
+    The number of spares follows demand: callers waiting in
+    :meth:`acquire` plus workers currently handed out, limited to
+    ``max_spares``. After ``idle_timeout`` seconds without demand it falls
+    back to ``min_spares``.
+
+    Parameters
+    ----------
+    max_spares : int
+        Upper limit of spares kept running.
+    min_spares : int
+        Spares kept even when idle.
+    idle_timeout : float
+        Seconds without demand before extra spares are stopped.
+    **matlab_kwargs
+        Keyword arguments for the :class:`Matlab` instance of each spare.
+    """
+
+    def __init__(
+        self,
+        max_spares: int = 2,
+        min_spares: int = 0,
+        idle_timeout: float = _SPARE_IDLE_TIMEOUT,
+        **matlab_kwargs,
+    ):
+        assert 0 <= min_spares <= max_spares
+        self.max_spares = max_spares
+        self.min_spares = min_spares
+        self.idle_timeout = idle_timeout
+        self.matlab_kwargs = matlab_kwargs
+        self._spares: Deque[MatlabWorker] = collections.deque()
+        self._booting = 0
+        self._waiting = 0
+        self._busy = 0
+        self._last_demand = time.monotonic()
+        self._closed = False
+        self._cond = threading.Condition()
+        self._executor = futures.ThreadPoolExecutor(
+            max_workers=max(max_spares, 1) * 2,
+            thread_name_prefix="mlshim-spare",
+        )
+        self._manager = threading.Thread(
+            target=self._manage, name="mlshim-spare-manager", daemon=True
+        )
+        self._manager.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __repr__(self):
+        return (
+            f"SparePool<{len(self._spares)} ready, {self._booting} booting, "
+            f"{self._busy} busy>"
+        )
+
+    @property
+    def spares(self) -> int:
+        """Number of spares ready to be handed out."""
+        return len(self._spares)
+
+    @property
+    def target(self) -> int:
+        """Number of spares the pool is currently aiming for."""
+        demand = self._waiting + self._busy
+        if demand == 0 and (
+            time.monotonic() - self._last_demand > self.idle_timeout
+        ):
+            return self.min_spares
+        return max(self.min_spares, min(self.max_spares, max(demand, 1)))
+
+    def acquire(self, timeout: Optional[float] = None) -> MatlabWorker:
+        """Take a started worker, waiting for one to boot if necessary.
+
+        The caller owns the worker until :meth:`release`.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._waiting += 1
+            self._last_demand = time.monotonic()
+            self._cond.notify_all()
+            try:
+                while True:
+                    while self._spares:
+                        worker = self._spares.popleft()
+                        # MATLAB® itself, or the launcher waiting for it.
+                        if worker.alive:
+                            self._busy += 1
+                            return worker
+                        logger.warning(f"Discarding dead spare {worker}")
+                    if self._closed:
+                        raise RuntimeError("SparePool is closed")
+                    remaining = None
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            raise TimeoutError("No spare MATLAB® available")
+                    self._cond.wait(remaining)
+            finally:
+                self._waiting -= 1
+                # Let the manager boot a replacement.
+                self._cond.notify_all()
+
+    def release(self, worker: MatlabWorker):
+        """Return a worker from :meth:`acquire`, it is stopped.
+
+        After :meth:`close` the worker is stopped before returning.
+        """
+        with self._cond:
+            self._busy -= 1
+            self._last_demand = time.monotonic()
+            self._cond.notify_all()
+            closed = self._closed
+            # The executor is only shut down after _closed is set.
+            if not closed:
+                self._executor.submit(worker.stop)
+        if closed:
+            worker.stop()
+
+    def run(self, *args, timeout: Optional[float] = None, **kwargs) -> str:
+        """Run one job on a spare and return its state.
+
+        All keyword arguments are passed to ``MatlabWorker.submit``.
+        """
+        assert len(args) == 0
+        worker = self.acquire()
+        try:
+            return worker.submit(**kwargs).wait(timeout)
+        finally:
+            self.release(worker)
+
+    def close(self):
+        """Stop the manager and all spares."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._manager.join()
+        self._executor.shutdown(wait=True)
+        while self._spares:
+            self._spares.popleft().stop()
+
+    def _boot(self):
+        try:
+            worker = Matlab(**self.matlab_kwargs).start_worker()
+        except Exception as error:
+            logger.error(f"Spare MATLAB® failed to start: {error}")
+            worker = None
+        with self._cond:
+            self._booting -= 1
+            closed = self._closed
+            if worker is not None and not closed:
+                self._spares.append(worker)
+            self._cond.notify_all()
+        if worker is not None and closed:
+            worker.stop()
+
+    def _manage(self):
+        while True:
+            surplus = list()
+            with self._cond:
+                if self._closed:
+                    return
+                target = self.target
+                for _ in range(target - len(self._spares) - self._booting):
+                    self._booting += 1
+                    self._executor.submit(self._boot)
+                while len(self._spares) > target:
+                    surplus.append(self._spares.pop())
+                self._cond.wait(_SPARE_CHECK_INTERVAL)
+            for worker in surplus:
+                logger.debug(f"Stopping idle spare {worker}")
+                worker.stop()
@@ -0,0 +1,109 @@
+"""Incremental follower for MATLAB® log files."""
+import locale
+import os
+from typing import BinaryIO
+from typing import List
+from typing import Optional
+
+from .consts import _TAIL_CHUNK_SIZE
+from .consts import _TAIL_MAX_LINE
+
+
+class LogTailer:
+    """Follow a growing log file from a remembered byte offset.
+
+    Each call to :meth:`read_lines` only reads the bytes appended since the
+    previous call, so the cost of a poll is proportional to the new output
+    rather than to the total size of the log. At most ``chunk_size`` bytes
+    are read per call, :attr:`pending` tells whether more are waiting. A
+    trailing line that has not been terminated yet is held back until the
+    rest of it arrives, or until it grows beyond ``max_line`` bytes.
+
+    Parameters
+    ----------
+    path : str
+        Log file to follow. It does not need to exist yet.
+    encoding : str
+        Encoding used to decode the log.
+        Default: The preferred encoding of the current locale.
+    chunk_size : int
+        Maximum number of bytes read per call.
+    max_line : int
+        Lines longer than this are returned in pieces of about this size.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        encoding: Optional[str] = None,
+        chunk_size: int = _TAIL_CHUNK_SIZE,
+        max_line: int = _TAIL_MAX_LINE,
+    ):
+        self.path = path
+        self.encoding = encoding or locale.getpreferredencoding(False)
+        self.chunk_size = chunk_size
+        self.max_line = max_line
+        self.offset = 0
+        # True if the last call stopped before the end of the file.
+        self.pending = False
+        # Pieces of the unterminated last line, joined once it ends.
+        self._partial: List[bytes] = list()
+        self._partial_size = 0
+        self._fid: Optional[BinaryIO] = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Close the underlying file handle."""
+        if self._fid is not None:
+            self._fid.close()
+            self._fid = None
+
+    def read_lines(self, final: bool = False) -> List[str]:
+        """Return the complete lines appended since the last call.
+
+        Line endings are removed. If ``final`` is set, a trailing partial
+        line is returned as well once the end of the file is reached, since
+        no more output is expected.
+        """
+        if self._fid is None:
+            try:
+                self._fid = open(self.path, "rb")
+            except FileNotFoundError:
+                return []
+        size = os.fstat(self._fid.fileno()).st_size
+        # The log was truncated or replaced, start over.
+        if size < self.offset:
+            self.offset = 0
+            self._partial = list()
+            self._partial_size = 0
+        self._fid.seek(self.offset)
+        data = self._fid.read(self.chunk_size)
+        self.offset += len(data)
+        self.pending = self.offset < size
+
+        chunks = data.split(b"\n")
+        rest = chunks.pop()
+        if chunks and self._partial:
+            self._partial.append(chunks[0])
+            chunks[0] = b"".join(self._partial)
+            self._partial = list()
+            self._partial_size = 0
+        if rest:
+            self._partial.append(rest)
+            self._partial_size += len(rest)
+        if self._partial_size > self.max_line or (
+            final and not self.pending and self._partial
+        ):
+            chunks.append(b"".join(self._partial))
+            self._partial = list()
+            self._partial_size = 0
+        return [
+            chunk.rstrip(b"\r").decode(self.encoding, errors="replace")
+            for chunk in chunks
+        ]
+
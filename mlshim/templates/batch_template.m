@@ -0,0 +1,29 @@
+%% Automatically Generated Batch Script
+{% for header, value in obj.headers.items() %}
+% {{ header }}: {{ value }}
+{% endfor %}
+
+fprintf('########## Started ##########\n');
+restoredefaultpath;
+{% for job in jobs %}
+
+%% {{ job.job_id }}
+cd('{{ obj.start_directory }}');
+fprintf('########## Job {{ job.job_id }} Started ##########\n');
+try
+{% for script in job.scripts %}
+    {{ script }}
+{% endfor %}
+    fprintf('########## Job {{ job.job_id }} Finished ##########\n');
+catch me
+    fprintf('########## Job {{ job.job_id }} Failed ##########\n');
+    fprintf('ERROR: %s (%s)\n\n',me.message, me.identifier)
+    for i = numel(me.stack):-1:1
+        fprintf('[Line %02d]: %s\n',me.stack(i).line,me.stack(i).file)
+    end
+end
+% Nothing from one job leaks into the next.
+clearvars
+{% endfor %}
+fprintf('########## Finished ##########\n');
+exit(0);
@@ -0,0 +1,23 @@
+%% Automatically Generated Benchmark Script
+{% for header, value in obj.headers.items() %}
+% {{ header }}: {{ value }}
+{% endfor %}
+
+failed=0;
+try
+    fprintf('########## Started ##########\n');
+    cd('{{ obj.start_directory }}');
+    mlshim_times = bench({{ count }});
+    close all force;
+    % One line per repetition: LU, FFT, ODE, Sparse, 2-D, 3-D seconds.
+    fprintf('{{ marker }} %.6f %.6f %.6f %.6f %.6f %.6f\n', mlshim_times');
+catch me
+    fprintf('########## Failed ##########\n');
+    fprintf('ERROR: %s (%s)\n\n',me.message, me.identifier)
+    for i = numel(me.stack):-1:1
+        fprintf('[Line %02d]: %s\n',me.stack(i).line,me.stack(i).file)
+    end
+    failed=1
+end
+fprintf('########## Finished ##########\n');
+exit(failed);
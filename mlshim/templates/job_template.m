@@ -0,0 +1,9 @@
+%% Automatically Generated Job Script
+{% for header, value in obj.headers.items() %}
+% {{ header }}: {{ value }}
+{% endfor %}
+
+cd('{{ obj.start_directory }}');
+{% for script in scripts %}
+{{ script }}
+{% endfor %}
@@ -0,0 +1,51 @@
+%% Automatically Generated Worker Script
+{% for header, value in obj.headers.items() %}
+% {{ header }}: {{ value }}
+{% endfor %}
+
+spool_dir = '{{ spool_dir }}';
+fprintf('########## Started ##########\n');
+restoredefaultpath;
+cd('{{ obj.start_directory }}');
+if ~exist(fullfile(spool_dir, 'running'), 'dir')
+    mkdir(fullfile(spool_dir, 'running'));
+end
+while ~exist(fullfile(spool_dir, 'stop'), 'file')
+    jobs = dir(fullfile(spool_dir, 'job_*.m'));
+    if isempty(jobs)
+        pause({{ poll_interval }});
+        continue;
+    end
+    job_names = sort({jobs.name});
+    [~, job_id] = fileparts(job_names{1});
+    job_file = fullfile(spool_dir, 'running', job_names{1});
+    movefile(fullfile(spool_dir, job_names{1}), job_file);
+    % Survives a clear in the job script.
+    setappdata(0, 'mlshim_job', job_id);
+    fprintf('########## Job %s Started ##########\n', job_id);
+    try
+        run(job_file);
+        job_id = getappdata(0, 'mlshim_job');
+        job_status = sprintf('finished\n');
+        fprintf('########## Job %s Finished ##########\n', job_id);
+    catch me
+        job_id = getappdata(0, 'mlshim_job');
+        fprintf('########## Job %s Failed ##########\n', job_id);
+        fprintf('ERROR: %s (%s)\n\n',me.message, me.identifier)
+        for i = numel(me.stack):-1:1
+            fprintf('[Line %02d]: %s\n',me.stack(i).line,me.stack(i).file)
+        end
+        job_status = sprintf('failed\n%s (%s)\n', me.message, me.identifier);
+    end
+    % Nothing from one job leaks into the next.
+    clearvars -except job_id job_status
+    spool_dir = '{{ spool_dir }}';
+    status_file = fullfile(spool_dir, [job_id '.status']);
+    fid = fopen([status_file '.tmp'], 'w');
+    fprintf(fid, '%s', job_status);
+    fclose(fid);
+    movefile([status_file '.tmp'], status_file);
+    cd('{{ obj.start_directory }}');
+end
+fprintf('########## Finished ##########\n');
+exit(0);
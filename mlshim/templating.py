@@ -0,0 +1,61 @@
+"""Process-wide Jinja2 environments for the MATLAB® script templates."""
+import os
+import threading
+from typing import Dict
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+from jinja2 import Environment
+from jinja2 import FileSystemBytecodeCache
+from jinja2 import FileSystemLoader
+
+from .consts import _CACHE_DIR
+from .consts import _HERE
+from .consts import _TEMPLATE_AUTO_RELOAD
+
+_environments: Dict[Tuple[Tuple[str, ...], bool], Environment] = dict()
+_lock = threading.Lock()
+
+
+def default_search_path() -> Tuple[str, ...]:
+    """Bundled templates first, then the current directory."""
+    return (os.path.join(_HERE, "templates"), os.path.abspath(os.curdir))
+
+
+def get_environment(
+    search_path: Optional[Sequence[str]] = None,
+    auto_reload: bool = _TEMPLATE_AUTO_RELOAD,
+) -> Environment:
+    """Return the shared Jinja2 environment for a template search path.
+
+    One environment exists per search path for the life of the process, so
+    a template is only loaded and compiled once no matter how many
+    :class:`Matlab` instances render it. Compiled templates are also kept
+    on disk in a ``FileSystemBytecodeCache`` (``MLSHIM_CACHE_DIR``, or
+    Jinja2's per-user temporary directory), which saves the compile step
+    in new processes.
+
+    Loaded templates are not checked for changes on disk unless
+    ``auto_reload`` is set (``MLSHIM_TEMPLATE_AUTO_RELOAD``), so renders
+    do not stat the template files.
+    """
+    if search_path is None:
+        search_path = default_search_path()
+    paths = tuple(os.path.abspath(path) for path in search_path)
+    key = (paths, auto_reload)
+    env = _environments.get(key)
+    if env is None:
+        with _lock:
+            env = _environments.get(key)
+            if env is None:
+                if _CACHE_DIR is not None:
+                    os.makedirs(_CACHE_DIR, exist_ok=True)
+                env = Environment(
+                    loader=FileSystemLoader(list(paths)),
+                    trim_blocks=True,
+                    auto_reload=auto_reload,
+                    bytecode_cache=FileSystemBytecodeCache(_CACHE_DIR),
+                )
+                _environments[key] = env
+    return env
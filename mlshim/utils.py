@@ -1,99 +1,266 @@
-import ctypes
-import glob
-import os
-from ctypes import wintypes
-
-_GetShortPathNameW = ctypes.windll.kernel32.GetShortPathNameW
-_GetShortPathNameW.argtypes = [
-    wintypes.LPCWSTR,
-    wintypes.LPWSTR,
-    wintypes.DWORD,
-]
-_GetShortPathNameW.restype = wintypes.DWORD
-
-from mlshim.consts import _APPDATA
-from mlshim.consts import _HERE
-
-from functools import wraps
-
-
-def clean_log(log_path):
-    pass
-
-
-def abs_short_path(f):
-    """ Wrapper to return absolute short path for Windows.
-
-    Returns a short Windows path if the path exists.
-    Returns absolute path otherwise.
-    """
-
-    @wraps(f)
-    def wrapper(*args, **kwargs):
-        # Get a path from the function
-        path = f(*args, **kwargs)
-        # Get the absolute path.
-        path = os.path.abspath(path)
-        # If the path exists (short path dosen't exist otherwise)
-        if os.path.exists(path):
-            path = short_path(path)
-        # Return Windowfied path.
-        return path
-
-    return wrapper
-
-
-def short_path(long_name):
-    """
-    Gets the short path name of a given long path.
-    http://stackoverflow.com/a/23598461/200291
-    """
-    output_buf_size = 0
-    while True:
-        output_buf = ctypes.create_unicode_buffer(output_buf_size)
-        needed = _GetShortPathNameW(long_name, output_buf, output_buf_size)
-        if output_buf_size >= needed:
-            return output_buf.value
-        else:
-            output_buf_size = needed
-
-
-def get_licenses(matlab_version=None, root=None):
-    """Return all licenses for the current user."""
-    if root is None:
-        if _APPDATA is None:
-            return None
-        if matlab_version is None:
-            matlab_version = get_versions()[-1]
-        root = os.path.join(
-            _APPDATA, "MathWorks", "MATLAB", f"{matlab_version}_licenses"
-        )
-    license_files = glob.glob(os.path.join(root, "*.lic"))
-    return license_files
-
-
-def get_templates():
-    """Return all templates in the templates directory."""
-    import glob
-
-    templates = glob.glob(os.path.join(_HERE, "templates", "*.m"))
-    templates = [os.path.basename(path) for path in templates]
-    return templates
-
-
-def get_versions(root=None):
-    """Return all versions of MATLAB installed in a given folder.
-
-    Returns
-    -------
-    list
-
-    """
-    if root is None:
-        from .consts import _MATLAB_BASE as root
-    vers = list()
-    for ver in os.listdir(root):
-        if os.path.exists(os.path.join(root, ver, "bin", "matlab.exe")):
-            vers.append(ver)
-    vers.sort()
-    return vers
+import glob
+import os
+import re
+import threading
+import time
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from mlshim.consts import _APPDATA
+from mlshim.consts import _HERE
+from mlshim.consts import _MATLAB_EXE_NAMES
+from mlshim.consts import _RESOLVE_CACHE_SIZE
+from mlshim.consts import _VERSION_TTL
+
+from functools import lru_cache
+from functools import wraps
+
+_RELEASE = re.compile(r"^R(\d{4})([ab])$", re.IGNORECASE)
+
+
+def clean_log(log_path):
+    pass
+
+
+def abs_short_path(f):
+    """ Wrapper to return absolute short path for Windows.
+
+    Returns a short Windows path if the path exists.
+    Returns absolute path otherwise.
+    """
+
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        # Get a path from the function
+        path = f(*args, **kwargs)
+        # Get the absolute path.
+        path = os.path.abspath(path)
+        # If the path exists (short path dosen't exist otherwise)
+        if os.path.exists(path):
+            path = short_path(path)
+        # Return Windowfied path.
+        return path
+
+    return wrapper
+
+
+@lru_cache(maxsize=None)
+def _get_short_path_name():
+    """Bind ``GetShortPathNameW`` on first use, None if not on Windows."""
+    import ctypes
+
+    if not hasattr(ctypes, "windll"):
+        return None
+    from ctypes import wintypes
+
+    _GetShortPathNameW = ctypes.windll.kernel32.GetShortPathNameW
+    _GetShortPathNameW.argtypes = [
+        wintypes.LPCWSTR,
+        wintypes.LPWSTR,
+        wintypes.DWORD,
+    ]
+    _GetShortPathNameW.restype = wintypes.DWORD
+    return _GetShortPathNameW
+
+
+def short_path(long_name):
+    """
+    Gets the short path name of a given long path.
+    http://stackoverflow.com/a/23598461/200291
+
+    Other platforms have no short names, the path is returned unchanged.
+    """
+    import ctypes
+
+    _GetShortPathNameW = _get_short_path_name()
+    if _GetShortPathNameW is None:
+        return long_name
+    output_buf_size = 0
+    while True:
+        output_buf = ctypes.create_unicode_buffer(output_buf_size)
+        needed = _GetShortPathNameW(long_name, output_buf, output_buf_size)
+        if output_buf_size >= needed:
+            return output_buf.value
+        else:
+            output_buf_size = needed
+
+
+def get_licenses(matlab_version=None, root=None):
+    """Return all licenses for the current user."""
+    if root is None:
+        if _APPDATA is None:
+            return None
+        if matlab_version is None:
+            matlab_version = get_versions()[-1]
+        root = os.path.join(
+            _APPDATA, "MathWorks", "MATLAB", f"{matlab_version}_licenses"
+        )
+    license_files = glob.glob(os.path.join(root, "*.lic"))
+    return license_files
+
+
+def get_templates():
+    """Return all templates in the templates directory."""
+    import glob
+
+    templates = glob.glob(os.path.join(_HERE, "templates", "*.m"))
+    templates = [os.path.basename(path) for path in templates]
+    return templates
+
+
+def version_key(version: str) -> Tuple[int, str, str]:
+    """Sort key for MATLAB® release names.
+
+    Orders by year, then by the a/b suffix: R2009b < R2016a < R2016b.
+    Names that are not releases sort first, alphabetically.
+    """
+    match = _RELEASE.match(version)
+    if match is None:
+        return (0, "", version)
+    return (int(match.group(1)), match.group(2).lower(), version)
+
+
+class VersionRegistry:
+    """Memoized discovery of the MATLAB® versions installed in a root.
+
+    A root is scanned once and the result reused. Within ``ttl`` seconds
+    no file system access happens at all; after that only the root
+    directory is stat'ed and it is rescanned when its mtime changed,
+    which is what installing or removing a release does.
+
+    Parameters
+    ----------
+    ttl : float
+        Seconds a scan is trusted without checking the root's mtime.
+    """
+
+    def __init__(self, ttl: float = _VERSION_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # root -> (mtime_ns, checked, versions)
+        self._cache: Dict[str, Tuple[int, float, List[str]]] = dict()
+
+    def versions(self, root: Optional[str] = None) -> List[str]:
+        """Return the versions installed in ``root``, oldest first."""
+        return list(self._entry(root)[2])
+
+    def stamp(self, root: Optional[str] = None) -> int:
+        """Return a value that changes whenever ``root`` is rescanned.
+
+        Used as part of cache keys for data derived from the installs.
+        """
+        return self._entry(root)[0]
+
+    def _entry(self, root: Optional[str]) -> Tuple[int, float, List[str]]:
+        if root is None:
+            from .consts import _MATLAB_BASE
+
+            root = _MATLAB_BASE
+        root = os.path.abspath(root)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._cache.get(root)
+        if entry is not None and now - entry[1] < self.ttl:
+            return entry
+        mtime_ns = os.stat(root).st_mtime_ns
+        if entry is not None and entry[0] == mtime_ns:
+            versions = entry[2]
+        else:
+            versions = self.scan(root)
+        entry = (mtime_ns, now, versions)
+        with self._lock:
+            self._cache[root] = entry
+        return entry
+
+    def invalidate(self, root: Optional[str] = None):
+        """Forget the scan of ``root``, or of all roots."""
+        with self._lock:
+            if root is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(os.path.abspath(root), None)
+
+    @staticmethod
+    def scan(root: str) -> List[str]:
+        """List the versions in ``root`` without caching."""
+        vers = list()
+        for ver in os.listdir(root):
+            if find_executable(os.path.join(root, ver)) is not None:
+                vers.append(ver)
+        vers.sort(key=version_key)
+        return vers
+
+
+version_registry = VersionRegistry()
+
+
+def get_versions(root=None):
+    """Return all versions of MATLAB installed in a given folder.
+
+    Results come from ``version_registry``, so repeated calls do not
+    rescan the folder.
+
+    Returns
+    -------
+    list
+
+    """
+    return version_registry.versions(root)
+
+
+def find_executable(matlabroot: str) -> Optional[str]:
+    """Return the MATLAB® executable below ``matlabroot``, or None.
+
+    Plain Python, no Windows API: ``bin/matlab.exe`` on Windows,
+    ``bin/matlab`` (then ``bin/matlab.exe``) elsewhere.
+    """
+    for name in _MATLAB_EXE_NAMES:
+        path = os.path.join(matlabroot, "bin", name)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+@lru_cache(maxsize=_RESOLVE_CACHE_SIZE)
+def _resolve_executable(
+    root: str, version: str, stamp: Tuple[int, int, int]
+) -> str:
+    matlabroot = os.path.join(root, version)
+    path = find_executable(matlabroot)
+    if path is None:
+        # Report the conventional location, it does not exist.
+        return os.path.join(matlabroot, "bin", _MATLAB_EXE_NAMES[0])
+    return cached_short_path(path)
+
+
+def resolve_executable(root: str, version: str) -> str:
+    """Absolute (short, on Windows) path of a version's executable.
+
+    Memoized per ``(root, version)`` in a bounded LRU cache. The key
+    includes ``version_registry.stamp(root)`` and the modification times
+    of the version and its ``bin`` directory, so entries are dropped when
+    the installs in ``root`` or the version's executables change.
+    """
+    root = os.path.abspath(root)
+    matlabroot = os.path.join(root, version)
+    stamp = (
+        version_registry.stamp(root),
+        _mtime_ns(matlabroot),
+        _mtime_ns(os.path.join(matlabroot, "bin")),
+    )
+    return _resolve_executable(root, version, stamp)
+
+
+def _mtime_ns(path: str) -> int:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return 0
+
+
+@lru_cache(maxsize=_RESOLVE_CACHE_SIZE)
+def cached_short_path(path: str) -> str:
+    """Memoized :func:`short_path` of an absolute path."""
+    return short_path(path)
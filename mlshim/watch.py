@@ -0,0 +1,266 @@
+"""Wait for changes to a file without fixed-interval sleeping.
+
+:func:`watch` returns an :class:`InotifyWatcher` on Linux and a
+:class:`PollingWatcher` everywhere else. Both expose ``wait(timeout)``,
+which returns as soon as the watched file is created or appended to, or
+as soon as the optional process exits.
+"""
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import time
+from subprocess import Popen
+from typing import Optional
+from typing import Tuple
+
+from .consts import _POLL_INTERVAL
+
+# <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+_EVENT = struct.Struct("iIII")
+_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+_libc = None
+
+
+def _get_libc():
+    """Load libc with the inotify functions, or return None."""
+    global _libc
+    if _libc is None:
+        _libc = False
+        if sys.platform.startswith("linux"):
+            try:
+                libc = ctypes.CDLL(
+                    ctypes.util.find_library("c") or "libc.so.6",
+                    use_errno=True,
+                )
+                libc.inotify_init1
+                libc.inotify_add_watch
+            except (OSError, AttributeError):
+                pass
+            else:
+                _libc = libc
+    return _libc or None
+
+
+class PollingWatcher:
+    """Detect changes by comparing the file's size and mtime.
+
+    Parameters
+    ----------
+    path : str
+        File to watch. It does not need to exist yet.
+    proc : Popen
+        Process whose exit also ends the wait.
+    interval : float
+        Seconds between ``os.stat`` calls while waiting.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        proc: Optional[Popen] = None,
+        interval: float = _POLL_INTERVAL,
+    ):
+        self.path = path
+        self.proc = proc
+        self.interval = interval
+        self._last = self._stat()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_size, stat.st_mtime_ns)
+
+    def wait(self, timeout: float) -> bool:
+        """Wait up to ``timeout`` seconds for the file to change.
+
+        Returns True if a change or the process exit was seen.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            if self.proc is not None and self.proc.poll() is not None:
+                return True
+            current = self._stat()
+            if current != self._last:
+                self._last = current
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(self.interval, remaining))
+
+    async def wait_async(self, timeout: float) -> bool:
+        """Coroutine version of :meth:`wait`."""
+        import asyncio
+
+        deadline = time.monotonic() + timeout
+        while True:
+            if self.proc is not None and self.proc.poll() is not None:
+                return True
+            current = self._stat()
+            if current != self._last:
+                self._last = current
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            await asyncio.sleep(min(self.interval, remaining))
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """Detect changes with Linux inotify.
+
+    The parent directory is watched, so the file itself may be created
+    after the watcher. The exit of ``proc`` is watched through a pidfd
+    where the kernel supports it, otherwise by polling every
+    ``interval`` seconds.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        proc: Optional[Popen] = None,
+        interval: float = _POLL_INTERVAL,
+    ):
+        libc = _get_libc()
+        if libc is None:
+            raise OSError(errno.ENOSYS, "inotify is not available")
+        self.path = path
+        self.proc = proc
+        self.interval = interval
+        self._pidfd = None
+        self._name = os.fsencode(os.path.basename(path))
+        self._fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+        directory = os.path.dirname(os.path.abspath(path))
+        if libc.inotify_add_watch(self._fd, os.fsencode(directory), _MASK) < 0:
+            error = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(error, os.strerror(error), directory)
+        if proc is not None and hasattr(os, "pidfd_open"):
+            try:
+                self._pidfd = os.pidfd_open(proc.pid)
+            except OSError:
+                # Already reaped or not supported by the kernel.
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _drain(self) -> bool:
+        """Read all queued events, return True if one concerns the file."""
+        changed = False
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset < len(data):
+                _, _, _, length = _EVENT.unpack_from(data, offset)
+                offset += _EVENT.size
+                name = data[offset : offset + length].rstrip(b"\0")
+                offset += length
+                if name == self._name:
+                    changed = True
+
+    def wait(self, timeout: float) -> bool:
+        """Wait up to ``timeout`` seconds for the file to change.
+
+        Returns True if a change or the process exit was seen.
+        """
+        fds = [self._fd]
+        if self._pidfd is not None:
+            fds.append(self._pidfd)
+        deadline = time.monotonic() + timeout
+        while True:
+            if self.proc is not None and self.proc.poll() is not None:
+                return True
+            remaining = max(deadline - time.monotonic(), 0)
+            if self.proc is not None and self._pidfd is None:
+                remaining = min(remaining, self.interval)
+            ready, _, _ = select.select(fds, [], [], remaining)
+            if self._fd in ready and self._drain():
+                return True
+            if self._pidfd in ready:
+                return True
+            if time.monotonic() >= deadline:
+                return False
+
+    async def wait_async(self, timeout: float) -> bool:
+        """Coroutine version of :meth:`wait`.
+
+        The inotify descriptor is registered with the event loop, so no
+        thread is blocked while waiting. Process exit is not watched here,
+        await the process alongside instead.
+        """
+        import asyncio
+
+        loop = asyncio.get_event_loop()
+        deadline = time.monotonic() + timeout
+        while True:
+            ready = loop.create_future()
+
+            def readable():
+                if not ready.done():
+                    ready.set_result(None)
+
+            try:
+                loop.add_reader(self._fd, readable)
+            except NotImplementedError:
+                # Event loops without add_reader, e.g. the Windows proactor.
+                return await loop.run_in_executor(
+                    None, self.wait, max(deadline - time.monotonic(), 0)
+                )
+            try:
+                await asyncio.wait_for(
+                    ready, max(deadline - time.monotonic(), 0)
+                )
+            except asyncio.TimeoutError:
+                return False
+            finally:
+                loop.remove_reader(self._fd)
+            if self._drain():
+                return True
+
+    def close(self):
+        for fd in (self._fd, self._pidfd):
+            if fd is not None:
+                os.close(fd)
+        self._fd = self._pidfd = None
+
+
+def watch(path: str, proc: Optional[Popen] = None):
+    """Return the best available watcher for ``path`` and ``proc``."""
+    if _get_libc() is not None:
+        try:
+            return InotifyWatcher(path, proc=proc)
+        except OSError:
+            pass
+    return PollingWatcher(path, proc=proc)
@@ -0,0 +1,263 @@
+"""Long-lived MATLAB® worker fed through a spool directory.
+
+The worker script (``worker_template.m``) loops inside one MATLAB® session.
+Jobs are rendered from ``job_template.m`` into ``<spool>/job_<n>.m``; the
+worker picks them up in order, runs each inside try/catch, prints
+``########## Job <id> Started/Finished/Failed ##########`` around its
+output and writes ``<spool>/<id>.status``. Creating ``<spool>/stop`` ends
+the loop. A job's script and status file are deleted once its status was
+read, the spool directory when the worker stops.
+"""
+import itertools
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+from subprocess import Popen
+from subprocess import TimeoutExpired
+from typing import Dict
+from typing import List
+from typing import Optional
+
+from .consts import _EXIT_TIMEOUT
+from .consts import _SLEEP_TIME
+from .consts import _WORKER_POLL_INTERVAL
+from .matlab import Matlab
+from .pool import FAILED
+from .pool import FINISHED
+from .pool import PENDING
+from .pool import RUNNING
+from .tail import LogTailer
+from .watch import watch
+
+logger = logging.getLogger(__name__)
+
+_JOB_MARKER = re.compile(
+    r"^########## Job (\S+) (Started|Finished|Failed) ##########$"
+)
+_JOB_STATES = {"Started": RUNNING, "Finished": FINISHED, "Failed": FAILED}
+
+
+class WorkerJob:
+    """A job queued on a :class:`MatlabWorker`.
+
+    Attributes
+    ----------
+    job_id : str
+        Name of the job script in the spool directory, without extension.
+    state : str
+        ``pending``, ``running``, ``finished`` or ``failed``.
+    lines : list
+        Log lines written by the job.
+    error : str
+        ``message (identifier)`` of the MATLAB® error if the job failed.
+    """
+
+    def __init__(self, worker: "MatlabWorker", job_id: str):
+        self.worker = worker
+        self.job_id = job_id
+        self.state = PENDING
+        self.lines: List[str] = list()
+        self.error: Optional[str] = None
+
+    def __repr__(self):
+        return f"WorkerJob<{self.job_id}, {self.state}>"
+
+    @property
+    def script(self):
+        return os.path.join(self.worker.spool_dir, f"{self.job_id}.m")
+
+    @property
+    def running_script(self):
+        """Where the worker moves :attr:`script` while running it."""
+        return os.path.join(
+            self.worker.spool_dir, "running", f"{self.job_id}.m"
+        )
+
+    @property
+    def status_file(self):
+        return os.path.join(self.worker.spool_dir, f"{self.job_id}.status")
+
+    def done(self) -> bool:
+        return self.state in (FINISHED, FAILED)
+
+    def wait(self, timeout: Optional[float] = None) -> str:
+        """Wait for the job to end and return its state.
+
+        Exceptions:
+            TimeoutError("Matlab job timed out")
+            RuntimeError("Matlab job failed")
+            RuntimeError("Matlab worker exited")
+        """
+        t_start = time.time()
+        proc = self.worker.matlab.proc
+        if not isinstance(proc, Popen):
+            raise RuntimeError("Matlab worker is not running")
+        with watch(self.status_file, proc=proc) as watcher:
+            while not self.done():
+                if os.path.exists(self.status_file):
+                    self._read_status()
+                    break
+                if proc.poll() is not None:
+                    self.worker.collect()
+                    raise RuntimeError(
+                        f"Matlab worker exited with code {proc.returncode}"
+                    )
+                wait_time: float = _SLEEP_TIME
+                if timeout is not None:
+                    wait_time = timeout - (time.time() - t_start)
+                    if wait_time <= 0:
+                        raise TimeoutError("Matlab job timed out")
+                watcher.wait(min(wait_time, _SLEEP_TIME))
+        self.worker.collect()
+        if self.state == FAILED:
+            raise RuntimeError(f"Matlab job failed: {self.error}")
+        return self.state
+
+    def _read_status(self):
+        with open(self.status_file) as fid:
+            status, _, error = fid.read().partition("\n")
+        self.error = error.strip() or None
+        self.state = FAILED if status.strip() == "failed" else FINISHED
+        for path in (self.status_file, self.running_script):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+class MatlabWorker:
+    """Run many jobs in one warm MATLAB® session.
+
+    Parameters
+    ----------
+    matlab : Matlab
+        Instance to launch the worker on. Its template and timeout are
+        replaced by the worker's.
+    poll_interval : float
+        Seconds MATLAB® pauses between checks of an empty spool directory.
+
+    Example::
+
+        with Matlab().start_worker() as worker:
+            jobs = [worker.submit(scripts=[script]) for script in scripts]
+            for job in jobs:
+                job.wait()
+    """
+
+    def __init__(
+        self, matlab: Matlab, poll_interval: float = _WORKER_POLL_INTERVAL
+    ):
+        self.matlab = matlab
+        self.poll_interval = poll_interval
+        self.spool_dir = os.path.join(
+            matlab.working_directory, f"spool_{matlab._uuid}"
+        )
+        self.jobs: Dict[str, WorkerJob] = dict()
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+        self._tailer: Optional[LogTailer] = None
+        self._current: Optional[WorkerJob] = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def __repr__(self):
+        return f"MatlabWorker<{self.matlab}, {len(self.jobs)} jobs>"
+
+    @property
+    def alive(self) -> bool:
+        """True while the worker's MATLAB® process runs.
+
+        ``proc`` is MATLAB® itself, or on Windows the launcher waiting for
+        it (see ``Matlab.cmd``), so it exits together with MATLAB®.
+        """
+        proc = self.matlab.proc
+        return isinstance(proc, Popen) and proc.poll() is None
+
+    def start(self):
+        """Launch MATLAB® and wait until the worker loop is running."""
+        os.makedirs(self.spool_dir, exist_ok=True)
+        self.matlab.template = "worker_template.m"
+        # Return as soon as the worker reports "Started".
+        self.matlab.timeout = None
+        self.matlab.run(
+            spool_dir=self.spool_dir, poll_interval=self.poll_interval
+        )
+        self._tailer = LogTailer(self.matlab.log_file)
+        logger.info(f"MATLAB® worker started: {self.spool_dir}")
+
+    def submit(self, *args, **kwargs) -> WorkerJob:
+        """Queue a job rendered from ``job_template.m``.
+
+        All keyword arguments are passed to the Jinja2 template.
+        """
+        assert len(args) == 0
+        if not self.alive:
+            raise RuntimeError("Matlab worker is not running")
+        with self._lock:
+            job = WorkerJob(self, f"job_{next(self._counter):08d}")
+            self.jobs[job.job_id] = job
+        body = self.matlab._render("job_template.m", **kwargs)
+        # Written under another name first so the worker never picks up a
+        # partial script.
+        with open(f"{job.script}.tmp", "w") as fid:
+            print(body, file=fid)
+        os.replace(f"{job.script}.tmp", job.script)
+        return job
+
+    def collect(self):
+        """Distribute new worker log lines to their jobs."""
+        if self._tailer is None:
+            return
+        with self._lock:
+            while True:
+                for line in self._tailer.read_lines():
+                    self._collect_line(line)
+                if not self._tailer.pending:
+                    break
+
+    def _collect_line(self, line: str):
+        match = _JOB_MARKER.match(line.strip())
+        if match is None:
+            if self._current is not None:
+                self._current.lines.append(line)
+            return
+        job = self.jobs.get(match.group(1))
+        if job is None:
+            return
+        state = _JOB_STATES[match.group(2)]
+        if state == RUNNING:
+            # The status file decides when the job is done.
+            if job.state == PENDING:
+                job.state = RUNNING
+            self._current = job
+        elif state == FINISHED:
+            self._current = None
+        # The error report follows the "Failed" marker, keep it with the
+        # job.
+
+    def stop(self, timeout: float = _EXIT_TIMEOUT):
+        """Ask the worker to exit after the current job, kill it otherwise."""
+        proc = self.matlab.proc
+        if isinstance(proc, Popen) and proc.poll() is None:
+            open(os.path.join(self.spool_dir, "stop"), "w").close()
+            try:
+                proc.wait(timeout)
+            except TimeoutExpired:
+                logger.warning("MATLAB® worker did not stop, killing it")
+                proc.kill()
+                proc.wait()
+        self.collect()
+        for job in list(self.jobs.values()):
+            if not job.done() and os.path.exists(job.status_file):
+                job._read_status()
+        shutil.rmtree(self.spool_dir, ignore_errors=True)
+        if self._tailer is not None:
+            self._tailer.close()
+            self._tailer = None
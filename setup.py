@@ -19,7 +19,7 @@ setup(
     name="mlshim",
     version=versioneer.get_version(),
     cmdclass=versioneer.get_cmdclass(),
-    python_requires=">=3.5",
+    python_requires=">=3.7",
     description="Matlab Shim for Python",
     long_description=readme(),
     keywords="matlab",
@@ -36,7 +36,6 @@ setup(
         "License :: OSI Approved :: MIT License",
         "Natural Language :: English",
         "Programming Language :: Python :: 3",
-        "Programming Language :: Python :: 3.6",
         "Programming Language :: Python :: 3.7",
         "Programming Language :: Python :: 3.8",
     ],
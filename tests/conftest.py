@@ -0,0 +1,34 @@
+import sys
+
+import pytest
+from fake_matlab import make_root
+
+FAKE_VERSION = "R2099a"
+
+
+@pytest.fixture
+def fake_root(tmp_path):
+    """MATLAB® root with a single fake install of ``FAKE_VERSION``."""
+    if sys.platform == "win32":
+        pytest.skip("fake MATLAB® executable needs a POSIX shebang")
+    return make_root(str(tmp_path / "MATLAB"), FAKE_VERSION)
+
+
+@pytest.fixture
+def fake_matlab(fake_root, tmp_path):
+    """Factory for :class:`mlshim.Matlab` objects backed by the fake."""
+    from mlshim import Matlab
+
+    def factory(**kwargs):
+        kwargs.setdefault("template", "run_template.m")
+        kwargs.setdefault("working_directory", str(tmp_path / "work"))
+        return Matlab(root=fake_root, **kwargs)
+
+    return factory
+
+
+@pytest.fixture
+def launcher(monkeypatch):
+    """Fake MATLAB® behaving like the Windows launcher, run with ``-wait``."""
+    monkeypatch.setenv("FAKE_MATLAB_LAUNCHER", "1")
+    monkeypatch.setattr("mlshim.matlab._LAUNCHER_ARGS", ("-wait",))
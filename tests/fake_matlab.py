@@ -0,0 +1,394 @@
+"""Stand-in for the MATLAB® executable used by the test suite.
+
+Honours ``-logfile <path>`` and ``-r "run('<script>');"`` and interprets
+the small subset of MATLAB® used by the mlshim templates: ``try``/``catch``
+blocks, ``fprintf``, ``disp``, ``error``, ``pause``, ``cd``, ``run``,
+``bench``, numeric and string assignments and ``exit``/``quit``.
+Anything else is ignored.
+
+A ``while`` loop in a script that set ``spool_dir`` is taken to be the
+worker loop of ``worker_template.m`` and is emulated in Python.
+
+Environment variables:
+
+FAKE_MATLAB_STARTUP_DELAY
+    Seconds to wait before creating the log file.
+FAKE_MATLAB_LAUNCHER
+    Behave like the Windows ``bin\\matlab.exe`` launcher: unless ``-wait``
+    is passed, start MATLAB® as a detached process and exit with 0 at once.
+FAKE_MATLAB_CRASH
+    Exit with this code right after creating the log file.
+FAKE_MATLAB_OUTPUT_BYTES
+    Write about this many bytes of filler lines to the log before running
+    the command, like the banner and warnings of a real start.
+FAKE_MATLAB_TIMES
+    Append ``<start> <end>`` wall clock times of this process to this file.
+FAKE_MATLAB_BENCH_SCALE
+    Factor for the times returned by ``bench``. Default: 1
+FAKE_MATLAB_LICENSE_FAILURES
+    File holding a number. While it is positive, decrement it and fail to
+    check out a license instead of running the command.
+FAKE_MATLAB_LICENSE_HANG
+    After a failed license checkout, wait to be killed instead of exiting.
+FAKE_MATLAB_TOOLBOX_FAILURES
+    Like ``FAKE_MATLAB_LICENSE_FAILURES`` for ``license('checkout', ...)``
+    in a script, which then raises ``MATLAB:license:checkout``.
+
+Like MATLAB® it writes ``matlab.prf`` to ``MATLAB_PREFDIR`` if missing.
+
+:func:`make_root` creates a MATLAB® root that runs this fake, for the test
+suite and the benchmarks.
+"""
+import os
+import re
+import sys
+import time
+
+_T_START = time.time()
+_FILLER = "%08d The quick brown fox jumps over the lazy dog. 0123456789\n"
+
+_CALL = re.compile(r"^(\w+)\s*(?:\((.*)\))?$")
+_ASSIGN = re.compile(r"^(\w+)\s*=\s*([-\d.]+|'[^']*')$")
+_CALL_ASSIGN = re.compile(r"^(\w+)\s*=\s*(\w+\s*\(.*\))$")
+# Seconds of the LU, FFT, ODE, Sparse, 2-D and 3-D tests of ``bench``.
+_BENCH_TIMES = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6)
+
+
+class MatlabException(Exception):
+    def __init__(self, message, identifier=""):
+        super().__init__(message)
+        self.message = message
+        self.identifier = identifier
+
+
+class Exit(Exception):
+    def __init__(self, code):
+        super().__init__(code)
+        self.code = code
+
+
+def is_transpose(quoted, before):
+    """Whether a quote after ``before`` transposes instead of quoting."""
+    return not quoted and bool(re.search(r"[\w)\]]$", before))
+
+
+def split_args(text):
+    """Split a MATLAB® argument list on top level commas."""
+    args, current, quoted, depth = [], "", False, 0
+    for char in text:
+        if char == "'" and not is_transpose(quoted, current):
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and char == ",":
+            args.append(current.strip())
+            current = ""
+            continue
+        current += char
+    if current.strip():
+        args.append(current.strip())
+    return args
+
+
+def split_statements(lines):
+    """Split lines on the semicolons separating statements."""
+    statements = []
+    for line in lines:
+        current, quoted = "", False
+        for char in line:
+            if char == "'" and not is_transpose(quoted, current):
+                quoted = not quoted
+            elif char == "%" and not quoted:
+                break
+            elif char == ";" and not quoted:
+                statements.append(current.strip())
+                current = ""
+                continue
+            current += char
+        statements.append(current.strip())
+    return [statement for statement in statements if statement]
+
+
+def parse(lines):
+    """Parse statements into a tree of statements and blocks."""
+    body = []
+    while lines:
+        line = lines.pop(0)
+        keyword = re.split(r"[\s;,(]", line, 1)[0]
+        if keyword == "end":
+            lines.insert(0, line)
+            return body
+        if keyword in ("catch", "else", "elseif"):
+            lines.insert(0, line)
+            return body
+        if keyword == "try":
+            block = parse(lines)
+            handler, variable = [], None
+            while lines:
+                line = lines.pop(0)
+                if line.startswith("catch"):
+                    variable = (line.split() + [None])[1]
+                    handler = parse(lines)
+                    continue
+                break  # end
+            body.append(("try", block, variable, handler))
+        elif keyword in ("for", "while", "if", "switch", "function"):
+            if keyword == "while":
+                body.append(("while", line))
+            parse(lines)
+            while lines:
+                line = lines.pop(0)
+                if line.startswith(("else", "elseif")):
+                    parse(lines)
+                    continue
+                break  # end
+        else:
+            body.append(("stmt", line))
+    return body
+
+
+class Interpreter:
+    def __init__(self, log):
+        self.log = log
+        self.variables = {}
+
+    def write(self, text):
+        self.log.write(text)
+        self.log.flush()
+
+    def value(self, expr):
+        expr = expr.strip()
+        if expr.startswith("'") and expr.endswith("'"):
+            return expr[1:-1].replace("''", "'")
+        matrix = self.variables.get(expr[:-1])
+        if expr.endswith("'") and isinstance(matrix, list):
+            # Transposed matrix, its elements in row order.
+            return [value for row in matrix for value in row]
+        if re.match(r"^-?[\d.]+$", expr):
+            number = float(expr)
+            return int(number) if number.is_integer() else number
+        if "." in expr:
+            name, attr = expr.split(".", 1)
+            return getattr(self.variables.get(name), attr, "")
+        if expr == "pwd":
+            return os.getcwd()
+        if expr == "prefdir":
+            return os.environ.get("MATLAB_PREFDIR", "")
+        return self.variables.get(expr, 0)
+
+    def fprintf(self, fmt, values):
+        """Write ``fmt``, repeated until all matrix elements are used."""
+        flat = list()
+        for value in values:
+            flat.extend(value if isinstance(value, list) else [value])
+        if not flat:
+            self.write(fmt)
+            return
+        count = len(re.findall(r"%[-+ 0#]*[\d.]*[dfgsxe]", fmt)) or 1
+        for start in range(0, len(flat), count):
+            self.write(fmt % tuple(flat[start : start + count]))
+
+    def run_file(self, path):
+        with open(path) as fid:
+            self.execute(parse(split_statements(fid.read().splitlines())))
+
+    def execute(self, body):
+        for node in body:
+            if node[0] == "try":
+                _, block, variable, handler = node
+                try:
+                    self.execute(block)
+                except MatlabException as error:
+                    if variable:
+                        self.variables[variable] = error
+                    self.execute(handler)
+            elif node[0] == "while":
+                if "spool_dir" in self.variables:
+                    self.worker_loop(self.variables["spool_dir"])
+            else:
+                self.statement(node[1])
+
+    def worker_loop(self, spool_dir, poll_interval=0.02):
+        """Emulate the job loop of ``worker_template.m``."""
+        running = os.path.join(spool_dir, "running")
+        os.makedirs(running, exist_ok=True)
+        while not os.path.exists(os.path.join(spool_dir, "stop")):
+            jobs = sorted(
+                name
+                for name in os.listdir(spool_dir)
+                if name.startswith("job_") and name.endswith(".m")
+            )
+            if not jobs:
+                time.sleep(poll_interval)
+                continue
+            job_id = jobs[0][:-2]
+            job_file = os.path.join(running, jobs[0])
+            os.replace(os.path.join(spool_dir, jobs[0]), job_file)
+            self.write(f"########## Job {job_id} Started ##########\n")
+            try:
+                self.run_file(job_file)
+                status = "finished\n"
+                self.write(f"########## Job {job_id} Finished ##########\n")
+            except MatlabException as error:
+                self.write(f"########## Job {job_id} Failed ##########\n")
+                self.write(f"ERROR: {error.message} ({error.identifier})\n\n")
+                status = f"failed\n{error.message} ({error.identifier})\n"
+            status_file = os.path.join(spool_dir, f"{job_id}.status")
+            with open(f"{status_file}.tmp", "w") as fid:
+                fid.write(status)
+            os.replace(f"{status_file}.tmp", status_file)
+
+    def statement(self, line):
+        match = _ASSIGN.match(line)
+        if match:
+            self.variables[match.group(1)] = self.value(match.group(2))
+            return
+        match = _CALL_ASSIGN.match(line)
+        if match:
+            self.variables[match.group(1)] = self.statement(match.group(2))
+            return
+        match = _CALL.match(line)
+        if not match:
+            return
+        name, args = match.group(1), split_args(match.group(2) or "")
+        values = [self.value(arg) for arg in args]
+        if name == "fprintf" and values:
+            fmt = values[0].encode().decode("unicode_escape")
+            self.fprintf(fmt, values[1:])
+        elif name == "bench":
+            scale = float(os.environ.get("FAKE_MATLAB_BENCH_SCALE", 1))
+            count = values[0] if values else 1
+            return [[t * scale for t in _BENCH_TIMES] for _ in range(count)]
+        elif name == "disp":
+            self.write(f"{values[0] if values else ''}\n")
+        elif name == "error":
+            if len(values) > 1:
+                raise MatlabException(str(values[1]), str(values[0]))
+            raise MatlabException(str(values[0]) if values else "")
+        elif name == "license" and values[:1] == ["checkout"]:
+            counter = os.environ.get("FAKE_MATLAB_TOOLBOX_FAILURES")
+            if license_failure(counter):
+                raise MatlabException(
+                    f"License checkout failed for {values[1]}.",
+                    "MATLAB:license:checkout",
+                )
+            return 1
+        elif name == "pause":
+            time.sleep(float(values[0]) if values else 0)
+        elif name == "cd" and values:
+            os.chdir(values[0])
+        elif name == "run":
+            self.run_file(values[0])
+        elif name in ("exit", "quit"):
+            code = values[0] if values and isinstance(values[0], int) else 0
+            raise Exit(code)
+
+
+def license_failure(counter):
+    """Take one failure from the counter file, False if none are left."""
+    if not counter or not os.path.exists(counter):
+        return False
+    with open(counter) as fid:
+        left = int(fid.read() or 0)
+    if left <= 0:
+        return False
+    with open(counter, "w") as fid:
+        fid.write(str(left - 1))
+    return True
+
+
+def write_filler(log, size):
+    """Write ``size`` bytes of numbered lines, rounded down."""
+    lines = size // len(_FILLER % 0)
+    for start in range(0, lines, 10000):
+        stop = min(start + 10000, lines)
+        log.write("".join(_FILLER % idx for idx in range(start, stop)))
+    log.flush()
+
+
+def launch(argv):
+    """Start the "real" MATLAB® without waiting for it."""
+    import subprocess
+
+    env = dict(os.environ)
+    del env["FAKE_MATLAB_LAUNCHER"]
+    subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__)] + list(argv),
+        env=env,
+        start_new_session=True,
+    )
+    return 0
+
+
+def make_root(directory, version="R2099a"):
+    """Create a MATLAB® root whose only install runs the fake."""
+    bindir = os.path.join(directory, version, "bin")
+    os.makedirs(bindir)
+    exe = os.path.join(bindir, "matlab.exe")
+    with open(exe, "w") as fid:
+        fid.write(
+            f"#!{sys.executable}\n"
+            "import runpy\n"
+            f"runpy.run_path({os.path.abspath(__file__)!r}, "
+            "run_name='__main__')\n"
+        )
+    os.chmod(exe, 0o755)
+    return directory
+
+
+def main(argv):
+    if "FAKE_MATLAB_LAUNCHER" in os.environ and "-wait" not in argv:
+        return launch(argv)
+    log_file, command = None, None
+    args = list(argv)
+    while args:
+        arg = args.pop(0)
+        if arg == "-logfile":
+            log_file = args.pop(0)
+        elif arg == "-r":
+            command = args.pop(0)
+    time.sleep(float(os.environ.get("FAKE_MATLAB_STARTUP_DELAY", 0)))
+    prefdir = os.environ.get("MATLAB_PREFDIR")
+    if prefdir:
+        os.makedirs(prefdir, exist_ok=True)
+        prf = os.path.join(prefdir, "matlab.prf")
+        if not os.path.exists(prf):
+            with open(prf, "w") as fid:
+                fid.write(f"# Created by {os.getpid()}\n")
+    with open(log_file or os.devnull, "a") as log:
+        if "FAKE_MATLAB_CRASH" in os.environ:
+            return int(os.environ["FAKE_MATLAB_CRASH"])
+        if license_failure(os.environ.get("FAKE_MATLAB_LICENSE_FAILURES")):
+            log.write("License checkout failed.\n")
+            log.write("Error checking out license: Maximum users reached\n")
+            log.flush()
+            while "FAKE_MATLAB_LICENSE_HANG" in os.environ:
+                time.sleep(1)
+            return 1
+        write_filler(log, int(os.environ.get("FAKE_MATLAB_OUTPUT_BYTES", 0)))
+        interpreter = Interpreter(log)
+        try:
+            interpreter.execute(parse(split_statements([command or ""])))
+        except Exit as exit_:
+            return exit_.code
+        except MatlabException as error:
+            interpreter.write(f"{error.message}\n")
+            return 1
+    return 0
+
+
+def record_times():
+    times = os.environ.get("FAKE_MATLAB_TIMES")
+    if times:
+        with open(times, "a") as fid:
+            fid.write(f"{_T_START!r} {time.time()!r}\n")
+
+
+if __name__ == "__main__":
+    try:
+        code = main(sys.argv[1:])
+    finally:
+        record_times()
+    sys.exit(code)
@@ -0,0 +1,90 @@
+import os
+
+import pytest
+
+from mlshim.agent import MatlabAgent
+from mlshim.exceptions import MatlabError
+from mlshim.remote import RemoteMatlab
+
+
+@pytest.fixture
+def agent(fake_root, tmp_path):
+    with MatlabAgent(
+        working_directory=str(tmp_path / "agent"),
+        max_workers=2,
+        token="secret",
+        root=fake_root,
+    ) as agent:
+        yield agent
+
+
+def test_remote_run(agent, tmp_path):
+    matlab = RemoteMatlab(agent.url, token="secret")
+    lines = []
+    scripts = ["disp('Hello remote');", "pause(0.2);"]
+    assert matlab.run(scripts=scripts, on_line=lines.append) == 0
+    assert "Hello remote" in lines
+    assert lines[-1] == "########## Finished ##########"
+    matlab.fetch_artifacts(str(tmp_path / "artifacts"))
+    files = os.listdir(tmp_path / "artifacts")
+    assert matlab.status["log_file"] in files
+    assert not any(name.startswith("prefdir_") for name in files)
+
+
+def test_remote_error(agent):
+    matlab = RemoteMatlab(agent.url, token="secret")
+    with pytest.raises(MatlabError) as info:
+        matlab.run(scripts=["error('mlshim:remote', 'boom');"])
+    assert info.value.identifier == "mlshim:remote"
+
+
+def test_remote_rejected(agent):
+    with pytest.raises(RuntimeError, match="403"):
+        RemoteMatlab(agent.url, token="wrong").run(scripts=[])
+    matlab = RemoteMatlab(agent.url, token="secret", template="missing.m")
+    with pytest.raises(RuntimeError, match="missing.m"):
+        matlab.run(scripts=[])
+
+
+def test_remote_reserved_kwargs(agent):
+    matlab = RemoteMatlab(agent.url, token="secret")
+    for key in ("matlab", "features", "on_line"):
+        with pytest.raises(RuntimeError, match=f"Reserved kwargs: {key}"):
+            matlab.submit(scripts=[], **{key: "x"})
+    assert agent.jobs == {}
+
+
+def test_remote_bad_log_query(agent):
+    matlab = RemoteMatlab(agent.url, token="secret")
+    job_id = matlab.submit(scripts=["disp('x');"])
+    for query in ("offset=x", "wait=soon", "offset=-1"):
+        with pytest.raises(RuntimeError):
+            matlab._json(f"/jobs/{job_id}/log?{query}")
+    matlab.follow()
+    assert matlab.result() == 0
+    for query in ("wait=nan", "wait=inf"):
+        with pytest.raises(RuntimeError, match="Invalid wait"):
+            matlab._json(f"/jobs/{job_id}/log?{query}")
+
+
+def test_agent_evicts_finished_jobs(fake_root, tmp_path):
+    with MatlabAgent(
+        working_directory=str(tmp_path / "agent"),
+        max_finished=1,
+        root=fake_root,
+    ) as agent:
+        first = RemoteMatlab(agent.url)
+        assert first.run(scripts=["disp('first');"]) == 0
+        directory = agent.jobs[first.job_id].matlab.working_directory
+        assert os.path.isdir(directory)
+        second = RemoteMatlab(agent.url)
+        assert second.run(scripts=["disp('second');"]) == 0
+        with pytest.raises(RuntimeError, match="404"):
+            first._json(f"/jobs/{first.job_id}")
+        assert list(agent.jobs) == [second.job_id]
+        assert not os.path.exists(directory)
+        assert len(agent.pool.jobs) == 1
+        agent.job_ttl = 0
+        with pytest.raises(RuntimeError, match="404"):
+            second._json(f"/jobs/{second.job_id}")
+        assert agent.jobs == {}
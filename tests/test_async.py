@@ -0,0 +1,41 @@
+import asyncio
+
+import pytest
+
+
+def test_run_async(fake_matlab):
+    matlab = fake_matlab()
+    returncode = asyncio.run(matlab.run_async(scripts=["disp('Hello');"]))
+    assert returncode == 0
+    with open(matlab.log_file) as fid:
+        assert "Hello" in fid.read()
+
+
+def test_run_async_concurrent(fake_matlab):
+    matlabs = [fake_matlab() for _ in range(10)]
+
+    async def main():
+        return await asyncio.gather(
+            *(
+                matlab.run_async(scripts=[f"disp('Run {idx}');"])
+                for idx, matlab in enumerate(matlabs)
+            )
+        )
+
+    assert asyncio.run(main()) == [0] * len(matlabs)
+    for idx, matlab in enumerate(matlabs):
+        with open(matlab.log_file) as fid:
+            assert f"Run {idx}" in fid.read()
+
+
+def test_run_async_failure(fake_matlab):
+    matlab = fake_matlab()
+    with pytest.raises(RuntimeError, match="processing failed"):
+        asyncio.run(matlab.run_async(scripts=["error('boom');"]))
+
+
+def test_run_async_exit_code(fake_matlab):
+    matlab = fake_matlab()
+    with pytest.raises(RuntimeError, match="code 4"):
+        asyncio.run(matlab.run_async(scripts=["exit(4);"]))
+    assert matlab.returncode == 4
@@ -0,0 +1,50 @@
+import pytest
+
+from mlshim.exceptions import LicenseError
+from mlshim.exceptions import MatlabError
+from mlshim.retry import RetryPolicy
+
+
+def test_run_batch(fake_matlab):
+    matlab = fake_matlab()
+    jobs = matlab.run_batch(
+        [
+            "disp('first');",
+            ["x = 2;", "error('mlshim:batch', 'second failed');"],
+            "disp('third');",
+        ]
+    )
+    assert [job.state for job in jobs] == ["finished", "failed", "finished"]
+    assert jobs[0].lines == ["first"]
+    assert jobs[2].lines == ["third"]
+    assert isinstance(jobs[1].error, MatlabError)
+    assert jobs[1].error.message == "second failed"
+    assert jobs[1].error.identifier == "mlshim:batch"
+    assert matlab.returncode == 0
+
+
+def test_run_batch_exit(fake_matlab):
+    matlab = fake_matlab()
+    jobs = matlab.run_batch(["disp('first');", "exit(3);", "disp('never');"])
+    assert [job.state for job in jobs] == ["finished", "failed", "pending"]
+    assert "code 3" in str(jobs[1].error)
+
+
+def test_run_batch_crash(fake_matlab, monkeypatch):
+    monkeypatch.setenv("FAKE_MATLAB_CRASH", "3")
+    with pytest.raises(RuntimeError, match="before starting"):
+        fake_matlab().run_batch(["disp('first');"])
+
+
+def test_run_batch_retries_license_error(fake_matlab, tmp_path, monkeypatch):
+    counter = tmp_path / "license_failures"
+    counter.write_text("1")
+    monkeypatch.setenv("FAKE_MATLAB_LICENSE_FAILURES", str(counter))
+    matlab = fake_matlab(retry=RetryPolicy(base_delay=0.01))
+    jobs = matlab.run_batch(["disp('first');"])
+    assert [job.state for job in jobs] == ["finished"]
+    assert [attempt.ok for attempt in matlab.attempts] == [False, True]
+
+    counter.write_text("1")
+    with pytest.raises(LicenseError):
+        fake_matlab().run_batch(["disp('first');"])
@@ -0,0 +1,64 @@
+import pytest
+
+from mlshim.bench import BenchDatabase
+from mlshim.bench import BenchResult
+from mlshim.bench import TESTS
+from mlshim.bench import parse_bench_output
+from mlshim.bench import run_bench
+
+
+def _times(scale, repetitions=3):
+    return [
+        dict(zip(TESTS, (scale * t for t in (1, 2, 3, 4, 5, 6))))
+        for _ in range(repetitions)
+    ]
+
+
+def test_parse_bench_output():
+    lines = [
+        "########## Started ##########",
+        "mlshim bench: 0.100000 0.200000 0.300000 0.400000 0.500000 0.6",
+        "mlshim bench: 1 2 3",
+        "########## Finished ##########",
+    ]
+    assert parse_bench_output(lines) == [
+        dict(zip(TESTS, (0.1, 0.2, 0.3, 0.4, 0.5, 0.6)))
+    ]
+
+
+def test_run_bench(fake_matlab, monkeypatch):
+    monkeypatch.setenv("FAKE_MATLAB_BENCH_SCALE", "2")
+    matlab = fake_matlab()
+    result = run_bench(matlab, count=2)
+    assert matlab.template == "run_template.m"
+    assert len(result.times) == 2
+    assert result.medians == pytest.approx(
+        dict(zip(TESTS, (0.2, 0.4, 0.6, 0.8, 1.0, 1.2)))
+    )
+
+
+def test_database_round_trip(tmp_path):
+    database = BenchDatabase(str(tmp_path / "bench.sqlite"))
+    database.add(BenchResult("host1", "R2019b", _times(1)))
+    (result,) = database.results(host="host1")
+    assert result.version == "R2019b"
+    assert result.times == _times(1)
+    assert database.medians()["host1", "R2019b", "LU"] == 1
+
+
+def test_compare(tmp_path):
+    database = BenchDatabase(str(tmp_path / "bench.sqlite"))
+    database.add(BenchResult("fast", "R2019b", _times(1)))
+    database.add(BenchResult("slow", "R2019b", _times(2)))
+    database.add(BenchResult("fast", "R2020a", _times(1.1)))
+    database.add(BenchResult("fast", "R2020b", _times(1.5)))
+    findings = database.compare(threshold=1.25)
+    hosts = {(f.host, f.version) for f in findings if f.kind == "host"}
+    versions = {
+        (f.host, f.version, f.reference)
+        for f in findings
+        if f.kind == "version"
+    }
+    assert hosts == {("slow", "R2019b")}
+    assert versions == {("fast", "R2020b", "R2020a")}
+    assert len(findings) == 2 * len(TESTS)
@@ -0,0 +1,33 @@
+import subprocess
+import sys
+
+import pytest
+
+# Modules that importing mlshim or its CLI must not pull in.
+LAZY = ("asyncio", "ctypes", "jinja2", "mlshim._version", "mlshim.matlab")
+
+
+@pytest.mark.parametrize("module", ["mlshim", "mlshim.cli"])
+def test_import_is_lazy(module):
+    code = (
+        f"import sys, {module}; "
+        f"print(' '.join(sorted(set(sys.modules) & set({LAZY!r}))))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    ).stdout
+    assert output.strip() == ""
+
+
+def test_debug_does_not_construct_matlab(tmp_path):
+    from click.testing import CliRunner
+
+    from mlshim.cli import main
+
+    result = CliRunner().invoke(
+        main, ["--base", str(tmp_path / "missing"), "debug"]
+    )
+    assert result.exit_code == 0, result.output
@@ -0,0 +1,87 @@
+import socket
+import threading
+
+from mlshim.jobqueue import JobQueue
+
+
+def test_add_is_idempotent_by_key(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite"))
+    first = queue.add(key="a", scripts=["disp('a');"])
+    assert queue.add(key="a", scripts=["disp('other');"]) == first
+    assert queue.get(first).kwargs == {"scripts": ["disp('a');"]}
+    assert queue.states == {"pending": 1}
+
+
+def test_claim_is_atomic(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite"))
+    for idx in range(50):
+        queue.add(scripts=[f"disp({idx});"])
+    claimed = []
+
+    def worker():
+        while True:
+            job = queue.claim()
+            if job is None:
+                return
+            claimed.append(job.job_id)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(claimed) == list(range(1, 51))
+    assert queue.states == {"running": 50}
+
+
+def test_recover_dead_worker(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite"))
+    job_id = queue.add()
+    # Claimed by a process that no longer exists.
+    queue.claim(worker=f"{socket.gethostname()}:999999999:1")
+    queue.claim()
+    queue.add()
+    queue.claim()
+    assert queue.recover() == [job_id]
+    assert queue.get(job_id).state == "pending"
+
+
+def test_recover_skips_changed_jobs(tmp_path, monkeypatch):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite"))
+    job_id = queue.add()
+    queue.claim(worker=f"{socket.gethostname()}:999999999:1")
+    stale = queue.jobs("running")
+    # The job finishes between the scan and the requeue.
+    queue.complete(job_id, 0)
+    monkeypatch.setattr(queue, "jobs", lambda state: stale)
+    assert queue.recover() == []
+    assert queue.get(job_id).state == "finished"
+
+
+def test_run_recovers_first(fake_root, tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite"))
+    job_id = queue.add(scripts=["disp('ok');"])
+    queue.claim(worker=f"{socket.gethostname()}:999999999:1")
+    kwargs = dict(root=fake_root, working_directory=str(tmp_path / "work"))
+    assert queue.run(max_workers=1, **kwargs) == {"finished": 1}
+    assert queue.get(job_id).attempts == 2
+
+
+def test_run_and_resume(fake_root, tmp_path):
+    path = str(tmp_path / "jobs.sqlite")
+    kwargs = dict(root=fake_root, working_directory=str(tmp_path / "work"))
+    queue = JobQueue(path, max_attempts=2)
+    ok = queue.add(key="ok", scripts=["disp('ok');"])
+    bad = queue.add(key="bad", scripts=["error('boom');"])
+    assert queue.run(max_workers=2, **kwargs) == {"finished": 1, "failed": 1}
+    assert queue.get(ok).log_file.endswith(".log")
+    assert queue.get(bad).attempts == 2
+    assert "boom" in queue.get(bad).error
+
+    # A new orchestrator only runs what is left.
+    queue = JobQueue(path)
+    queue.add(key="ok", scripts=["disp('ok');"])
+    new = queue.add(key="new", scripts=["disp('new');"])
+    queue.run(**kwargs)
+    assert queue.get(ok).attempts == 1
+    assert queue.get(new).state == "finished"
@@ -0,0 +1,89 @@
+import threading
+
+import pytest
+
+from mlshim.licenses import LicenseScheduler
+from mlshim.licenses import parse_license_file
+from mlshim.licenses import read_seats
+from mlshim.pool import CANCELLED
+from mlshim.pool import FINISHED
+from mlshim.pool import MatlabPool
+
+_LICENSE = """\
+# BEGIN--------------BEGIN--------------BEGIN
+INCREMENT MATLAB MLM 44 01-jan-0000 uncounted 0123456789AB \\
+\tVENDOR_STRING=QQ HOSTID=ANY SN=123456
+INCREMENT SIMULINK MLM 44 01-jan-0000 4 0123456789AB SN=123456
+INCREMENT RTW_Embedded_Coder MLM 44 01-jan-0000 1 0123456789AB
+INCREMENT RTW_Embedded_Coder MLM 44 01-jan-0000 1 0123456789AB
+"""
+
+
+def test_parse_license_file(tmp_path):
+    path = tmp_path / "license.lic"
+    path.write_text(_LICENSE)
+    seats = parse_license_file(str(path))
+    assert seats == {"MATLAB": None, "SIMULINK": 4, "RTW_Embedded_Coder": 2}
+    assert read_seats([str(path), str(path)])["SIMULINK"] == 8
+
+
+def test_scheduler_all_or_nothing():
+    scheduler = LicenseScheduler({"A": 1, "B": 2, "Zero": 0})
+    assert scheduler.try_acquire(["A", "B"])
+    assert not scheduler.try_acquire(["B", "A"])
+    # The B seat was not taken by the failed attempt.
+    assert scheduler.available == {"A": 0, "B": 1, "Zero": 0}
+    assert scheduler.try_acquire(["B", "Unlimited"])
+    assert not scheduler.acquire(["A"], timeout=0.05)
+    scheduler.release(["A", "B"])
+    assert scheduler.acquire(["A"], timeout=0.05)
+    with pytest.raises(ValueError):
+        scheduler.acquire(["Zero"])
+
+
+def test_pool_respects_seats(fake_root, tmp_path):
+    scheduler = LicenseScheduler({"Coder": 1})
+    with MatlabPool(
+        max_workers=4,
+        scheduler=scheduler,
+        root=fake_root,
+        template="run_template.m",
+        working_directory=str(tmp_path / "work"),
+    ) as pool:
+        coder = [
+            pool.submit(features=["Coder"], scripts=["pause(0.2);"])
+            for _ in range(3)
+        ]
+        plain = [pool.submit(scripts=["disp('x');"]) for _ in range(3)]
+        pool.wait()
+    assert pool.states == {FINISHED: 6}
+    coder.sort(key=lambda job: job.t_start)
+    for first, second in zip(coder, coder[1:]):
+        # One seat: the coder jobs never overlap.
+        assert first.t_end <= second.t_start
+    # Plain jobs did not wait behind the coder jobs.
+    assert max(job.t_end for job in plain) < coder[-1].t_start
+
+
+def test_pool_starts_jobs_on_outside_release(fake_root, tmp_path):
+    scheduler = LicenseScheduler({"Coder": 1})
+    # The only seat is held outside the pool.
+    assert scheduler.try_acquire(["Coder"])
+    pool = MatlabPool(
+        scheduler=scheduler,
+        root=fake_root,
+        template="run_template.m",
+        working_directory=str(tmp_path / "work"),
+    )
+    coder = pool.submit(features=["Coder"], scripts=["disp('x');"])
+    threading.Timer(0.3, scheduler.release, [["Coder"]]).start()
+    # Waits for the queued job instead of dropping it.
+    pool.shutdown(wait=True)
+    assert coder.state == FINISHED
+    assert scheduler.available == {"Coder": 1}
+
+    assert scheduler.try_acquire(["Coder"])
+    pool = MatlabPool(scheduler=scheduler, root=fake_root)
+    coder = pool.submit(features=["Coder"], scripts=["disp('x');"])
+    pool.shutdown(wait=True, cancel=True)
+    assert coder.state == CANCELLED
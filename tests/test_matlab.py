@@ -0,0 +1,110 @@
+import time
+
+import pytest
+
+
+def test_run_returns_exit_code(fake_matlab):
+    matlab = fake_matlab()
+    assert matlab.run(scripts=["disp('Hello World');"]) == 0
+    assert matlab.returncode == 0
+
+
+def test_run_script_error(fake_matlab):
+    matlab = fake_matlab()
+    with pytest.raises(RuntimeError, match="processing failed"):
+        matlab.run(scripts=["error('mlshim:test', 'boom');"])
+
+
+def test_crash_before_start(fake_matlab, monkeypatch):
+    monkeypatch.setenv("FAKE_MATLAB_CRASH", "3")
+    matlab = fake_matlab()
+    t_start = time.monotonic()
+    with pytest.raises(RuntimeError, match="code 3 before starting"):
+        matlab.run(scripts=["disp('Hello World');"])
+    assert time.monotonic() - t_start < 5
+    assert matlab.returncode == 3
+
+
+def test_exit_before_finished(fake_matlab):
+    matlab = fake_matlab()
+    t_start = time.monotonic()
+    with pytest.raises(RuntimeError, match="code 2"):
+        matlab.run(scripts=["exit(2);"])
+    assert time.monotonic() - t_start < 5
+    assert matlab.returncode == 2
+
+
+def test_launcher_without_wait(fake_matlab, monkeypatch):
+    # What runs on Windows look like without -wait: the launcher is gone
+    # before MATLAB® started.
+    monkeypatch.setenv("FAKE_MATLAB_LAUNCHER", "1")
+    monkeypatch.setattr("mlshim.matlab._LAUNCHER_ARGS", ())
+    matlab = fake_matlab()
+    with pytest.raises(RuntimeError, match="code 0 before starting"):
+        matlab.run(scripts=["disp('Hello World');"])
+
+
+def test_launcher_wait(fake_matlab, launcher):
+    matlab = fake_matlab()
+    assert "-wait" in matlab.cmd
+    assert matlab.run(scripts=["disp('Hello World');"]) == 0
+    with pytest.raises(RuntimeError, match="code 2"):
+        matlab.run(scripts=["exit(2);"])
+    assert matlab.returncode == 2
+
+
+def test_run_on_line(fake_matlab):
+    matlab = fake_matlab()
+    lines = []
+    matlab.run(scripts=["disp('one');", "disp('two');"], on_line=lines.append)
+    assert lines.index("one") < lines.index("two")
+    assert lines[-1] == "########## Finished ##########"
+
+
+def test_iter_output(fake_matlab):
+    matlab = fake_matlab()
+    output = matlab.iter_output(scripts=["disp('one');", "pause(0.2);"])
+    lines = []
+    for line in output:
+        lines.append(line)
+        if line == "one":
+            # The line arrives while MATLAB® is still running.
+            assert matlab.proc.poll() is None
+    assert "one" in lines
+    assert matlab.returncode == 0
+
+
+def test_iter_output_chunks(fake_matlab, monkeypatch):
+    from mlshim.tail import LogTailer
+
+    reads = []
+
+    class SmallChunks(LogTailer):
+        def __init__(self, path):
+            super().__init__(path, chunk_size=256)
+
+        def read_lines(self, final=False):
+            offset = self.offset
+            lines = super().read_lines(final)
+            reads.append(self.offset - offset)
+            return lines
+
+    monkeypatch.setattr("mlshim.matlab.LogTailer", SmallChunks)
+    monkeypatch.setenv("FAKE_MATLAB_OUTPUT_BYTES", "65536")
+    matlab = fake_matlab()
+    t_start = time.monotonic()
+    lines = list(matlab.iter_output(scripts=["disp('one');"]))
+    # Chunks follow each other without waiting for more output.
+    assert time.monotonic() - t_start < 5
+    assert max(reads) <= 256
+    assert sum(reads) > 64000
+    assert lines[-2:] == ["one", "########## Finished ##########"]
+
+
+def test_iter_output_error(fake_matlab):
+    matlab = fake_matlab()
+    lines = []
+    with pytest.raises(RuntimeError, match="boom"):
+        for line in matlab.iter_output(scripts=["error('boom');"]):
+            lines.append(line)
+    assert "ERROR: boom ()" in lines
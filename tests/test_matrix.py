@@ -0,0 +1,53 @@
+import os
+import shutil
+import time
+
+from click.testing import CliRunner
+
+from mlshim.cli import main
+from mlshim.matrix import format_table
+from mlshim.matrix import run_across_versions
+from mlshim.utils import version_registry
+
+
+def add_version(root, version):
+    shutil.copytree(
+        os.path.join(root, "R2099a"), os.path.join(root, version)
+    )
+    version_registry.invalidate(root)
+
+
+def test_run_across_versions(fake_root, tmp_path):
+    add_version(fake_root, "R2098b")
+    t_start = time.monotonic()
+    results = run_across_versions(
+        "pause(0.5);", root=fake_root, working_directory=str(tmp_path)
+    )
+    elapsed = time.monotonic() - t_start
+    assert [r.version for r in results] == ["R2098b", "R2099a"]
+    assert all(r.ok and r.returncode == 0 for r in results)
+    assert all(os.path.exists(r.log_file) for r in results)
+    # Concurrent: well below the sum of both runs.
+    assert elapsed < sum(r.duration for r in results)
+    assert "R2098b" in format_table(results)
+
+
+def test_run_across_versions_failure(fake_root, tmp_path):
+    results = run_across_versions(
+        "error('boom');",
+        versions=["R2099a"],
+        max_parallel=1,
+        root=fake_root,
+        working_directory=str(tmp_path),
+    )
+    assert results[0].status == "failed"
+    assert "boom" in str(results[0].error)
+
+
+def test_cli_matrix(fake_root, tmp_path):
+    args = ["--base", fake_root, "-wd", str(tmp_path), "matrix"]
+    result = CliRunner().invoke(main, args + ["disp('Hello');"])
+    assert result.exit_code == 0, result.output
+    assert "R2099a" in result.output
+    result = CliRunner().invoke(main, args + ["error('boom');"])
+    assert result.exit_code == 1
@@ -0,0 +1,80 @@
+import json
+
+import pytest
+
+from mlshim.exceptions import MatlabError
+from mlshim.metrics import MetricsRegistry
+from mlshim.metrics import RunResult
+
+
+def test_run_result_phases(fake_matlab):
+    registry = MetricsRegistry()
+    matlab = fake_matlab(metrics=registry)
+    matlab.run(scripts=["pause(0.2);"])
+    result = matlab.result
+    assert result.status == "finished"
+    assert result.returncode == 0
+    assert set(result.phases) == {
+        "render",
+        "spawn",
+        "log_wait",
+        "boot",
+        "execute",
+        "exit",
+    }
+    assert all(seconds >= 0 for seconds in result.phases.values())
+    assert result.phases["execute"] >= 0.2
+    assert registry.runs == {(matlab.version, "finished"): 1}
+    assert registry.phases[("execute", matlab.version)].count == 1
+
+
+def test_failed_run_recorded(fake_matlab):
+    registry = MetricsRegistry()
+    matlab = fake_matlab(metrics=registry)
+    with pytest.raises(MatlabError):
+        matlab.run(scripts=["error('Oops');"])
+    assert matlab.result.status == "failed"
+    assert matlab.result.error == "MatlabError"
+    assert "execute" in matlab.result.phases
+    assert registry.runs == {(matlab.version, "failed"): 1}
+
+
+def _registry():
+    registry = MetricsRegistry(buckets=(1, 10))
+    for seconds in (0.5, 5, 50):
+        result = RunResult("R2019b")
+        result.marks = {"started": 0.0, "finished": seconds}
+        result.status = "finished"
+        registry.observe(result)
+    return registry
+
+
+def test_prometheus_export(tmp_path):
+    path = tmp_path / "mlshim.prom"
+    _registry().write(str(path))
+    text = path.read_text()
+    labels = 'phase="execute",version="R2019b"'
+    assert f'mlshim_phase_seconds_bucket{{{labels},le="1.0"}} 1' in text
+    assert f'mlshim_phase_seconds_bucket{{{labels},le="10.0"}} 2' in text
+    assert f'mlshim_phase_seconds_bucket{{{labels},le="+Inf"}} 3' in text
+    assert f"mlshim_phase_seconds_sum{{{labels}}} 55.5" in text
+    assert f"mlshim_phase_seconds_count{{{labels}}} 3" in text
+    assert 'mlshim_runs_total{status="finished",version="R2019b"} 3' in text
+
+
+def test_json_export(tmp_path):
+    path = tmp_path / "mlshim.json"
+    _registry().write(str(path))
+    data = json.loads(path.read_text())
+    assert data["phases"] == [
+        {
+            "phase": "execute",
+            "version": "R2019b",
+            "count": 3,
+            "sum": 55.5,
+            "buckets": {"1.0": 1, "10.0": 2},
+        }
+    ]
+    assert data["runs"] == [
+        {"version": "R2019b", "status": "finished", "count": 3}
+    ]
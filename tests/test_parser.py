@@ -0,0 +1,136 @@
+import pytest
+
+from mlshim.consts import _FAILED
+from mlshim.consts import _FINISHED
+from mlshim.consts import _STARTED
+from mlshim.exceptions import MatlabError
+from mlshim.parser import ErrorEvent
+from mlshim.parser import FailedEvent
+from mlshim.parser import FinishedEvent
+from mlshim.parser import JobFailedEvent
+from mlshim.parser import JobStartedEvent
+from mlshim.parser import LicenseErrorEvent
+from mlshim.parser import LogParser
+from mlshim.parser import LogScanner
+from mlshim.parser import StartedEvent
+from mlshim.parser import parse_log
+from mlshim.tail import LogTailer
+
+_LOG = [
+    _STARTED,
+    "some output",
+    _FAILED,
+    "ERROR: Undefined function 'foo'. (MATLAB:UndefinedFunction)",
+    "",
+    "[Line 12]: /work/outer.m",
+    "[Line 03]: /work/inner.m",
+    "failed =",
+    _FINISHED,
+]
+
+
+def feed(parser, lines):
+    events = list()
+    for line in lines:
+        events.extend(parser.feed(line))
+    return events + parser.close()
+
+
+def test_parser_events():
+    events = feed(LogParser(), _LOG)
+    assert events == [
+        StartedEvent(1),
+        FailedEvent(3),
+        ErrorEvent(
+            4,
+            "Undefined function 'foo'.",
+            "MATLAB:UndefinedFunction",
+            ((12, "/work/outer.m"), (3, "/work/inner.m")),
+        ),
+        FinishedEvent(9),
+    ]
+
+
+def test_parser_multiline_message():
+    lines = [_FAILED, "ERROR: first line", "second line (pkg:id)", ""]
+    events = feed(LogParser(), lines)
+    assert events[-1] == ErrorEvent(
+        2, "first line\nsecond line", "pkg:id", ()
+    )
+
+
+def test_parser_flushes_report_on_close():
+    lines = [_FAILED, "ERROR: boom ()", "", "[Line 1]: a.m"]
+    events = feed(LogParser(), lines)
+    assert events[-1] == ErrorEvent(2, "boom", "", ((1, "a.m"),))
+
+
+def test_parser_ignores_error_lines_outside_report():
+    lines = ["ERROR: not ours (x:y)", "Error checking out license"]
+    events = feed(LogParser(), lines)
+    assert events == [LicenseErrorEvent(2, "Error checking out license")]
+
+
+def test_parser_license_error_lines():
+    line = "Error checking out license: Maximum users reached"
+    lines = ["License Manager: Error checking out license", line]
+    assert feed(LogParser(), lines) == [LicenseErrorEvent(2, line)]
+    # A script that failed to check out a toolbox license.
+    lines = [_STARTED, _FAILED, line, "ERROR: boom (pkg:id)"]
+    events = feed(LogParser(), lines)
+    assert events[:3] == [
+        StartedEvent(1),
+        FailedEvent(2),
+        LicenseErrorEvent(3, line),
+    ]
+
+
+def test_scanner_live(tmp_path):
+    log = tmp_path / "run.log"
+    log.write_text("\n".join(_LOG[:5]) + "\n")
+    with LogTailer(str(log)) as tailer:
+        scanner = LogScanner(tailer)
+        scanner.poll()
+        assert scanner.started and scanner.failed
+        assert scanner.error is None
+        with open(log, "a") as fid:
+            fid.write("\n".join(_LOG[5:]) + "\n")
+        scanner.poll()
+        assert scanner.finished
+        error = scanner.exception(str(log))
+    assert isinstance(error, RuntimeError)
+    assert error.identifier == "MATLAB:UndefinedFunction"
+    assert error.stack[0] == (12, "/work/outer.m")
+    assert error.log_file == str(log)
+    assert "processing failed: Undefined function" in str(error)
+
+
+def test_parse_log(tmp_path):
+    log = tmp_path / "run.log"
+    log.write_text("\r\n".join(_LOG))
+    assert list(parse_log(str(log))) == feed(LogParser(), _LOG)
+
+
+def test_run_raises_matlab_error(fake_matlab):
+    matlab = fake_matlab()
+    with pytest.raises(MatlabError) as info:
+        matlab.run(scripts=["error('mlshim:test', 'boom');"])
+    assert info.value.message == "boom"
+    assert info.value.identifier == "mlshim:test"
+    assert info.value.log_file == matlab.log_file
+
+
+def test_parser_job_events():
+    lines = [
+        "########## Job job_0001 Started ##########",
+        "########## Job job_0001 Failed ##########",
+        "ERROR: boom (a:b)",
+        "",
+        "########## Job job_0002 Started ##########",
+    ]
+    assert feed(LogParser(), lines) == [
+        JobStartedEvent(1, "job_0001"),
+        JobFailedEvent(2, "job_0001"),
+        ErrorEvent(3, "boom", "a:b", ()),
+        JobStartedEvent(5, "job_0002"),
+    ]
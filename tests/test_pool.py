@@ -0,0 +1,44 @@
+import pytest
+
+from mlshim.pool import FAILED
+from mlshim.pool import FINISHED
+from mlshim.pool import MatlabPool
+
+
+@pytest.fixture
+def pool(fake_root, tmp_path):
+    with MatlabPool(
+        max_workers=4,
+        root=fake_root,
+        template="run_template.m",
+        working_directory=str(tmp_path / "work"),
+    ) as pool:
+        yield pool
+
+
+def test_pool_map(pool):
+    kwargs = [{"scripts": [f"disp('Job {idx}');"]} for idx in range(8)]
+    assert list(pool.map(kwargs)) == [0] * 8
+    assert pool.states == {FINISHED: 8}
+    assert len({job.matlab.log_file for job in pool.jobs}) == 8
+
+
+def test_pool_collects_errors(pool):
+    good = pool.submit(scripts=["disp('ok');"])
+    bad = pool.submit(scripts=["error('boom');"])
+    jobs = list(pool.as_completed())
+    assert set(jobs) == {good, bad}
+    assert good.state == FINISHED
+    assert good.returncode == 0
+    assert good.duration > 0
+    assert bad.state == FAILED
+    assert isinstance(bad.error, RuntimeError)
+    with pytest.raises(RuntimeError):
+        bad.result()
+
+
+def test_pool_rejects_jobs_after_shutdown(pool):
+    pool.shutdown()
+    with pytest.raises(RuntimeError, match="after shutdown"):
+        pool.submit(scripts=["disp('late');"])
+    assert pool.jobs == []
@@ -0,0 +1,75 @@
+import os
+import threading
+
+from mlshim import prefdir
+from mlshim.prefdir import clone_tree
+from mlshim.prefdir import get_golden
+from mlshim.prefdir import golden_path
+from mlshim.utils import find_executable
+
+
+def test_clone_tree(tmp_path):
+    src = tmp_path / "src"
+    (src / "sub").mkdir(parents=True)
+    (src / "a.prf").write_text("a")
+    (src / "sub" / "b.xml").write_text("b")
+    clone_tree(str(src), str(tmp_path / "dst"))
+    (tmp_path / "dst" / "a.prf").write_text("changed")
+    assert (src / "a.prf").read_text() == "a"
+    assert (tmp_path / "dst" / "sub" / "b.xml").read_text() == "b"
+
+    clone_tree(str(src), str(tmp_path / "linked"), hardlink=True)
+    assert os.path.samefile(src / "a.prf", tmp_path / "linked" / "a.prf")
+
+
+def test_golden_built_once(fake_root, tmp_path, monkeypatch):
+    builds = []
+    build_golden = prefdir.build_golden
+
+    def counting_build(*args):
+        builds.append(args)
+        return build_golden(*args)
+
+    monkeypatch.setattr(prefdir, "build_golden", counting_build)
+    base = str(tmp_path / "golden")
+    threads = [
+        threading.Thread(target=get_golden, args=(fake_root, "R2099a", base))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(builds) == 1
+    path = golden_path(fake_root, "R2099a", base)
+    assert os.listdir(base) == [os.path.basename(path)]
+    assert os.path.exists(os.path.join(path, "matlab.prf"))
+
+
+def test_run_with_golden_prefdir(fake_matlab, tmp_path):
+    base = str(tmp_path / "golden")
+    matlabs = [fake_matlab(golden_prefdir=base) for _ in range(2)]
+    for matlab in matlabs:
+        assert matlab.run(scripts=["disp('Hello');"]) == 0
+    golden = os.path.join(
+        golden_path(matlabs[0].root, matlabs[0].version, base), "matlab.prf"
+    )
+    with open(golden) as fid:
+        content = fid.read()
+    for matlab in matlabs:
+        prf = os.path.join(matlab.pref_dir, "matlab.prf")
+        assert not os.path.samefile(prf, golden)
+        with open(prf) as fid:
+            # Cloned from the golden directory, not created by the run.
+            assert fid.read() == content
+
+
+def test_golden_rebuilt_on_update(fake_root, tmp_path):
+    base = str(tmp_path / "golden")
+    old = get_golden(fake_root, "R2099a", base)
+    exe = find_executable(os.path.join(fake_root, "R2099a"))
+    stat = os.stat(exe)
+    os.utime(exe, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    new = get_golden(fake_root, "R2099a", base)
+    assert new != old
+    assert os.listdir(base) == [os.path.basename(new)]
@@ -0,0 +1,121 @@
+import os
+import time
+import uuid
+
+from click.testing import CliRunner
+
+from mlshim.cli import main
+from mlshim.retention import RetentionPolicy
+from mlshim.retention import claim
+from mlshim.retention import collect_garbage
+from mlshim.retention import parse_age
+from mlshim.retention import parse_size
+from mlshim.retention import scan
+
+
+def make_run(directory, age=0, pid=None, size=0):
+    run_id = uuid.uuid4().hex
+    script = directory / f"mlshim_{run_id}.m"
+    script.write_text("x" * size)
+    (directory / f"mlshim_{run_id}.log").write_text("")
+    prefdir = directory / f"prefdir_{run_id}"
+    prefdir.mkdir()
+    (prefdir / "matlab.prf").write_text("")
+    if pid is not None:
+        (directory / f"mlshim_{run_id}.pid").write_text(f"{pid}\n")
+    mtime = time.time() - age
+    for path in (script, directory / f"mlshim_{run_id}.log", prefdir):
+        os.utime(path, (mtime, mtime))
+    return run_id
+
+
+def test_parse():
+    assert parse_age("90") == 90
+    assert parse_age("2h") == 7200
+    assert parse_age("7d") == 7 * 86400
+    assert parse_size("512") == 512
+    assert parse_size("10M") == 10 << 20
+    assert parse_size("1.5kb") == 1536
+
+
+def test_scan_groups_runs(tmp_path):
+    old = make_run(tmp_path, age=100)
+    new = make_run(tmp_path)
+    (tmp_path / "unrelated.log").write_text("")
+    runs = scan(str(tmp_path))
+    assert [run.run_id for run in runs] == [new, old]
+    assert len(runs[0].paths) == 3
+
+
+def test_policies(tmp_path):
+    runs = [make_run(tmp_path, age=age, size=1000) for age in (0, 50, 100)]
+    policy = RetentionPolicy(max_age=75)
+    assert [r.run_id for r in policy.select(scan(str(tmp_path)))] == runs[2:]
+    policy = RetentionPolicy(max_count=1)
+    assert [r.run_id for r in policy.select(scan(str(tmp_path)))] == runs[1:]
+    policy = RetentionPolicy(max_bytes=2500)
+    assert [r.run_id for r in policy.select(scan(str(tmp_path)))] == runs[2:]
+
+
+def test_live_runs_are_kept(tmp_path):
+    alive = make_run(tmp_path, age=100, pid=os.getpid())
+    claimed = make_run(tmp_path, age=100)
+    dead = make_run(tmp_path, age=100)
+    with claim(claimed):
+        removed = collect_garbage(str(tmp_path), RetentionPolicy(max_count=0))
+    assert [run.run_id for run in removed] == [dead]
+    assert {run.run_id for run in scan(str(tmp_path))} == {alive, claimed}
+
+
+def test_post_run_cleanup(fake_matlab):
+    matlabs = [
+        fake_matlab(retention=RetentionPolicy(max_count=1)) for _ in range(3)
+    ]
+    for matlab in matlabs:
+        matlab.run(scripts=["disp('Hello');"])
+    runs = scan(matlabs[0].working_directory)
+    assert [run.run_id for run in runs] == [matlabs[-1]._uuid]
+    assert os.path.exists(matlabs[-1].log_file)
+
+
+def test_cli_gc(tmp_path):
+    make_run(tmp_path, age=100)
+    keep = make_run(tmp_path)
+    result = CliRunner().invoke(
+        main, ["gc", str(tmp_path), "-n", "--max-age", "1m"]
+    )
+    assert result.exit_code == 0, result.output
+    assert "Would remove" in result.output
+    assert len(scan(str(tmp_path))) == 2
+    result = CliRunner().invoke(main, ["gc", str(tmp_path), "--max-count", "1"])
+    assert result.exit_code == 0, result.output
+    assert [run.run_id for run in scan(str(tmp_path))] == [keep]
+
+
+def test_pid_file_written_before_script(fake_matlab, monkeypatch):
+    matlab = fake_matlab()
+    pids = []
+    write_script = matlab._write_script
+
+    def check(body):
+        with open(matlab.pid_file) as fid:
+            pids.append(fid.read().split())
+        write_script(body)
+
+    monkeypatch.setattr(matlab, "_write_script", check)
+    matlab.run(scripts=["disp('Hello');"])
+    assert pids == [[str(os.getpid())]]
+    # Only MATLAB® is left in the pid file.
+    with open(matlab.pid_file) as fid:
+        assert fid.read().split() == [str(matlab.proc.pid)]
+
+
+def test_unwaited_launcher_run_is_live(fake_matlab, launcher):
+    matlab = fake_matlab(timeout=None)
+    matlab.run(scripts=["pause(1);"])
+    policy = RetentionPolicy(max_count=0)
+    assert collect_garbage(matlab.working_directory, policy) == []
+    assert os.path.exists(matlab.log_file)
+    matlab.proc.wait(10)
+    removed = collect_garbage(matlab.working_directory, policy)
+    assert [run.run_id for run in removed] == [matlab._uuid]
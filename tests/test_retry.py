@@ -0,0 +1,74 @@
+import time
+
+import pytest
+
+from mlshim.exceptions import LicenseError
+from mlshim.exceptions import MatlabError
+from mlshim.retry import RetryPolicy
+
+
+@pytest.fixture
+def license_failures(tmp_path, monkeypatch):
+    """Make the fake MATLAB® fail the next ``n`` license checkouts."""
+    counter = tmp_path / "license_failures"
+
+    def setter(n):
+        counter.write_text(str(n))
+        monkeypatch.setenv("FAKE_MATLAB_LICENSE_FAILURES", str(counter))
+
+    return setter
+
+
+def test_delay_bounds():
+    policy = RetryPolicy(base_delay=2, max_delay=10)
+    for number, cap in ((1, 2), (2, 4), (3, 8), (4, 10), (10, 10)):
+        assert cap / 2 <= policy.delay(number) <= cap
+
+
+def test_license_error_fails_fast(fake_matlab, license_failures, monkeypatch):
+    license_failures(1)
+    monkeypatch.setenv("FAKE_MATLAB_LICENSE_HANG", "1")
+    matlab = fake_matlab()
+    t_start = time.time()
+    with pytest.raises(LicenseError, match="Maximum users reached"):
+        matlab.run(scripts=["disp('x');"])
+    assert time.time() - t_start < 10
+    assert len(matlab.attempts) == 1
+
+
+def test_retry_license_error(fake_matlab, license_failures):
+    license_failures(2)
+    matlab = fake_matlab(retry=RetryPolicy(base_delay=0.01))
+    assert matlab.run(scripts=["disp('x');"]) == 0
+    assert [attempt.ok for attempt in matlab.attempts] == [False, False, True]
+    assert isinstance(matlab.attempts[0].error, LicenseError)
+    assert all(attempt.delay is not None for attempt in matlab.attempts[:2])
+
+
+def test_retry_gives_up(fake_matlab, license_failures):
+    license_failures(5)
+    matlab = fake_matlab(retry=RetryPolicy(max_attempts=2, base_delay=0.01))
+    with pytest.raises(LicenseError):
+        matlab.run(scripts=["disp('x');"])
+    assert len(matlab.attempts) == 2
+    assert matlab.attempts[-1].delay is None
+
+
+def test_script_error_not_retried(fake_matlab):
+    matlab = fake_matlab(retry=RetryPolicy(base_delay=0.01))
+    with pytest.raises(MatlabError):
+        matlab.run(scripts=["error('Oops');"])
+    assert len(matlab.attempts) == 1
+
+
+def test_retry_toolbox_checkout(fake_matlab, tmp_path, monkeypatch):
+    counter = tmp_path / "toolbox_failures"
+    counter.write_text("1")
+    monkeypatch.setenv("FAKE_MATLAB_TOOLBOX_FAILURES", str(counter))
+    scripts = ["license('checkout', 'Signal_Toolbox');", "disp('x');"]
+    matlab = fake_matlab(retry=RetryPolicy(base_delay=0.01))
+    assert matlab.run(scripts=scripts) == 0
+    assert [attempt.ok for attempt in matlab.attempts] == [False, True]
+    error = matlab.attempts[0].error
+    assert isinstance(error, LicenseError)
+    assert "Signal_Toolbox" in str(error)
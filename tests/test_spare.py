@@ -0,0 +1,74 @@
+import time
+
+import pytest
+
+from mlshim.pool import FINISHED
+from mlshim.spare import SparePool
+
+
+@pytest.fixture
+def spare_pool(fake_root, tmp_path, monkeypatch):
+    monkeypatch.setenv("FAKE_MATLAB_STARTUP_DELAY", "0.5")
+
+    def factory(**kwargs):
+        return SparePool(
+            root=fake_root,
+            working_directory=str(tmp_path / "work"),
+            **kwargs,
+        )
+
+    return factory
+
+
+def _wait_for(predicate, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+
+
+def test_spare_is_ready_before_the_job(spare_pool):
+    with spare_pool(max_spares=2) as pool:
+        _wait_for(lambda: pool.spares >= 1)
+        t_start = time.monotonic()
+        worker = pool.acquire(timeout=10)
+        assert time.monotonic() - t_start < 0.1
+        assert worker.alive
+        assert worker.submit(scripts=["disp('x');"]).wait(10) == FINISHED
+        pool.release(worker)
+        # A replacement boots in the background.
+        _wait_for(lambda: pool.spares >= 1)
+
+
+def test_spare_pool_run(spare_pool):
+    with spare_pool(max_spares=2) as pool:
+        for _ in range(3):
+            assert pool.run(scripts=["disp('x');"], timeout=10) == FINISHED
+
+
+def test_spares_scale_to_zero_when_idle(spare_pool):
+    with spare_pool(max_spares=2, idle_timeout=2) as pool:
+        _wait_for(lambda: pool.spares >= 1)
+        _wait_for(lambda: pool.target == 0 and pool.spares == 0)
+
+
+def test_spares_behind_launcher_are_used(spare_pool, launcher, caplog):
+    with spare_pool(max_spares=1) as pool:
+        _wait_for(lambda: pool.spares >= 1)
+        t_start = time.monotonic()
+        worker = pool.acquire(timeout=10)
+        # The warm spare was taken, not discarded for a new boot.
+        assert time.monotonic() - t_start < 0.1
+        assert worker.alive
+        assert worker.submit(scripts=["disp('x');"]).wait(10) == FINISHED
+        pool.release(worker)
+    assert "Discarding dead spare" not in caplog.text
+
+
+def test_release_after_close(spare_pool):
+    pool = spare_pool(max_spares=1)
+    with pool:
+        worker = pool.acquire(timeout=10)
+    # The executor is shut down, the worker is stopped right away.
+    pool.release(worker)
+    assert not worker.alive
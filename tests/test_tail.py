@@ -0,0 +1,69 @@
+from mlshim.consts import _STARTED
+from mlshim.tail import LogTailer
+
+
+def test_tailer_missing_file(tmp_path):
+    tailer = LogTailer(str(tmp_path / "missing.log"))
+    assert tailer.read_lines() == []
+
+
+def test_tailer_reads_only_new_lines(tmp_path):
+    log = tmp_path / "run.log"
+    log.write_bytes(b"one\r\ntwo\n")
+    with LogTailer(str(log)) as tailer:
+        assert tailer.read_lines() == ["one", "two"]
+        assert tailer.read_lines() == []
+        with open(log, "ab") as fid:
+            fid.write(b"three\n")
+        assert tailer.read_lines() == ["three"]
+        assert tailer.offset == log.stat().st_size
+
+
+def test_tailer_partial_lines(tmp_path):
+    log = tmp_path / "run.log"
+    log.write_bytes(b"########## Sta")
+    with LogTailer(str(log)) as tailer:
+        assert tailer.read_lines() == []
+        with open(log, "ab") as fid:
+            fid.write(b"rted ##########\nhalf")
+        assert tailer.read_lines() == [_STARTED]
+        assert tailer.read_lines(final=True) == ["half"]
+
+
+def test_tailer_truncated(tmp_path):
+    log = tmp_path / "run.log"
+    log.write_bytes(b"a long first line\n")
+    with LogTailer(str(log)) as tailer:
+        assert tailer.read_lines() == ["a long first line"]
+        log.write_bytes(b"new\n")
+        assert tailer.read_lines() == ["new"]
+
+
+
+def test_tailer_reads_in_chunks(tmp_path):
+    log = tmp_path / "run.log"
+    log.write_bytes(b"one\ntwo\nthree\n")
+    with LogTailer(str(log), chunk_size=5) as tailer:
+        assert tailer.read_lines() == ["one"]
+        assert tailer.pending
+        lines = []
+        while tailer.pending:
+            lines += tailer.read_lines(final=True)
+        assert lines == ["two", "three"]
+
+
+def test_tailer_long_lines(tmp_path):
+    log = tmp_path / "run.log"
+    log.write_bytes(b"")
+    with LogTailer(str(log), max_line=10) as tailer:
+        for _ in range(2):
+            with open(log, "ab") as fid:
+                fid.write(b"....")
+            assert tailer.read_lines() == []
+        with open(log, "ab") as fid:
+            fid.write(b"....")
+        # Held back lines are capped, not buffered without limit.
+        assert tailer.read_lines() == ["." * 12]
+        with open(log, "ab") as fid:
+            fid.write(b"..\nend\n")
+        assert tailer.read_lines() == ["..", "end"]
@@ -0,0 +1,34 @@
+import os
+
+from jinja2 import FileSystemBytecodeCache
+
+from mlshim.templating import get_environment
+
+
+def test_environment_is_shared(fake_matlab):
+    first, second = fake_matlab(), fake_matlab()
+    assert first._env is second._env
+    assert first._template is second._template
+
+
+def test_environment_per_search_path(tmp_path):
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    env_a = get_environment([str(tmp_path / "a")])
+    assert get_environment([str(tmp_path / "a")]) is env_a
+    assert get_environment([str(tmp_path / "b")]) is not env_a
+    assert isinstance(env_a.bytecode_cache, FileSystemBytecodeCache)
+
+
+def test_environment_auto_reload(tmp_path):
+    template = tmp_path / "t.m"
+    template.write_text("first")
+    env = get_environment([str(tmp_path)])
+    assert not env.auto_reload
+    assert env.get_template("t.m").render() == "first"
+    template.write_text("second")
+    os.utime(template, ns=(0, 10**18))
+    assert env.get_template("t.m").render() == "first"
+    reloading = get_environment([str(tmp_path)], auto_reload=True)
+    assert reloading is not env
+    assert reloading.get_template("t.m").render() == "second"
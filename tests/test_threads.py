@@ -0,0 +1,25 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+
+def test_concurrent_runs_are_isolated(fake_matlab, tmp_path):
+    cwd = os.getcwd()
+    prefdir = os.environ.get("MATLAB_PREFDIR")
+    matlabs = [
+        fake_matlab(working_directory=str(tmp_path / f"work_{idx}"))
+        for idx in range(48)
+    ]
+
+    def run(matlab):
+        return matlab.run(scripts=["disp(prefdir);", "disp(pwd);"])
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        assert list(executor.map(run, matlabs)) == [0] * len(matlabs)
+
+    assert os.getcwd() == cwd
+    assert os.environ.get("MATLAB_PREFDIR") == prefdir
+    for matlab in matlabs:
+        with open(matlab.log_file) as fid:
+            lines = fid.read().splitlines()
+        assert matlab.pref_dir in lines
+        assert matlab.start_directory in lines
@@ -0,0 +1,105 @@
+import os
+import sys
+
+import pytest
+
+from mlshim import utils
+from mlshim.utils import VersionRegistry
+from mlshim.utils import version_key
+
+
+def _install(root, version):
+    bindir = os.path.join(root, version, "bin")
+    os.makedirs(bindir)
+    open(os.path.join(bindir, "matlab.exe"), "w").close()
+
+
+def test_version_key():
+    versions = ["R2016b", "R2009b", "R2017a", "R2016a", "R2010a"]
+    assert sorted(versions, key=version_key) == [
+        "R2009b",
+        "R2010a",
+        "R2016a",
+        "R2016b",
+        "R2017a",
+    ]
+
+
+def test_registry_scans_once(fake_matlab, fake_root, monkeypatch):
+    calls = list()
+    scan = VersionRegistry.scan
+    monkeypatch.setattr(
+        VersionRegistry,
+        "scan",
+        staticmethod(lambda root: calls.append(root) or scan(root)),
+    )
+    utils.version_registry.invalidate()
+    matlabs = [fake_matlab() for _ in range(1000)]
+    assert {matlab.version for matlab in matlabs} == {"R2099a"}
+    assert len(calls) == 1
+
+
+def test_registry_invalidates_on_mtime(tmp_path):
+    root = str(tmp_path)
+    _install(root, "R2016b")
+    registry = VersionRegistry(ttl=0)
+    assert registry.versions(root) == ["R2016b"]
+    _install(root, "R2009b")
+    os.utime(root, ns=(0, 0))
+    assert registry.versions(root) == ["R2009b", "R2016b"]
+
+
+def test_registry_ttl(tmp_path):
+    root = str(tmp_path)
+    _install(root, "R2016b")
+    registry = VersionRegistry(ttl=3600)
+    assert registry.versions(root) == ["R2016b"]
+    _install(root, "R2017a")
+    assert registry.versions(root) == ["R2016b"]
+    registry.invalidate(root)
+    assert registry.versions(root) == ["R2016b", "R2017a"]
+
+
+def test_resolve_executable_is_memoized(fake_root, monkeypatch):
+    utils.version_registry.invalidate()
+    utils._resolve_executable.cache_clear()
+    exe = utils.resolve_executable(fake_root, "R2099a")
+    assert exe == os.path.join(fake_root, "R2099a", "bin", "matlab.exe")
+    exists = list()
+    monkeypatch.setattr(
+        utils.os.path, "exists", lambda path: exists.append(path) or True
+    )
+    for _ in range(100):
+        assert utils.resolve_executable(fake_root, "R2099a") == exe
+    assert exists == []
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="POSIX executable name")
+def test_resolve_executable_follows_install(tmp_path):
+    root = str(tmp_path)
+    _install(root, "R2016b")
+    utils.version_registry.invalidate(root)
+    first = utils.resolve_executable(root, "R2016b")
+    bindir = os.path.join(root, "R2016b", "bin")
+    open(os.path.join(bindir, "matlab"), "w").close()
+    _install(root, "R2017a")
+    os.utime(root, ns=(0, 0))
+    utils.version_registry.invalidate(root)
+    second = utils.resolve_executable(root, "R2016b")
+    assert first.endswith("matlab.exe")
+    assert second == os.path.join(bindir, "matlab")
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="POSIX executable name")
+def test_resolve_executable_follows_bin_dir(tmp_path):
+    root = str(tmp_path)
+    _install(root, "R2016b")
+    utils.version_registry.invalidate(root)
+    first = utils.resolve_executable(root, "R2016b")
+    bindir = os.path.join(root, "R2016b", "bin")
+    open(os.path.join(bindir, "matlab"), "w").close()
+    # Only the bin directory changed, the root scan is still fresh.
+    os.utime(bindir, ns=(0, 0))
+    second = utils.resolve_executable(root, "R2016b")
+    assert first.endswith("matlab.exe")
+    assert second == os.path.join(bindir, "matlab")
@@ -0,0 +1,57 @@
+import threading
+import time
+
+import pytest
+
+from mlshim.watch import InotifyWatcher
+from mlshim.watch import PollingWatcher
+from mlshim.watch import watch
+
+
+def _append_later(path, delay=0.2):
+    def append():
+        time.sleep(delay)
+        with open(path, "a") as fid:
+            fid.write("line\n")
+
+    thread = threading.Thread(target=append)
+    thread.start()
+    return thread
+
+
+@pytest.mark.parametrize("factory", [PollingWatcher, watch])
+def test_watcher_wakes_on_creation(tmp_path, factory):
+    path = str(tmp_path / "run.log")
+    with factory(path) as watcher:
+        thread = _append_later(path)
+        t_start = time.monotonic()
+        assert watcher.wait(5)
+        assert time.monotonic() - t_start < 2
+        thread.join()
+
+
+@pytest.mark.parametrize("factory", [PollingWatcher, watch])
+def test_watcher_times_out(tmp_path, factory):
+    path = tmp_path / "run.log"
+    path.write_text("")
+    with factory(str(path)) as watcher:
+        assert not watcher.wait(0.1)
+
+
+def test_inotify_ignores_other_files(tmp_path):
+    try:
+        watcher = InotifyWatcher(str(tmp_path / "run.log"))
+    except OSError:
+        pytest.skip("inotify not available")
+    with watcher:
+        (tmp_path / "other.log").write_text("line\n")
+        assert not watcher.wait(0.1)
+
+
+def test_run_completes_without_polling_delay(fake_matlab):
+    matlab = fake_matlab()
+    t_start = time.monotonic()
+    matlab.run(scripts=["disp('Hello World');"])
+    assert time.monotonic() - t_start < 5
+    with open(matlab.log_file) as fid:
+        assert "Hello World" in fid.read()
@@ -0,0 +1,64 @@
+import os
+import time
+
+import pytest
+
+from mlshim.pool import FAILED
+from mlshim.pool import FINISHED
+
+
+def test_worker_runs_jobs(fake_matlab):
+    matlab = fake_matlab()
+    with matlab.start_worker() as worker:
+        assert worker.alive
+        jobs = [
+            worker.submit(scripts=[f"disp('Job {idx}');"]) for idx in range(20)
+        ]
+        for idx, job in enumerate(jobs):
+            assert job.wait(timeout=10) == FINISHED
+            assert f"Job {idx}" in job.lines
+            assert not os.path.exists(job.status_file)
+            assert not os.path.exists(job.running_script)
+    assert not worker.alive
+    assert not os.path.exists(worker.spool_dir)
+    assert matlab.proc.returncode == 0
+
+
+def test_worker_isolates_failures(fake_matlab):
+    with fake_matlab().start_worker() as worker:
+        bad = worker.submit(scripts=["error('mlshim:job', 'boom');"])
+        good = worker.submit(scripts=["disp('still alive');"])
+        with pytest.raises(RuntimeError, match="boom"):
+            bad.wait(timeout=10)
+        assert bad.state == FAILED
+        assert bad.error == "boom (mlshim:job)"
+        assert "ERROR: boom (mlshim:job)" in bad.lines
+        assert good.wait(timeout=10) == FINISHED
+
+
+def test_worker_amortizes_startup(fake_matlab, monkeypatch):
+    monkeypatch.setenv("FAKE_MATLAB_STARTUP_DELAY", "0.5")
+    with fake_matlab().start_worker() as worker:
+        t_start = time.monotonic()
+        jobs = [worker.submit(scripts=["disp('x');"]) for _ in range(10)]
+        for job in jobs:
+            job.wait(timeout=10)
+        assert time.monotonic() - t_start < 0.5 * len(jobs)
+
+
+def test_worker_job_timeout(fake_matlab):
+    with fake_matlab().start_worker() as worker:
+        job = worker.submit(scripts=["pause(2);"])
+        with pytest.raises(TimeoutError):
+            job.wait(timeout=0.1)
+
+
+def test_worker_behind_launcher(fake_matlab, launcher):
+    matlab = fake_matlab()
+    with matlab.start_worker() as worker:
+        assert worker.alive
+        job = worker.submit(scripts=["disp('Job');"])
+        assert job.wait(timeout=10) == FINISHED
+        assert worker.alive
+    assert not worker.alive
+    assert matlab.proc.returncode == 0